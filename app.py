@@ -3,12 +3,17 @@ from gui import LUMEModelVisualApp
 MODEL_PATH = (
     "/Users/mvicto/Desktop/projects/lume/lume-model-visual/lcls_cu_injector_ml_model"
 )
+# Further model directories to compare against MODEL_PATH on the same inputs
+COMPARISON_MODEL_PATHS: list[str] = []
 
 
 def main() -> None:
     model_file_path = MODEL_PATH + "/model_config.yaml"
+    comparison_file_paths = [
+        path + "/model_config.yaml" for path in COMPARISON_MODEL_PATHS
+    ]
 
-    app = LUMEModelVisualApp(model_file_path)
+    app = LUMEModelVisualApp(model_file_path, comparison_paths=comparison_file_paths)
     app.start()
 
 
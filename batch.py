@@ -0,0 +1,356 @@
+"""Headless evaluation of a model over a table of inputs.
+
+Rows are read from a CSV or Parquet file in chunks, evaluated with the
+same ``TorchModel`` path as the app, optionally in a pool of worker
+processes, and appended to a Parquet file chunk by chunk, so memory use is
+bounded by the chunk size however large the table is::
+
+    python batch.py model.yml inputs.parquet outputs.parquet --workers 4
+
+The results are also written to a history log next to the Parquet file,
+``outputs.history`` here, which the app loads with ``history_path``.
+"""
+
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, NamedTuple
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import numpy.typing as npt
+
+from inference import COMPILE_MODES, InferenceOptions, optimize_model, warm_up
+from streaming import evaluate_batch
+
+if TYPE_CHECKING:
+    from lume_model.models import TorchModel
+
+DEFAULT_CHUNK_SIZE = 65_536  # rows per model call
+CHUNKS_PER_WORKER = 2  # chunks in flight per worker process
+HISTORY_EXTENSION = ".history"
+
+# The model of this worker process, loaded by ``_initialize_worker``
+_worker_model: "TorchModel | None" = None
+
+
+class BatchReport(NamedTuple):
+    rows: int
+    chunks: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def read_chunks(
+    path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[dict[str, npt.NDArray[np.float64]]]:
+    """Read the numeric columns of a CSV or Parquet file, ``chunk_size`` rows at a time.
+
+    Only one chunk is held in memory at once. Reading Parquet files
+    requires pyarrow.
+
+    Args:
+        path: A ``.csv``, ``.parquet`` or ``.pq`` file.
+        chunk_size: Rows per chunk.
+    Raises:
+        ValueError: If the file type is not supported.
+    """
+    import pandas as pd
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        frames: Iterator[pd.DataFrame] = pd.read_csv(path, chunksize=chunk_size)
+    elif extension in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        frames = (
+            batch.to_pandas()
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size)
+        )
+    else:
+        raise ValueError(f"Cannot read inputs from '{path}'.")
+
+    for frame in frames:
+        frame = frame.select_dtypes("number")
+        yield {
+            str(name): frame[name].to_numpy(dtype=np.float64) for name in frame.columns
+        }
+
+
+def default_history_path(output_path: str) -> str:
+    """Where the history log of ``output_path`` is written unless told otherwise."""
+    return os.path.splitext(output_path)[0] + HISTORY_EXTENSION
+
+
+def load_model(model_path: str, options: InferenceOptions) -> "TorchModel":
+    """Load, optimize and warm up a model as the app does."""
+    from lume_model.models import TorchModel
+
+    model = TorchModel(model_path)
+    optimize_model(model, model_path, options)
+    warm_up(model, options.warm_up_batch_sizes)
+    return model
+
+
+def _initialize_worker(model_path: str, options: InferenceOptions) -> None:
+    global _worker_model
+    _worker_model = load_model(model_path, options)
+
+
+def _evaluate_in_worker(
+    input_names: list[str], samples: npt.NDArray[np.float64]
+) -> dict[str, npt.NDArray[np.float64]]:
+    assert _worker_model is not None
+    return evaluate_batch(_worker_model, input_names, samples)
+
+
+class BatchEvaluator:
+    """Evaluates chunks of input rows in this process or in a process pool.
+
+    With ``workers`` processes, every process loads its own copy of the
+    model, and up to ``CHUNKS_PER_WORKER`` chunks per process are in flight
+    while results are consumed in input order.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        workers: int = 0,
+        inference: InferenceOptions | None = None,
+    ) -> None:
+        """Load the model, in every worker process if ``workers`` is given.
+
+        Args:
+            model_path: Path to the model configuration file.
+            workers: Number of worker processes; ``0`` evaluates in this
+                process.
+            inference: How the model is prepared; see ``LUMEModelVisualApp``.
+                Worker processes share the cores between them unless the
+                thread counts are set.
+        Raises:
+            ValueError: If ``workers`` is negative.
+        """
+        if workers < 0:
+            raise ValueError(f"Number of workers must not be negative, got {workers}.")
+
+        options = inference if inference is not None else InferenceOptions()
+        if workers > 0 and options.intra_op_threads is None:
+            # Each process would otherwise use every core
+            options = options._replace(
+                intra_op_threads=max(1, (os.cpu_count() or 1) // workers)
+            )
+
+        if workers > 0:
+            from lume_model.models import TorchModel
+
+            # Only the variables of the model are needed in this process
+            self.model = TorchModel(model_path)
+        else:
+            self.model = load_model(model_path, options)
+        self.input_names = [var.name for var in self.model.input_variables]
+        self.output_names = [var.name for var in self.model.output_variables]
+        self.defaults = np.array(
+            [
+                np.nan if var.default_value is None else float(var.default_value)
+                for var in self.model.input_variables
+            ]
+        )
+        self.workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+        if workers > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                # Forking a process that already runs torch threads can deadlock
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_worker,
+                initargs=(model_path, options),
+            )
+
+    def samples(
+        self, columns: dict[str, npt.NDArray[np.float64]]
+    ) -> npt.NDArray[np.float64]:
+        """Arrange a chunk as a ``(rows, n_inputs)`` matrix.
+
+        Inputs without a column take their default value.
+        """
+        count = len(next(iter(columns.values()), ()))
+        samples = np.empty((count, len(self.input_names)), dtype=np.float64)
+        for i, name in enumerate(self.input_names):
+            samples[:, i] = columns[name] if name in columns else self.defaults[i]
+        return samples
+
+    def evaluate(
+        self, chunks: Iterator[npt.NDArray[np.float64]]
+    ) -> Iterator[tuple[npt.NDArray[np.float64], dict[str, npt.NDArray[np.float64]]]]:
+        """Evaluate every chunk of samples, yielding ``(samples, outputs)`` in order."""
+        if self._pool is None:
+            for samples in chunks:
+                yield samples, evaluate_batch(self.model, self.input_names, samples)
+            return
+
+        pending: deque[
+            tuple[npt.NDArray[np.float64], Future[dict[str, npt.NDArray[np.float64]]]]
+        ] = deque()
+        for samples in chunks:
+            pending.append(
+                (
+                    samples,
+                    self._pool.submit(_evaluate_in_worker, self.input_names, samples),
+                )
+            )
+            if len(pending) >= self.workers * CHUNKS_PER_WORKER:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+
+def evaluate_file(
+    model_path: str,
+    input_path: str,
+    output_path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 0,
+    inference: InferenceOptions | None = None,
+    history_path: str | None = None,
+) -> BatchReport:
+    """Evaluate every row of an input table and write the results to Parquet.
+
+    The output has one float64 column per input, as evaluated, and per
+    output, and one row group per chunk. Writing Parquet requires pyarrow.
+    The same rows are written to a history log, which the app can load.
+
+    Args:
+        model_path: Path to the model configuration file.
+        input_path: CSV or Parquet table whose columns are matched to the
+            inputs by name; missing inputs take their default value.
+        output_path: Parquet file to write.
+        chunk_size: Rows read, evaluated and written at once.
+        workers: Number of worker processes; ``0`` evaluates in this process.
+        inference: How the model is prepared; see ``LUMEModelVisualApp``.
+        history_path: The history log the results are appended to. By
+            default, they replace the log at ``default_history_path``.
+    Raises:
+        ValueError: If the table has none of the model's inputs.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from history_log import HistoryLog
+
+    evaluator = BatchEvaluator(model_path, workers, inference)
+    names = [*evaluator.input_names, *evaluator.output_names]
+    schema = pa.schema([(name, pa.float64()) for name in names])
+    if history_path is None:
+        history_path = default_history_path(output_path)
+        # The log must hold the same rows as the Parquet file
+        if os.path.exists(history_path):
+            os.remove(history_path)
+    history_log = HistoryLog(
+        history_path, evaluator.input_names, evaluator.output_names
+    )
+
+    def chunks() -> Iterator[npt.NDArray[np.float64]]:
+        for index, columns in enumerate(read_chunks(input_path, chunk_size)):
+            if index == 0:
+                missing = [
+                    name for name in evaluator.input_names if name not in columns
+                ]
+                if len(missing) == len(evaluator.input_names):
+                    raise ValueError(
+                        f"'{input_path}' has none of the model's input columns."
+                    )
+                if missing:
+                    print(
+                        f"Warning: '{input_path}' has no column for "
+                        f"{', '.join(missing)}; using default values."
+                    )
+            yield evaluator.samples(columns)
+
+    rows = 0
+    count = 0
+    start = time.perf_counter()
+    try:
+        with pq.ParquetWriter(output_path, schema) as writer:
+            for samples, outputs in evaluator.evaluate(chunks()):
+                columns = {
+                    **{
+                        name: samples[:, i]
+                        for i, name in enumerate(evaluator.input_names)
+                    },
+                    **outputs,
+                }
+                writer.write_table(
+                    pa.table({name: columns[name] for name in names}, schema=schema)
+                )
+                history_log.extend(columns)
+                rows += len(samples)
+                count += 1
+                seconds = time.perf_counter() - start
+                print(f"{rows} rows, {rows / seconds:.0f} rows/s", file=sys.stderr)
+    finally:
+        evaluator.close()
+        history_log.close()
+    return BatchReport(rows=rows, chunks=count, seconds=time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("model", help="model configuration file")
+    parser.add_argument("input", help="CSV or Parquet table of inputs")
+    parser.add_argument("output", help="Parquet file to write")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Rows per model call (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes; 0 evaluates in this process (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--compile", choices=[mode for mode in COMPILE_MODES if mode is not None]
+    )
+    parser.add_argument(
+        "--history",
+        help=(
+            "Append the results to this history log, which the visualizer "
+            "loads with its history_path; by default the results replace the "
+            f"log next to the output, with the extension {HISTORY_EXTENSION}."
+        ),
+    )
+    args = parser.parse_args()
+
+    report = evaluate_file(
+        args.model,
+        args.input,
+        args.output,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        inference=InferenceOptions(compile=args.compile),
+        history_path=args.history,
+    )
+    print(
+        f"Evaluated {report.rows} rows in {report.chunks} chunks in "
+        f"{report.seconds:.2f} s ({report.rows_per_second:.0f} rows/s)."
+    )
+    print(f"History log: {args.history or default_history_path(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Headless benchmarks of the evaluation and plotting hot paths.
+
+A synthetic ``TorchModel`` (a small MLP with configurable numbers of inputs
+and outputs) drives ``StateManager`` and ``UI`` without a browser, and the
+results are written as JSON so runs can be compared across versions::
+
+    python benchmark.py --output results.json
+"""
+
+from typing import Any
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import torch
+
+from trame.app import get_server
+
+from lume_model.models import TorchModel
+from lume_model.variables import ScalarVariable
+
+from inference import InferenceOptions, optimize_model, warm_up
+from metrics import Metrics
+from state import StateManager
+from streaming import BatchStreamer, evaluate_batch
+from ui import UI
+
+DEFAULT_VARIABLES = 10
+DEFAULT_HISTORY = 10_000
+DEFAULT_TICKS = 50
+
+HISTORY_SWEEP = (100, 1_000, 10_000, 100_000, 1_000_000)
+VARIABLE_SWEEP = (5, 10, 50, 100, 500, 1000)
+RATE_SWEEP = (100, 1_000, 10_000, 100_000)  # samples per second
+DISPLAY_INTERVAL = 0.2  # seconds between plot updates when streaming
+INFERENCE_SWEEP = {
+    "baseline": InferenceOptions(inference_mode=False),
+    "inference_mode": InferenceOptions(),
+    "script": InferenceOptions(compile="script"),
+    "compile": InferenceOptions(compile="compile"),
+    "single_thread": InferenceOptions(intra_op_threads=1),
+}
+INFERENCE_BATCH_SIZES = (1, 64, 1024)
+
+_server_count = 0
+
+
+def make_synthetic_model(
+    n_inputs: int, n_outputs: int, hidden: int = 32, seed: int = 0
+) -> TorchModel:
+    """Build a ``TorchModel`` wrapping a randomly initialized MLP.
+
+    Inputs are named ``x_<i>`` with range ``[0, 1]`` and default ``0.5``;
+    outputs are named ``y_<i>``.
+    """
+    torch.manual_seed(seed)
+    network = torch.nn.Sequential(
+        torch.nn.Linear(n_inputs, hidden),
+        torch.nn.Tanh(),
+        torch.nn.Linear(hidden, n_outputs),
+    ).double()
+    input_variables = [
+        ScalarVariable(name=f"x_{i}", default_value=0.5, value_range=(0.0, 1.0))
+        for i in range(n_inputs)
+    ]
+    output_variables = [ScalarVariable(name=f"y_{i}") for i in range(n_outputs)]
+    return TorchModel(
+        model=network,
+        input_variables=input_variables,
+        output_variables=output_variables,
+    )
+
+
+def _create_ui(n_variables: int, history_length: int) -> tuple[UI, Metrics]:
+    """Create a headless UI whose history already holds ``history_length`` samples."""
+    global _server_count
+    _server_count += 1
+    server = get_server(f"benchmark_{_server_count}", client_type="vue3")
+
+    model = make_synthetic_model(n_variables, n_variables)
+    state_manager = StateManager(server, model, history_capacity=history_length)
+    rng = np.random.default_rng(0)
+    state_manager.history.extend(
+        {
+            name: rng.standard_normal(history_length)
+            for name in state_manager.output_variable_names
+        }
+    )
+
+    metrics = Metrics(enabled=True)
+    return UI(state_manager, metrics=metrics), metrics
+
+
+def _latency_summary(seconds: list[float]) -> dict[str, float]:
+    samples = np.asarray(seconds) * 1000.0
+    return {
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "max_ms": float(samples.max()),
+    }
+
+
+async def _evaluation_ticks(
+    ui: UI, ticks: int, rng: np.random.Generator
+) -> list[float]:
+    """Move one input per tick, like a user dragging a slider, and re-evaluate."""
+    inputs = ui.state_manager.schema.inputs
+    latencies = []
+    for tick in range(ticks):
+        spec = inputs[tick % len(inputs)]
+        ui.state_manager.set_input(spec.tensor_index, float(rng.uniform(0.0, 1.0)))
+        start = time.perf_counter()
+        await ui.request_evaluation()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def benchmark_ticks(
+    n_variables: int, history_length: int, ticks: int
+) -> dict[str, Any]:
+    """Measure interactive evaluation ticks for one configuration.
+
+    Returns:
+        Tick latency, per-stage latencies, pushed payload sizes and the
+        memory allocated over the ticks.
+    """
+    ui, metrics = _create_ui(n_variables, history_length)
+    try:
+        latencies = asyncio.run(_evaluation_ticks(ui, ticks, np.random.default_rng(0)))
+
+        # Measured separately, since tracing allocations slows every tick down
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        asyncio.run(_evaluation_ticks(ui, ticks, np.random.default_rng(1)))
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        ui.scheduler.shutdown()
+
+    payloads = metrics.payloads()
+    return {
+        "variables": n_variables,
+        "history": history_length,
+        "ticks": ticks,
+        "tick": _latency_summary(latencies),
+        "stages": metrics.summary(),
+        "payload_bytes_per_push": {
+            figure: payload["bytes"] / payload["pushes"]
+            for figure, payload in payloads.items()
+        },
+        "memory_growth_bytes": current - before,
+        "memory_peak_bytes": peak - before,
+    }
+
+
+async def _streaming_ticks(ui: UI, streamer: BatchStreamer, ticks: int) -> list[float]:
+    latencies = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        await ui.request_batch(streamer)
+        await ui.request_update_plot()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def benchmark_streaming(
+    rate: int, n_variables: int, history_length: int, ticks: int
+) -> dict[str, Any]:
+    """Measure batched streaming at ``rate`` samples per second.
+
+    Each tick evaluates the samples of one display interval in a single
+    batch and refreshes the plots, as the batched data stream does. The
+    rate is sustainable if a tick completes within the display interval.
+    """
+    ui, metrics = _create_ui(n_variables, history_length)
+    batch_size = max(1, round(rate * DISPLAY_INTERVAL))
+    streamer = BatchStreamer(ui.model, ui.state_manager.history, batch_size, seed=0)
+    try:
+        start = time.perf_counter()
+        latencies = asyncio.run(_streaming_ticks(ui, streamer, ticks))
+        elapsed = time.perf_counter() - start
+    finally:
+        ui.scheduler.shutdown()
+
+    tick = _latency_summary(latencies)
+    return {
+        "rate": rate,
+        "variables": n_variables,
+        "history": history_length,
+        "batch_size": batch_size,
+        "ticks": ticks,
+        "tick": tick,
+        "max_samples_per_second": batch_size * ticks / elapsed,
+        "sustainable": tick["p95_ms"] < DISPLAY_INTERVAL * 1000.0,
+        "stages": metrics.summary(),
+    }
+
+
+def benchmark_inference(
+    name: str,
+    options: InferenceOptions,
+    n_variables: int,
+    calls: int,
+    batch_sizes: tuple[int, ...] = INFERENCE_BATCH_SIZES,
+) -> dict[str, Any]:
+    """Measure model evaluation latency prepared with ``options``.
+
+    Preparation and warm-up are timed separately from the evaluations. The
+    intra-op thread count is restored afterwards, so configurations can be
+    compared in one run.
+    """
+    threads = torch.get_num_threads()
+    model = make_synthetic_model(n_variables, n_variables)
+    names = [var.name for var in model.input_variables]
+    rng = np.random.default_rng(0)
+    try:
+        start = time.perf_counter()
+        optimize_model(model, None, options)
+        optimize_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm_up(model, batch_sizes)
+        warm_up_seconds = time.perf_counter() - start
+
+        evaluation = {}
+        for batch_size in batch_sizes:
+            latencies = []
+            for _ in range(calls):
+                samples = rng.uniform(0.0, 1.0, (batch_size, n_variables))
+                start = time.perf_counter()
+                evaluate_batch(model, names, samples)
+                latencies.append(time.perf_counter() - start)
+            evaluation[str(batch_size)] = _latency_summary(latencies)
+    finally:
+        torch.set_num_threads(threads)
+
+    return {
+        "name": name,
+        "options": options._asdict(),
+        "variables": n_variables,
+        "optimize_s": optimize_seconds,
+        "warm_up_s": warm_up_seconds,
+        "evaluate": evaluation,
+    }
+
+
+def run(
+    histories: tuple[int, ...] = HISTORY_SWEEP,
+    variables: tuple[int, ...] = VARIABLE_SWEEP,
+    rates: tuple[int, ...] = RATE_SWEEP,
+    ticks: int = DEFAULT_TICKS,
+    inference: tuple[str, ...] = tuple(INFERENCE_SWEEP),
+) -> dict[str, Any]:
+    """Run every sweep; each varies one parameter around the defaults."""
+    results: dict[str, Any] = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "torch": torch.__version__,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "defaults": {
+            "variables": DEFAULT_VARIABLES,
+            "history": DEFAULT_HISTORY,
+            "ticks": ticks,
+        },
+        "history": [],
+        "variables": [],
+        "streaming": [],
+        "inference": [],
+    }
+    for history_length in histories:
+        print(f"Benchmarking history length {history_length}...", file=sys.stderr)
+        results["history"].append(
+            benchmark_ticks(DEFAULT_VARIABLES, history_length, ticks)
+        )
+    for n_variables in variables:
+        print(f"Benchmarking {n_variables} variables...", file=sys.stderr)
+        results["variables"].append(
+            benchmark_ticks(n_variables, DEFAULT_HISTORY, ticks)
+        )
+    for rate in rates:
+        print(f"Benchmarking streaming at {rate} samples/s...", file=sys.stderr)
+        results["streaming"].append(
+            benchmark_streaming(rate, DEFAULT_VARIABLES, DEFAULT_HISTORY, ticks)
+        )
+    for name in inference:
+        print(f"Benchmarking {name} inference...", file=sys.stderr)
+        results["inference"].append(
+            benchmark_inference(name, INFERENCE_SWEEP[name], DEFAULT_VARIABLES, ticks)
+        )
+    return results
+
+
+def _int_list(value: str) -> tuple[int, ...]:
+    return tuple(int(float(item)) for item in value.split(",") if item)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--history",
+        type=_int_list,
+        default=HISTORY_SWEEP,
+        help="Comma-separated history lengths (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--variables",
+        type=_int_list,
+        default=VARIABLE_SWEEP,
+        help="Comma-separated input/output counts (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--rates",
+        type=_int_list,
+        default=RATE_SWEEP,
+        help="Comma-separated streaming rates in samples/s (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--inference",
+        type=lambda value: tuple(item for item in value.split(",") if item),
+        default=tuple(INFERENCE_SWEEP),
+        help=(
+            "Comma-separated inference configurations, from "
+            f"{', '.join(INFERENCE_SWEEP)} (default: all)."
+        ),
+    )
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS)
+    parser.add_argument(
+        "--output", help="Write the JSON results here instead of to stdout."
+    )
+    args = parser.parse_args()
+
+    for name in args.inference:
+        if name not in INFERENCE_SWEEP:
+            parser.error(f"unknown inference configuration '{name}'")
+
+    results = run(args.history, args.variables, args.rates, args.ticks, args.inference)
+    text = json.dumps(results, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+import threading
+
+if TYPE_CHECKING:
+    from lume_model.models import TorchModel
+
+
+class EvaluationCache:
+    """Bounded LRU cache of model outputs keyed by the quantized input vector.
+
+    Inputs with a value range are quantized to the slider step, so scrubbing
+    back to a setting that was already evaluated is a cache hit. Inputs
+    without a usable range are keyed on their exact value.
+
+    The quantization depends on the model's input variables; call
+    ``invalidate`` whenever a different model is loaded.
+
+    The cache may be shared by sessions evaluating on different threads, so
+    lookups and insertions are serialized with a lock.
+    """
+
+    DEFAULT_MAX_SIZE = 1024
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, steps: int = 100) -> None:
+        if max_size <= 0:
+            raise ValueError(f"Cache size must be positive, got {max_size}.")
+
+        self.max_size = max_size
+        self.steps = steps
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[tuple[float | None, ...], dict[str, float]] = (
+            OrderedDict()
+        )
+        self._quantization: list[tuple[str, float, float]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def invalidate(self, model: "TorchModel") -> None:
+        """Drop every entry and derive the input quantization from ``model``."""
+        quantization = []
+        for var in model.input_variables:
+            low, step = 0.0, 0.0
+            if var.value_range is not None:
+                low = var.value_range[0]
+                step = (var.value_range[1] - low) / self.steps
+            quantization.append((var.name, low, step))
+
+        with self._lock:
+            self._entries.clear()
+            self._quantization = quantization
+
+    def key(self, inputs: dict[str, float]) -> tuple[float | None, ...]:
+        """Return the cache key for ``inputs``; missing inputs are keyed as None."""
+        key: list[float | None] = []
+        for name, low, step in self._quantization:
+            value = inputs.get(name)
+            if value is not None and step > 0:
+                value = round((value - low) / step)
+            key.append(value)
+        return tuple(key)
+
+    def get(self, key: tuple[float | None, ...]) -> dict[str, float] | None:
+        """Return the cached outputs for ``key``, marking them recently used."""
+        with self._lock:
+            outputs = self._entries.get(key)
+            if outputs is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return outputs
+
+    def put(self, key: tuple[float | None, ...], outputs: dict[str, float]) -> None:
+        with self._lock:
+            self._entries[key] = outputs
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
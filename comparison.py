@@ -0,0 +1,230 @@
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+import os
+import time
+
+import numpy as np
+import numpy.typing as npt
+
+from lume_model.models import TorchModel
+
+from history import OutputHistory
+from streaming import evaluate_batch
+
+T = TypeVar("T")
+
+
+def model_labels(model_paths: list[str]) -> list[str]:
+    """Name each model after the directory of its configuration file.
+
+    Configurations in the same directory are told apart by file name, and
+    any remaining duplicates by a running number.
+    """
+    directories = [
+        os.path.basename(os.path.dirname(os.path.abspath(path))) for path in model_paths
+    ]
+    labels = [
+        f"{directory}/{os.path.splitext(os.path.basename(path))[0]}"
+        if directories.count(directory) > 1
+        else directory
+        for directory, path in zip(directories, model_paths)
+    ]
+    named = list(labels)
+    seen: dict[str, int] = {}
+    for i, label in enumerate(named):
+        if named.count(label) > 1:
+            seen[label] = seen.get(label, 0) + 1
+            labels[i] = f"{label} ({seen[label]})"
+    return labels
+
+
+class ModelComparison:
+    """Models evaluated side by side with the app's model on identical inputs.
+
+    Every input snapshot the reference model evaluates is also evaluated by
+    each compared model, each on its own worker thread, so all models run
+    concurrently (torch releases the GIL while computing). The outputs of
+    the compared models are appended to their histories only once every
+    model has finished the snapshot, so the histories always line up with
+    the reference history sample for sample.
+
+    The compared models must take the same inputs as the reference model;
+    only the outputs they share with it are compared.
+    """
+
+    def __init__(
+        self,
+        reference: TorchModel,
+        models: Mapping[str, TorchModel],
+        capacity: int,
+        reference_label: str = "reference",
+    ) -> None:
+        """Prepare a comparison of ``models`` against ``reference``.
+
+        Args:
+            reference: The model the app evaluates.
+            models: Compared models, keyed by label.
+            capacity: Samples kept per compared output; should match the
+                reference history.
+            reference_label: How the reference model is labelled in
+                latency reports.
+        Raises:
+            ValueError: If no models are given, a label is taken twice, or a
+                model's inputs differ from the reference inputs, or it
+                shares no outputs with the reference.
+        """
+        if not models:
+            raise ValueError("A comparison needs at least one compared model.")
+        if reference_label in models:
+            raise ValueError(
+                f"Compared model label '{reference_label}' is the reference label."
+            )
+
+        self.input_names = [var.name for var in reference.input_variables]
+        reference_outputs = [var.name for var in reference.output_variables]
+        self.reference_label = reference_label
+        self.models = dict(models)
+        self.outputs: dict[str, list[str]] = {}
+        for label, model in self.models.items():
+            inputs = {var.name for var in model.input_variables}
+            if inputs != set(self.input_names):
+                missing = sorted(set(self.input_names) - inputs)
+                extra = sorted(inputs - set(self.input_names))
+                raise ValueError(
+                    f"Model '{label}' does not take the reference inputs "
+                    f"(missing: {', '.join(missing) or 'none'}; "
+                    f"extra: {', '.join(extra) or 'none'})."
+                )
+            names = {var.name for var in model.output_variables}
+            shared = [name for name in reference_outputs if name in names]
+            if not shared:
+                raise ValueError(
+                    f"Model '{label}' shares no outputs with the reference."
+                )
+            self.outputs[label] = shared
+
+        self.histories = {
+            label: OutputHistory(outputs, capacity)
+            for label, outputs in self.outputs.items()
+        }
+        self._defaults = np.array(
+            [
+                np.nan if var.default_value is None else float(var.default_value)
+                for var in reference.input_variables
+            ]
+        )
+        # Seconds per evaluation, latest and mean, per label including the
+        # reference; ``last_run`` only has the models that succeeded last
+        self.last_run: dict[str, float] = {}
+        self.latency: dict[str, float] = {}
+        self.mean_latency: dict[str, float] = {}
+        self.evaluations: dict[str, int] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.models), thread_name_prefix="comparison"
+        )
+
+    @property
+    def labels(self) -> list[str]:
+        """The reference label followed by the compared model labels."""
+        return [self.reference_label, *self.models]
+
+    @staticmethod
+    def trace_name(output: str, label: str) -> str:
+        return f"{output} [{label}]"
+
+    def row(self, inputs: Mapping[str, float]) -> npt.NDArray[np.float64]:
+        """Arrange ``inputs`` as a ``(1, n_inputs)`` matrix; missing ones get defaults."""
+        return np.array(
+            [
+                [
+                    inputs.get(name, default)
+                    for name, default in zip(self.input_names, self._defaults)
+                ]
+            ],
+            dtype=np.float64,
+        )
+
+    def run(
+        self,
+        reference: Callable[[], tuple[T, float | None]],
+        samples: npt.NDArray[np.float64],
+    ) -> T:
+        """Evaluate ``samples`` with every compared model while ``reference`` runs.
+
+        Args:
+            reference: Evaluates and records the same samples with the
+                reference model; called on the current thread. Returns its
+                result and the seconds spent in the model call alone, as the
+                compared models are timed, or ``None`` if the model was not
+                called, e.g. on a cache hit.
+            samples: One input vector per row, in reference input order.
+        Returns:
+            The result of ``reference``.
+        Raises:
+            Exception: Whatever a compared model raised other than an
+                evaluation error, once the histories are extended.
+
+        A compared model that fails records NaN for the samples, so its
+        history stays aligned with the reference history.
+        """
+        futures = {
+            label: self._executor.submit(self._evaluate, model, samples)
+            for label, model in self.models.items()
+        }
+        result, seconds = reference()
+        latencies = {} if seconds is None else {self.reference_label: seconds}
+
+        columns: dict[str, Mapping[str, npt.ArrayLike]] = {}
+        error: Exception | None = None
+        for label, future in futures.items():
+            try:
+                columns[label], latencies[label] = future.result()
+            except Exception as e:
+                if isinstance(e, (RuntimeError, ValueError)):
+                    # The model rejected the inputs or failed on them
+                    print(f"Warning: Evaluation of model '{label}' failed: {e}")
+                elif error is None:
+                    error = e
+                columns[label] = {
+                    name: np.full(len(samples), np.nan) for name in self.outputs[label]
+                }
+
+        # Every model has finished this snapshot
+        for label, history in self.histories.items():
+            history.extend(columns[label])
+        self._record(latencies)
+        if error is not None:
+            raise error
+        return result
+
+    def _evaluate(
+        self, model: TorchModel, samples: npt.NDArray[np.float64]
+    ) -> tuple[dict[str, npt.NDArray[np.float64]], float]:
+        start = time.perf_counter()
+        outputs = evaluate_batch(model, self.input_names, samples)
+        return outputs, time.perf_counter() - start
+
+    def _record(self, latencies: dict[str, float]) -> None:
+        self.last_run = latencies
+        for label, seconds in latencies.items():
+            count = self.evaluations.get(label, 0) + 1
+            mean = self.mean_latency.get(label, seconds)
+            self.evaluations[label] = count
+            self.latency[label] = seconds
+            self.mean_latency[label] = mean + (seconds - mean) / count
+
+    def pad(self, count: int) -> None:
+        """Clear the histories and fill them with ``count`` samples of NaN.
+
+        Used when the reference history is refilled from a log, which holds
+        no outputs of the compared models.
+        """
+        for label, history in self.histories.items():
+            history.clear()
+            history.extend(
+                {name: np.full(count, np.nan) for name in self.outputs[label]}
+            )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
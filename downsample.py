@@ -0,0 +1,233 @@
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+
+def _reduce_buckets(
+    values: npt.NDArray[np.floating], offset: int, bucket_size: int
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.floating]]:
+    """Return the (index, value) of the min and max of consecutive buckets.
+
+    Args:
+        values: Samples to reduce; the length must be a multiple of ``bucket_size``.
+        offset: Absolute sample index of ``values[0]``.
+        bucket_size: Number of samples per bucket.
+    Returns:
+        Absolute indices and values with shape ``(n_buckets, 2)``, where
+        column 0 is the bucket minimum and column 1 the maximum. NaN samples
+        are ignored unless a bucket is entirely NaN.
+    """
+    blocks = values.reshape(-1, bucket_size)
+    nan = np.isnan(blocks)
+    lo = np.argmin(np.where(nan, np.inf, blocks), axis=1)
+    hi = np.argmax(np.where(nan, -np.inf, blocks), axis=1)
+
+    local = np.stack([lo, hi], axis=1)
+    rows = np.arange(len(blocks))[:, None]
+    starts = offset + rows * bucket_size
+    return starts + local, blocks[rows, local]
+
+
+class _Layout(NamedTuple):
+    """Composition of a returned trace.
+
+    The trace is ``head`` points, then ``units`` units starting at unit
+    ``first``, then ``tail`` points. A unit is a raw sample if
+    ``bucket_size`` is 0, otherwise a completed bucket of two points. The
+    head and tail are partial buckets.
+    """
+
+    bucket_size: int
+    first: int
+    units: int
+    head: int
+    tail: int
+
+    @property
+    def points_per_unit(self) -> int:
+        return 2 if self.bucket_size else 1
+
+
+class TraceEdit(NamedTuple):
+    """Turns the previously returned trace into the current one.
+
+    Drop ``drop_head`` points from the start and ``drop_tail`` from the end,
+    then prepend the ``head`` and append the ``tail`` points.
+    """
+
+    drop_head: int
+    drop_tail: int
+    head: tuple[npt.NDArray[np.int64], npt.NDArray[np.floating]]
+    tail: tuple[npt.NDArray[np.int64], npt.NDArray[np.floating]]
+
+
+class MinMaxDownsampler:
+    """Min/max-per-bucket reduction of one trace to a fixed point budget.
+
+    The trace is split into buckets aligned to absolute sample indices, and
+    each bucket contributes its minimum and maximum sample, so peaks survive
+    any amount of reduction. Completed buckets are cached and only new
+    samples are reduced on each update. When the window outgrows the
+    budget, the bucket size doubles and cached buckets are merged pairwise.
+
+    Completed buckets never change, so a client holding the previous trace
+    can be brought up to date with ``changes``, which only carries the
+    buckets completed since and the partial buckets at either end.
+    """
+
+    def __init__(self, max_points: int) -> None:
+        if max_points < 4 or max_points % 2:
+            raise ValueError(
+                f"Downsampling budget must be an even number >= 4, got {max_points}."
+            )
+
+        self.max_points = max_points
+        self.reset()
+
+    def reset(self) -> None:
+        self.bucket_size = 1
+        # Completed buckets [self._first, self._first + len(self._index))
+        self._first = 0
+        self._index = np.empty((0, 2), dtype=np.int64)
+        self._value = np.empty((0, 2), dtype=np.float64)
+        self._total = 0
+        self._layout: _Layout | None = None
+
+    def update(
+        self, values: npt.NDArray[np.floating], total: int
+    ) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.floating]]:
+        """Return the downsampled trace for the current history window.
+
+        Args:
+            values: The samples currently held in history, oldest first.
+            total: Absolute index one past the newest sample.
+        Returns:
+            Absolute sample indices and the matching values.
+        """
+        start = total - len(values)
+        if total < self._total:
+            self.reset()
+        self._total = total
+
+        if len(values) <= self.max_points:
+            self.reset()
+            self._total = total
+            self._layout = _Layout(0, start, len(values), 0, 0)
+            return np.arange(start, total), values
+
+        while -(-total // self.bucket_size) - start // self.bucket_size > (
+            self.max_points // 2
+        ):
+            self._double()
+
+        size = self.bucket_size
+        first_full = -(-start // size)
+        last_full = total // size
+
+        # Forget buckets that reach back before the history window
+        if len(self._index) == 0 or first_full > self._first + len(self._index):
+            self._first = first_full
+            self._index = self._index[:0]
+            self._value = self._value[:0]
+        elif first_full > self._first:
+            drop = first_full - self._first
+            self._first = first_full
+            self._index = self._index[drop:]
+            self._value = self._value[drop:]
+
+        cached_end = self._first + len(self._index)
+        if cached_end < last_full:
+            new = values[cached_end * size - start : last_full * size - start]
+            index, value = _reduce_buckets(new, cached_end * size, size)
+            self._index = np.concatenate([self._index, index])
+            self._value = np.concatenate([self._value, value])
+
+        parts_index: list[npt.NDArray[np.int64]] = [self._index]
+        parts_value: list[npt.NDArray[np.floating]] = [self._value]
+        # Partial buckets at either end are reduced from scratch every time
+        head = values[: first_full * size - start]
+        if len(head):
+            index, value = _reduce_buckets(head, start, len(head))
+            parts_index.insert(0, index)
+            parts_value.insert(0, value)
+        tail = values[last_full * size - start :]
+        if len(tail):
+            index, value = _reduce_buckets(tail, last_full * size, len(tail))
+            parts_index.append(index)
+            parts_value.append(value)
+
+        self._layout = _Layout(
+            size,
+            self._first,
+            len(self._index),
+            2 if len(head) else 0,
+            2 if len(tail) else 0,
+        )
+        index = np.concatenate(parts_index)
+        value = np.concatenate(parts_value)
+        # Emit each bucket's two samples in time order
+        order = np.argsort(index, axis=1)
+        index = np.take_along_axis(index, order, axis=1).reshape(-1)
+        value = np.take_along_axis(value, order, axis=1).reshape(-1)
+        return index, value
+
+    def changes(self, values: npt.NDArray[np.floating], total: int) -> TraceEdit | None:
+        """Return how the trace last returned by ``update`` changes for this window.
+
+        Takes the same arguments as ``update``, and afterwards ``update``
+        returns the trace the edit leads to.
+
+        Returns:
+            The edit, or ``None`` if the trace has to be replaced as a whole:
+            nothing was returned since the last reset, the bucket size
+            changed, or the old and new trace share no unit.
+        """
+        previous, previous_total = self._layout, self._total
+        index, value = self.update(values, total)
+        layout = self._layout
+        if (
+            previous is None
+            or layout is None
+            or total < previous_total
+            or previous.bucket_size != layout.bucket_size
+        ):
+            return None
+
+        low = max(previous.first, layout.first)
+        high = min(previous.first + previous.units, layout.first + layout.units)
+        if high <= low:
+            return None
+
+        unit = layout.points_per_unit
+        head = layout.head + (low - layout.first) * unit
+        tail = layout.tail + (layout.first + layout.units - high) * unit
+        return TraceEdit(
+            drop_head=previous.head + (low - previous.first) * unit,
+            drop_tail=previous.tail + (previous.first + previous.units - high) * unit,
+            head=(index[:head], value[:head]),
+            tail=(index[len(index) - tail :], value[len(value) - tail :]),
+        )
+
+    def _double(self) -> None:
+        self.bucket_size *= 2
+
+        # Only pairs whose partner is still cached can be merged; an unpaired
+        # bucket at either end becomes part of a partial bucket.
+        if self._first % 2:
+            self._first += 1
+            self._index = self._index[1:]
+            self._value = self._value[1:]
+        if len(self._index) % 2:
+            self._index = self._index[:-1]
+            self._value = self._value[:-1]
+        self._first //= 2
+
+        index = self._index.reshape(-1, 4)
+        value = self._value.reshape(-1, 4)
+        rows = np.arange(len(value))[:, None]
+        lo = np.argmin(np.where(np.isnan(value), np.inf, value)[:, [0, 2]], axis=1)
+        hi = np.argmax(np.where(np.isnan(value), -np.inf, value)[:, [1, 3]], axis=1)
+        columns = np.stack([2 * lo, 2 * hi + 1], axis=1)
+        self._index = index[rows, columns]
+        self._value = value[rows, columns]
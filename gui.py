@@ -1,55 +1,464 @@
-from typing import Any
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
 import asyncio
+import os
+
+from aiohttp import web
+import numpy as np
 
 from trame_server import Server
 from trame_server.core import BackendType, ExecModeType
 from trame.decorators import change, life_cycle, controller
 
 from trame.app import TrameApp
+from trame.ui.vuetify3 import SinglePageLayout
+from trame.widgets.html import Div
+from trame.widgets.vuetify3 import VContainer, VProgressCircular
 
-from lume_model.models import TorchModel
-
-from state import StateManager
+from cache import EvaluationCache
+from history_log import HistoryLog, HistoryReader
+from metrics import Metrics, StartupProfile
+from refresh import RefreshController
+from sources import InputSource, ReadingQueue, readings_to_samples
 
+# torch, lume-model and plotly take seconds to import, so the modules that
+# need them are only imported once the model is loaded.
+if TYPE_CHECKING:
+    from lume_model.models import TorchModel
 
-from ui import UI
+    from comparison import ModelComparison
+    from hub import ModelHub
+    from inference import InferenceOptions
+    from streaming import BatchStreamer
+    from ui import UI
+    from uncertainty import NoiseModel, UncertaintyPropagator
 
 
 class LUMEModelVisualApp(TrameApp):  # type: ignore[misc]
     server: Server  # pyright: ignore[reportIncompatibleMethodOverride]
-    model: TorchModel
+    model: "TorchModel"
 
     DEFAULT_UPDATE_INTERVAL = 1.0  # seconds
+    DEFAULT_DISPLAY_INTERVAL = 0.2  # seconds, when streaming in batches
+    METRICS_ROUTE = "/metrics"
+    SOURCE_MAX_BATCH = 4096  # readings per model call
+    SOURCE_DRAIN_INTERVAL = 0.02  # seconds, lets readings accumulate into batches
 
     def __init__(
         self,
         model_path: str,
+        stream_batch_size: int | None = None,
+        stream_sample_rate: float | None = None,
+        metrics_enabled: bool = False,
+        metrics_log_path: str | None = None,
+        background_loading: bool = False,
+        history_path: str | None = None,
+        hub: "ModelHub | None" = None,
+        server: Server | str | None = None,
+        min_refresh_interval: float = RefreshController.DEFAULT_MIN_INTERVAL,
+        max_refresh_interval: float = RefreshController.DEFAULT_MAX_INTERVAL,
+        input_source: InputSource | None = None,
+        source_queue_size: int = ReadingQueue.DEFAULT_MAX_SIZE,
+        source_queue_policy: str = ReadingQueue.DEFAULT_POLICY,
+        inference: "InferenceOptions | None" = None,
+        comparison_paths: list[str] | None = None,
+        input_noise: "NoiseModel | Mapping[str, NoiseModel] | None" = None,
     ) -> None:
+        """Create the app.
+
+        Args:
+            model_path: Path to the model configuration file.
+            stream_batch_size: If given, streaming evaluates batches of this
+                many inputs jittered around the slider values, and the display
+                refreshes independently at an adaptive rate.
+            stream_sample_rate: Target samples per second for batched
+                streaming. ``None`` evaluates at full throughput.
+            metrics_enabled: Record per-stage latencies and payload sizes,
+                show them in a performance panel and serve them at
+                ``METRICS_ROUTE``.
+            metrics_log_path: If given, also append every recording to this
+                file as JSON lines.
+            background_loading: Serve a loading page right away and load,
+                warm up and lay out the model once the server is ready,
+                instead of before it starts.
+            history_path: If given, the inputs and outputs of every
+                evaluation are appended to a history log at this path. An
+                existing log is replayed into the plots at startup.
+            hub: If given, the model, the evaluation cache and streaming are
+                shared with the other sessions of this hub; the streaming
+                arguments are then taken from the hub.
+            server: The trame server or server name of this session.
+            min_refresh_interval: Shortest time between display refreshes
+                while streaming, in seconds.
+            max_refresh_interval: Longest time between display refreshes
+                while streaming, in seconds; reached when the client or link
+                is slow.
+            input_source: If given, streaming evaluates the readings of
+                this source instead of the slider values. The readings are
+                drained from a bounded queue, one model call per drain.
+                Ignored when a hub is given.
+            source_queue_size: Capacity of the reading queue.
+            source_queue_policy: What happens to readings arriving while the
+                queue is full; see ``ReadingQueue``.
+            inference: How the model is prepared for serving and warmed up;
+                by default it runs under ``torch.inference_mode``. Ignored
+                when a hub is given.
+            comparison_paths: Configuration files of further models that take
+                the same inputs. Each is evaluated concurrently on the same
+                inputs as the model and overlaid in the plots, labelled by
+                its directory. Ignored when a hub is given.
+            input_noise: If given, the noise of every input, or of the inputs
+                named; see ``NoiseModel``. The noise is propagated through the
+                model by Monte Carlo sampling at every evaluated operating
+                point, and the output mean and percentile bands are shaded
+                in the timeseries.
+        """
+        self.startup = StartupProfile()
         super().__init__(  # pyright: ignore[reportUnknownMemberType]
+            server=server,
             client_type="vue3",
         )
 
-        self.load_model(model_path)
-        self.state_manager = StateManager(self.server, self.model)
-        self.ui = UI(self.state_manager)
+        self.model_path = model_path
+        self.inference = inference
+        self.comparison_paths = list(comparison_paths or []) if hub is None else []
+        self.comparison_models: dict[str, TorchModel] = {}
+        self.comparison: ModelComparison | None = None
+        self.input_noise = input_noise
+        self.uncertainty: UncertaintyPropagator | None = None
+        self.metrics = Metrics(enabled=metrics_enabled, log_path=metrics_log_path)
+        self.hub = hub
+        self.evaluation_cache = hub.evaluation_cache if hub else EvaluationCache()
         self.streaming_enabled = False
+        self.stream_batch_size = stream_batch_size
+        self.stream_sample_rate = stream_sample_rate
+        self.batch_streamer: BatchStreamer | None = None
+        self.ui: UI | None = None
+        self.history_path = history_path
+        self.history_log: HistoryLog | None = None
+        self.ready = asyncio.Event()
+        self.refresh = RefreshController(
+            self.DEFAULT_DISPLAY_INTERVAL, min_refresh_interval, max_refresh_interval
+        )
+        self.input_source = input_source if hub is None else None
+        self.source_queue = ReadingQueue(source_queue_size, source_queue_policy)
+
+        self.background_loading = background_loading and hub is None
+        if hub is not None:
+            self.model = hub.model
+            self._initialize_model_ui()
+            hub.subscribe(self)
+        elif background_loading:
+            self._initialize_loading_layout()
+        else:
+            self._load_and_warm_up()
+            self._initialize_model_ui()
 
     def load_model(self, model_path: str) -> None:
+        from lume_model.models import TorchModel
+
         self.model = TorchModel(model_path)
+        # Outputs cached for a previously loaded model are no longer valid
+        self.evaluation_cache.invalidate(self.model)
+
+    def _initialize_loading_layout(self) -> None:
+        """Serve a lightweight placeholder until the model UI is built."""
+        self.server.state["loading_status"] = "Loading model..."
+        with SinglePageLayout(self.server) as layout:
+            layout.title.set_text(  # pyright: ignore[reportUnknownMemberType]
+                "LUME Model Visualizer"
+            )
+            with layout.content:
+                with VContainer(
+                    fluid=True,
+                    classes="fill-height d-flex flex-column justify-center align-center",
+                ):
+                    VProgressCircular(indeterminate=True, size=64)
+                    Div("{{ loading_status }}", classes="mt-4")
+
+    def _load_and_warm_up(self) -> None:
+        """Import the model stack, load and optimize the model, and warm it up.
+
+        Touches no trame state, so it may run on a worker thread.
+        """
+        with self.startup.stage("import"):
+            import ui  # noqa: F401  (pulls in torch, lume-model and plotly)
+            from inference import InferenceOptions, optimize_model, warm_up
+        options = self.inference if self.inference is not None else InferenceOptions()
+        with self.startup.stage("load_model"):
+            self.load_model(self.model_path)
+        with self.startup.stage("optimize"):
+            optimize_model(self.model, self.model_path, options)
+        with self.startup.stage("warm_up"):
+            # The first evaluation of each batch size pays for lazy
+            # initialization inside torch, and for compilation if enabled
+            batch_sizes = set(options.warm_up_batch_sizes)
+            if self.stream_batch_size:
+                batch_sizes.add(self.stream_batch_size)
+            warm_up(self.model, tuple(sorted(batch_sizes)))
+        if self.comparison_paths:
+            self._load_comparison_models(options, tuple(sorted(batch_sizes)))
+
+    def _load_comparison_models(
+        self, options: "InferenceOptions", batch_sizes: tuple[int, ...]
+    ) -> None:
+        from lume_model.models import TorchModel
+
+        from comparison import model_labels
+        from inference import optimize_model, warm_up
+
+        labels = model_labels([self.model_path, *self.comparison_paths])
+        with self.startup.stage("load_comparison"):
+            for label, path in zip(labels[1:], self.comparison_paths):
+                model = TorchModel(path)
+                optimize_model(model, path, options)
+                warm_up(model, batch_sizes)
+                self.comparison_models[label] = model
+
+    def _initialize_model_ui(self) -> None:
+        """Build the model UI; runs its first evaluation."""
+        from comparison import ModelComparison, model_labels
+        from state import StateManager
+        from streaming import BatchStreamer
+        from ui import UI
+        from uncertainty import UncertaintyPropagator
+
+        with self.startup.stage("build_ui"):
+            if self.hub is None:
+                self.evaluation_cache.steps = UI.SLIDER_STEPS
+                self.evaluation_cache.invalidate(self.model)
+            self.state_manager = StateManager(self.server, self.model)
+            if self.history_path is not None:
+                self._open_history_log(self.history_path)
+            if self.comparison_models:
+                self.comparison = ModelComparison(
+                    self.model,
+                    self.comparison_models,
+                    self.state_manager.history_capacity,
+                    reference_label=model_labels(
+                        [self.model_path, *self.comparison_paths]
+                    )[0],
+                )
+                # Replayed samples have no compared outputs
+                self.comparison.pad(len(self.state_manager.history))
+            if self.input_noise is not None:
+                self.uncertainty = UncertaintyPropagator(
+                    self.model, self.input_noise, self.state_manager.history_capacity
+                )
+                # Replayed samples have no confidence bands
+                self.uncertainty.pad(self.state_manager.history.total)
+            self.ui = UI(
+                self.state_manager,
+                self.evaluation_cache,
+                self.metrics,
+                history_log=self.history_log,
+                refresh=self.refresh,
+                comparison=self.comparison,
+                uncertainty=self.uncertainty,
+                executor=self.hub.executor if self.hub is not None else None,
+            )
+            if self.stream_batch_size and self.hub is None:
+                self.batch_streamer = BatchStreamer(
+                    self.model,
+                    self.state_manager.history,
+                    self.stream_batch_size,
+                    history_log=self.history_log,
+                )
+
+        for name, seconds in self.startup.stages:
+            self.metrics.record(f"startup_{name}", seconds)
+        print(self.startup.report())
+        self.ready.set()
+
+    def _open_history_log(self, path: str) -> None:
+        """Replay the newest samples of an existing log and append to it."""
+        history = self.state_manager.history
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            reader = HistoryReader(path)
+            names = [name for name in history.names if name in reader.outputs]
+            history.extend(reader.window(names, start=-history.capacity))
+            print(f"Replayed {len(history)} of {len(reader)} samples from {path}")
+
+        self.history_log = HistoryLog(
+            path,
+            self.state_manager.input_variable_names,
+            self.state_manager.output_variable_names,
+        )
+
+    @controller.add_task("on_server_ready")  # type: ignore
+    async def load_model_task(self, *args: Any, **kwargs: Any) -> None:
+        """Load the model in the background when ``background_loading`` is set."""
+        if not self.background_loading or self.ready.is_set():
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._load_and_warm_up)
+        except Exception as e:
+            self.server.state["loading_status"] = f"Could not load model: {e}"
+            self.server.state.flush()
+            raise
+
+        self._initialize_model_ui()
+        self.server.state.flush()
 
     @controller.add_task("on_server_ready")  # type: ignore
     async def data_stream_task(self, *args: Any, **kwargs: Any) -> None:
-        """Async task that simulates streaming data and updates plots."""
+        """Async task that simulates streaming data and updates plots.
+
+        Ticks are scheduled against absolute deadlines, so the time spent
+        evaluating does not stretch the update period. Ticks missed because
+        an evaluation overran a whole period are skipped, not queued.
+
+        When streaming in batches or from an input source, evaluation
+        happens in ``batch_stream_task`` or ``source_stream_task`` and this
+        task only refreshes the display, at
+        the interval chosen by ``refresh``. Plots are not pushed while the
+        client has yet to draw the previous frame; the next push then
+        carries the latest state. Sessions attached to a hub are streamed
+        by the hub instead.
+        """
+        await self.ready.wait()
+        if self.hub is not None:
+            return
         print("Starting data stream task...")
+        batched = self.batch_streamer is not None or self.input_source is not None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            interval = (
+                self.refresh.interval if batched else self.DEFAULT_UPDATE_INTERVAL
+            )
+            deadline += interval
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+            if self.streaming_enabled and self.ui is not None:
+                # Evaluation runs on a worker thread; the results are applied
+                # and flushed to the client back on the event loop.
+                with self.metrics.stage("tick"):
+                    if batched:
+                        if self.ui.claim_frame():
+                            await self.ui.request_update_plot()
+                    else:
+                        print("Updating model outputs with new streaming data...")
+                        await self.ui.request_evaluation(
+                            update_plot=self.ui.claim_frame()
+                        )
+
+            lag = loop.time() - deadline
+            if lag > interval:
+                deadline += (lag // interval) * interval
+
+    @controller.add_task("on_server_ready")  # type: ignore
+    async def batch_stream_task(self, *args: Any, **kwargs: Any) -> None:
+        """Async task that evaluates batches at the target sample rate."""
+        await self.ready.wait()
+        streamer = self.batch_streamer
+        if streamer is None:
+            return
+
+        print("Starting batch stream task...")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            if not self.streaming_enabled:
+                await asyncio.sleep(self.DEFAULT_DISPLAY_INTERVAL)
+                deadline = loop.time()
+                continue
+
+            assert self.ui is not None
+            count = await self.ui.request_batch(streamer)
+
+            if self.stream_sample_rate is None:
+                # Full throughput, but let the event loop serve clients
+                await asyncio.sleep(0)
+                continue
+
+            period = count / self.stream_sample_rate
+            deadline += period
+            delay = deadline - loop.time()
+            if delay < -period:
+                # Evaluation cannot keep up; do not try to catch up later
+                deadline = loop.time()
+            await asyncio.sleep(max(0.0, delay))
+
+    @controller.add_task("on_server_ready")  # type: ignore
+    async def source_stream_task(self, *args: Any, **kwargs: Any) -> None:
+        """Async task that evaluates the readings of ``input_source``.
+
+        The source runs as a separate producer task and keeps filling the
+        queue, subject to its policy, while streaming is stopped. Drains
+        are at least ``SOURCE_DRAIN_INTERVAL`` apart; each takes up to
+        ``SOURCE_MAX_BATCH`` readings and evaluates them with one model call
+        on the worker thread, so the event loop stays free however fast
+        readings arrive.
+        """
+        await self.ready.wait()
+        source = self.input_source
+        if source is None:
+            return
+
+        assert self.ui is not None
+        print("Starting input source task...")
+        producer = asyncio.create_task(source.run(self.source_queue))
+        names = self.state_manager.input_variable_names
+        current = self.state_manager.read_inputs()
+        previous = np.array(
+            [
+                current.get(
+                    spec.name,
+                    np.nan if spec.default_value is None else spec.default_value,
+                )
+                for spec in self.state_manager.schema.inputs
+            ],
+            dtype=np.float64,
+        )
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if not self.streaming_enabled:
+                    await asyncio.sleep(self.DEFAULT_DISPLAY_INTERVAL)
+                    continue
+                if producer.done() and len(self.source_queue) == 0:
+                    print("Input source is exhausted.")
+                    return
+
+                readings = await self.source_queue.drain(self.SOURCE_MAX_BATCH)
+                start = loop.time()
+                samples = readings_to_samples(readings, names, previous)
+                previous = samples[-1]
+                await self.ui.request_inputs(samples)
+                self.ui.show_inputs(previous)
+                await asyncio.sleep(
+                    max(0.0, start + self.SOURCE_DRAIN_INTERVAL - loop.time())
+                )
+        finally:
+            producer.cancel()
+
+    @controller.add_task("on_server_ready")  # type: ignore
+    async def sensitivity_task(self, *args: Any, **kwargs: Any) -> None:
+        """Async task that keeps the sensitivity panel at the operating point.
+
+        The Jacobian is recomputed at most every ``UI.SENSITIVITY_INTERVAL``,
+        and only when the inputs have moved, whether by the user or by
+        streaming from an input source.
+        """
+        await self.ready.wait()
+        assert self.ui is not None
         while True:
-            await asyncio.sleep(self.DEFAULT_UPDATE_INTERVAL)
+            await self.ui.request_sensitivity()
+            await asyncio.sleep(self.ui.SENSITIVITY_INTERVAL)
+
+    @controller.add("on_server_bind")  # type: ignore
+    def bind_metrics_route(self, wslink_server: Any) -> None:
+        """Serve the metrics in Prometheus text format when enabled."""
+        if not self.metrics.enabled:
+            return
 
-            if self.streaming_enabled:
-                print("Updating model outputs with new streaming data...")
-                # Evaluate model and update plots
-                self.ui.ctrl.evaluate_and_update_plot()
-                # Required to ensure UI updates are sent to the client
-                self.state.flush()
+        async def handle_metrics(request: web.Request) -> web.Response:
+            return web.Response(text=self.metrics.prometheus())
+
+        wslink_server.app.router.add_get(self.METRICS_ROUTE, handle_metrics)
 
     @controller.add("start_streaming")  # type: ignore
     def start_streaming(self, *args: Any, **kwargs: Any) -> None:
@@ -67,7 +476,26 @@ class LUMEModelVisualApp(TrameApp):  # type: ignore[misc]
 
     @change("hist_x_axis", "hist_y_axis")  # type: ignore
     def handle_hist_axis_change(self, *args: Any, **kwargs: Any) -> None:
-        self.ui.update_plot()
+        if self.ui is not None:
+            self.ui.request_update_plot()
+
+    @life_cycle.client_connected  # type: ignore
+    def on_client_connected(self, *args: Any, **kwargs: Any) -> None:
+        # Timeseries deltas are applied client-side, so a new client needs
+        # the full figure to start from.
+        if self.ui is not None:
+            self.refresh.reset()
+            self.ui.request_update_plot(full_refresh=True)
+
+    @life_cycle.server_exited  # type: ignore
+    def on_server_exited(self, *args: Any, **kwargs: Any) -> None:
+        if self.hub is not None:
+            self.hub.unsubscribe(self)
+        if self.history_log is not None:
+            self.history_log.close()
+        if self.comparison is not None:
+            self.comparison.shutdown()
+        self.metrics.close()
 
     @life_cycle.error  # type: ignore
     def on_error(self, error: Exception) -> None:
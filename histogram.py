@@ -0,0 +1,171 @@
+import numpy as np
+import numpy.typing as npt
+
+from history import OutputHistory
+
+
+class Histogram2D:
+    """Incrementally maintained 2D bin counts for a pair of history variables.
+
+    The histogram mirrors an ``OutputHistory``: it keeps the flat bin code of
+    every stored sample in a ring of the same capacity, so new samples are
+    binned on arrival and samples evicted from the history are subtracted
+    again. Changing the axis pair (or falling more than a full history behind)
+    triggers a single vectorized rebuild over the stored history.
+
+    When a new value falls outside the current range, the range is doubled
+    towards it and neighbouring bins are merged pairwise, so the counts never
+    have to be recomputed from raw samples.
+    """
+
+    def __init__(self, capacity: int, bins: int = 100) -> None:
+        if bins <= 0 or bins % 2:
+            raise ValueError(
+                f"Histogram bins must be a positive even number, got {bins}."
+            )
+
+        self.capacity = capacity
+        self.bins = bins
+        self.x_name: str | None = None
+        self.y_name: str | None = None
+
+        self._counts = np.zeros((bins, bins), dtype=np.int64)
+        self._codes = np.full(capacity, -1, dtype=np.int64)
+        self._head = 0
+        self._size = 0
+        self._seen = 0
+        # Per-axis [x, y] range, NaN until the first finite sample arrives
+        self._lo = np.full(2, np.nan)
+        self._hi = np.full(2, np.nan)
+
+    @property
+    def ready(self) -> bool:
+        """Whether a bin range has been established."""
+        return bool(np.isfinite(self._lo).all())
+
+    @property
+    def counts(self) -> npt.NDArray[np.int64]:
+        """Bin counts indexed as ``[y_bin, x_bin]``, ready for a heatmap z-matrix."""
+        return self._counts.T
+
+    def centers(self, axis: int) -> npt.NDArray[np.float64]:
+        """Return the bin centers along ``axis`` (0 for x, 1 for y)."""
+        width = (self._hi[axis] - self._lo[axis]) / self.bins
+        centers: npt.NDArray[np.float64] = (
+            self._lo[axis] + (np.arange(self.bins) + 0.5) * width
+        )
+        return centers
+
+    def sync(self, history: OutputHistory, x_name: str, y_name: str) -> None:
+        """Bring the counts up to date with ``history`` for the given axis pair.
+
+        Args:
+            history: The output history the histogram mirrors.
+            x_name: Variable shown on the x axis.
+            y_name: Variable shown on the y axis.
+        """
+        pending = history.total - self._seen
+        axes_changed = (x_name, y_name) != (self.x_name, self.y_name)
+
+        if axes_changed or pending < 0 or pending >= self.capacity:
+            self.x_name, self.y_name = x_name, y_name
+            self._reset()
+            pending = len(history)
+
+        if pending > 0:
+            self._add(
+                history.column(x_name)[-pending:],
+                history.column(y_name)[-pending:],
+            )
+        self._seen = history.total
+
+    def _reset(self) -> None:
+        self._counts.fill(0)
+        self._codes.fill(-1)
+        self._head = 0
+        self._size = 0
+        self._lo.fill(np.nan)
+        self._hi.fill(np.nan)
+
+    def _add(self, x: npt.NDArray[np.floating], y: npt.NDArray[np.floating]) -> None:
+        finite = np.isfinite(x) & np.isfinite(y)
+        codes = np.full(len(x), -1, dtype=np.int64)
+
+        if finite.any():
+            x, y = x[finite], y[finite]
+            low = np.array([x.min(), y.min()])
+            high = np.array([x.max(), y.max()])
+            if self.ready:
+                for axis in (0, 1):
+                    while low[axis] < self._lo[axis]:
+                        self._double(axis, towards_low=True)
+                    while high[axis] > self._hi[axis]:
+                        self._double(axis, towards_low=False)
+            else:
+                self._init_range(low, high)
+
+            codes[finite] = self._encode(x, y)
+
+        self._push(codes)
+
+    def _init_range(
+        self, low: npt.NDArray[np.float64], high: npt.NDArray[np.float64]
+    ) -> None:
+        for axis in (0, 1):
+            if high[axis] <= low[axis]:
+                pad = 0.05 * abs(low[axis]) or 0.5
+                low[axis] -= pad
+                high[axis] += pad
+        self._lo[:] = low
+        self._hi[:] = high
+
+    def _encode(
+        self, x: npt.NDArray[np.floating], y: npt.NDArray[np.floating]
+    ) -> npt.NDArray[np.int64]:
+        scale = self.bins / (self._hi - self._lo)
+        # Clip so values on the upper edge land in the last bin
+        ix = np.clip(((x - self._lo[0]) * scale[0]).astype(np.int64), 0, self.bins - 1)
+        iy = np.clip(((y - self._lo[1]) * scale[1]).astype(np.int64), 0, self.bins - 1)
+        codes: npt.NDArray[np.int64] = ix * self.bins + iy
+        return codes
+
+    def _push(self, codes: npt.NDArray[np.int64]) -> None:
+        flat = self._counts.reshape(-1)
+
+        overflow = self._size + len(codes) - self.capacity
+        if overflow > 0:
+            start = self._head - self._size
+            evicted = self._codes[np.arange(start, start + overflow) % self.capacity]
+            np.subtract.at(flat, evicted[evicted >= 0], 1)
+            self._size -= overflow
+
+        np.add.at(flat, codes[codes >= 0], 1)
+        slots = np.arange(self._head, self._head + len(codes)) % self.capacity
+        self._codes[slots] = codes
+        self._head = (self._head + len(codes)) % self.capacity
+        self._size += len(codes)
+
+    def _double(self, axis: int, towards_low: bool) -> None:
+        half = self.bins // 2
+        offset = half if towards_low else 0
+
+        # Merge pairs of bins along `axis` into one half of the new grid
+        counts = np.moveaxis(self._counts, axis, 0)
+        merged = counts.reshape(half, 2, self.bins).sum(axis=1)
+        grown = np.zeros_like(counts)
+        grown[offset : offset + half] = merged
+        self._counts = np.ascontiguousarray(np.moveaxis(grown, 0, axis))
+
+        valid = self._codes >= 0
+        ix, iy = np.divmod(self._codes[valid], self.bins)
+        if axis == 0:
+            ix = ix // 2 + offset
+        else:
+            iy = iy // 2 + offset
+        self._codes[valid] = ix * self.bins + iy
+
+        width = self._hi[axis] - self._lo[axis]
+        if towards_low:
+            self._lo[axis] = self._hi[axis] - 2 * width
+        else:
+            self._hi[axis] = self._lo[axis] + 2 * width
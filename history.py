@@ -0,0 +1,144 @@
+from collections.abc import Mapping
+
+import numpy as np
+import numpy.typing as npt
+
+
+class OutputHistory:
+    """Bounded, columnar history of model outputs.
+
+    Each variable is stored in a preallocated NumPy row of twice the
+    capacity. Every sample is written to both halves of the row, so the most
+    recent ``len(self)`` samples always form one contiguous slice and can be
+    returned as a zero-copy view. Appending is O(1) regardless of how much
+    history has been recorded; once the capacity is reached the oldest
+    samples are overwritten.
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        capacity: int,
+        dtype: npt.DTypeLike = np.float64,
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError(f"History capacity must be positive, got {capacity}.")
+
+        self.names = list(names)
+        self.capacity = capacity
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._buffer = np.full((len(self.names), 2 * capacity), np.nan, dtype=dtype)
+        self._head = 0
+        self._size = 0
+        self._total = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def total(self) -> int:
+        """Number of samples appended since the last clear, including evicted ones."""
+        return self._total
+
+    def append(self, values: Mapping[str, float]) -> None:
+        """Append one sample. Variables missing from ``values`` are stored as NaN.
+
+        Args:
+            values: Mapping of variable name to value.
+        """
+        column = self._head
+        mirror = column + self.capacity
+        for name, i in self._index.items():
+            value = float(values[name]) if name in values else np.nan
+            self._buffer[i, column] = value
+            self._buffer[i, mirror] = value
+
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self._total += 1
+
+    def extend(self, values: Mapping[str, npt.ArrayLike]) -> None:
+        """Append a batch of samples in one vectorized write.
+
+        Variables missing from ``values`` are stored as NaN. If the batch is
+        larger than the capacity, only its newest samples are kept.
+
+        Args:
+            values: Mapping of variable name to a 1D array of samples; all
+                arrays must have the same length.
+        """
+        columns = {
+            name: np.asarray(value).reshape(-1) for name, value in values.items()
+        }
+        count = len(next(iter(columns.values()), ()))
+        if count == 0:
+            return
+
+        kept = min(count, self.capacity)
+        block = np.full((len(self.names), kept), np.nan, dtype=self._buffer.dtype)
+        for name, i in self._index.items():
+            if name in columns:
+                block[i] = columns[name][-kept:]
+
+        slots = (self._head + count - kept + np.arange(kept)) % self.capacity
+        self._buffer[:, slots] = block
+        self._buffer[:, slots + self.capacity] = block
+
+        self._head = (self._head + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+        self._total += count
+
+    def skip(self, count: int) -> None:
+        """Append ``count`` samples of NaN without allocating them.
+
+        Only the last ``capacity`` of them are written, so gaps of any length
+        cost at most one pass over the buffer.
+        """
+        if count <= 0:
+            return
+
+        kept = min(count, self.capacity)
+        slots = (self._head + count - kept + np.arange(kept)) % self.capacity
+        self._buffer[:, slots] = np.nan
+        self._buffer[:, slots + self.capacity] = np.nan
+
+        self._head = (self._head + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+        self._total += count
+
+    def latest(self) -> dict[str, float]:
+        """Return the newest sample, or an empty dict if the history is empty."""
+        if self._size == 0:
+            return {}
+        column = (self._head - 1) % self.capacity
+        return {name: float(self._buffer[i, column]) for name, i in self._index.items()}
+
+    def column(self, name: str) -> npt.NDArray[np.floating]:
+        """Return a read-only view of the stored samples of ``name``, oldest first.
+
+        The view is only valid until the next append.
+
+        Args:
+            name: Variable name.
+        Returns:
+            A zero-copy view into the history buffer.
+        Raises:
+            KeyError: If ``name`` is not a tracked variable.
+        """
+        if name not in self._index:
+            raise KeyError(f"Unknown history variable: '{name}'.")
+
+        start = self._head - self._size + self.capacity
+        view = self._buffer[self._index[name], start : start + self._size]
+        view.flags.writeable = False
+        return view
+
+    def columns(self, names: list[str]) -> dict[str, npt.NDArray[np.floating]]:
+        """Return zero-copy views for several variables, keyed by name."""
+        return {name: self.column(name) for name in names}
+
+    def clear(self) -> None:
+        self._buffer.fill(np.nan)
+        self._head = 0
+        self._size = 0
+        self._total = 0
@@ -0,0 +1,236 @@
+from collections.abc import Mapping
+import json
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+import numpy.typing as npt
+
+MAGIC = b"LUMEHIST"
+VERSION = 1
+DTYPE = np.dtype("<f8")
+_HEADER_ALIGN = 64
+
+
+def _read_header(path: str) -> tuple[dict[str, object], int]:
+    """Return the header of a history log and the byte offset of its rows."""
+    with open(path, "rb") as stream:
+        magic = stream.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a history log.")
+        (length,) = struct.unpack("<Q", stream.read(8))
+        header = json.loads(stream.read(length).rstrip(b" "))
+    if header.get("version") != VERSION:
+        raise ValueError(
+            f"Unsupported history log version {header.get('version')} in '{path}'."
+        )
+    return header, len(MAGIC) + 8 + length
+
+
+def _encode_header(inputs: list[str], outputs: list[str]) -> bytes:
+    body = json.dumps(
+        {"version": VERSION, "dtype": DTYPE.str, "inputs": inputs, "outputs": outputs}
+    ).encode()
+    # Pad so the rows start aligned
+    length = -(-(len(MAGIC) + 8 + len(body)) // _HEADER_ALIGN) * _HEADER_ALIGN
+    length -= len(MAGIC) + 8
+    return MAGIC + struct.pack("<Q", length) + body.ljust(length, b" ")
+
+
+class HistoryLog:
+    """Append-only on-disk log of the inputs and outputs of every evaluation.
+
+    The file is a small JSON header followed by fixed-size float64 rows of
+    ``time, *inputs, *outputs``, so it can be memory-mapped as one 2D array
+    by ``HistoryReader``. Rows are buffered in memory and written by a
+    background thread in batches, so appending never waits on the disk.
+    """
+
+    DEFAULT_FLUSH_ROWS = 4096
+    DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+
+    def __init__(
+        self,
+        path: str,
+        inputs: list[str],
+        outputs: list[str],
+        flush_rows: int = DEFAULT_FLUSH_ROWS,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        """Open ``path`` for appending, creating it if needed.
+
+        Args:
+            path: Location of the log file.
+            inputs: Input variable names, in column order.
+            outputs: Output variable names, in column order.
+            flush_rows: Number of buffered rows that triggers a write.
+            flush_interval: Longest time rows stay buffered, in seconds.
+        Raises:
+            ValueError: If ``path`` holds a log of different variables.
+        """
+        self.path = path
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.columns = ["time", *self.inputs, *self.outputs]
+        self._column_index = {name: i for i, name in enumerate(self.columns)}
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            header, offset = _read_header(path)
+            if header["inputs"] != self.inputs or header["outputs"] != self.outputs:
+                raise ValueError(
+                    f"History log '{path}' records different variables than the "
+                    f"current model."
+                )
+            # Drop a row left incomplete by a crash mid-write
+            row_size = len(self.columns) * DTYPE.itemsize
+            rows = (os.path.getsize(path) - offset) // row_size
+            os.truncate(path, offset + rows * row_size)
+            self._file = open(path, "ab")
+        else:
+            self._file = open(path, "wb")
+            self._file.write(_encode_header(self.inputs, self.outputs))
+            self._file.flush()
+
+        self._pending: list[npt.NDArray[np.float64]] = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        # Held while writing, so rows reach the file in the order logged
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop, name="history-log", daemon=True
+        )
+        self._writer.start()
+
+    def append(self, values: Mapping[str, float]) -> None:
+        """Log one evaluation. Variables missing from ``values`` are stored as NaN."""
+        row = np.full((1, len(self.columns)), np.nan, dtype=DTYPE)
+        row[0, 0] = time.time()
+        for name, value in values.items():
+            i = self._column_index.get(name)
+            if i is not None:
+                row[0, i] = value
+        self._enqueue(row)
+
+    def extend(self, values: Mapping[str, npt.ArrayLike]) -> None:
+        """Log a batch of evaluations given as equally long 1D arrays per variable."""
+        columns = {
+            name: np.asarray(value).reshape(-1)
+            for name, value in values.items()
+            if name in self._column_index
+        }
+        count = len(next(iter(columns.values()), ()))
+        if count == 0:
+            return
+
+        block = np.full((count, len(self.columns)), np.nan, dtype=DTYPE)
+        block[:, 0] = time.time()
+        for name, column in columns.items():
+            block[:, self._column_index[name]] = column
+        self._enqueue(block)
+
+    def _enqueue(self, block: npt.NDArray[np.float64]) -> None:
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"History log '{self.path}' is closed.")
+            self._pending.append(block)
+            self._pending_rows += len(block)
+            full = self._pending_rows >= self.flush_rows
+        if full:
+            self._wake.set()
+
+    def _write_loop(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self) -> None:
+        """Write every buffered row to the file."""
+        with self._write_lock:
+            with self._lock:
+                blocks, self._pending = self._pending, []
+                self._pending_rows = 0
+            if blocks:
+                self._file.write(np.concatenate(blocks).tobytes())
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self._file.close()
+
+
+class HistoryReader:
+    """Memory-mapped, read-only view of a ``HistoryLog`` file.
+
+    Only the windows that are asked for are read from disk, so sessions far
+    larger than memory can be replayed or browsed. The mapping is refreshed
+    whenever the file has grown, so a log that is still being written can be
+    followed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        header, self._offset = _read_header(path)
+        self.inputs: list[str] = list(header["inputs"])  # type: ignore[call-overload]
+        self.outputs: list[str] = list(header["outputs"])  # type: ignore[call-overload]
+        self.columns = ["time", *self.inputs, *self.outputs]
+        self._column_index = {name: i for i, name in enumerate(self.columns)}
+        self._row_size = len(self.columns) * DTYPE.itemsize
+        self._rows: np.memmap[tuple[int, int], np.dtype[np.float64]] | None = None
+        self._mapped_size = -1
+
+    def __len__(self) -> int:
+        return len(self._map())
+
+    def _map(self) -> npt.NDArray[np.float64]:
+        size = os.path.getsize(self.path)
+        if size != self._mapped_size:
+            count = (size - self._offset) // self._row_size
+            self._rows = (
+                np.memmap(
+                    self.path,
+                    dtype=DTYPE,
+                    mode="r",
+                    offset=self._offset,
+                    shape=(count, len(self.columns)),
+                )
+                if count > 0
+                else None
+            )
+            self._mapped_size = size
+        if self._rows is None:
+            return np.empty((0, len(self.columns)), dtype=DTYPE)
+        return self._rows
+
+    def window(
+        self, names: list[str], start: int = 0, stop: int | None = None
+    ) -> dict[str, npt.NDArray[np.float64]]:
+        """Return rows ``[start, stop)`` of the given columns, copied into memory.
+
+        Args:
+            names: Column names; ``"time"`` or any input or output variable.
+            start: First row; negative values count from the end.
+            stop: Row after the last one; ``None`` means the end of the log.
+        Raises:
+            KeyError: If a name is not a column of the log.
+        """
+        for name in names:
+            if name not in self._column_index:
+                raise KeyError(f"Unknown history log column: '{name}'.")
+
+        rows = self._map()[start:stop]
+        return {name: np.array(rows[:, self._column_index[name]]) for name in names}
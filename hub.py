@@ -0,0 +1,258 @@
+"""One shared model served to several viewers, each on its own port.
+
+Running this module loads the model once and serves one session per port::
+
+    python hub.py model.yml 8080 8081 8082 --batch-size 256 --sample-rate 5000
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+import argparse
+import asyncio
+
+from cache import EvaluationCache
+
+if TYPE_CHECKING:
+    from gui import LUMEModelVisualApp
+    from inference import InferenceOptions
+    from streaming import BatchStreamer
+    from ui import UI
+
+
+class ModelHub:
+    """One loaded model and one streaming pipeline shared by several sessions.
+
+    Every session is a ``LUMEModelVisualApp`` with its own server, and so its
+    own view state (axes, visible traces, history). The hub owns the model,
+    the evaluation cache and the streaming loop. On each streaming tick it
+    evaluates every distinct input setting among the streaming sessions
+    once, and hands the result to all sessions at that setting. The cost of
+    inference therefore grows with the number of distinct settings, not the
+    number of viewers. Each session still refreshes its display at its own
+    adaptive rate, so a slow viewer does not hold back the others.
+
+    Every viewer needs a session, and so a port, of its own: clients of one
+    session share its view state, so two viewers on the same port see and
+    change the same axes, traces and inputs.
+
+    All model calls, the hub's and those of the sessions' evaluation
+    schedulers, run on the hub's single ``executor`` thread, so the shared
+    model is never called concurrently.
+    """
+
+    DEFAULT_UPDATE_INTERVAL = 1.0  # seconds
+    DEFAULT_DISPLAY_INTERVAL = 0.2  # seconds, when streaming in batches
+
+    def __init__(
+        self,
+        model_path: str,
+        stream_batch_size: int | None = None,
+        stream_sample_rate: float | None = None,
+        inference: "InferenceOptions | None" = None,
+    ) -> None:
+        """Load, optimize and warm up the shared model.
+
+        Args:
+            model_path: Path to the model configuration file.
+            stream_batch_size: If given, streaming evaluates batches of this
+                many inputs jittered around each session's slider values.
+            stream_sample_rate: Target samples per second of every session
+                for batched streaming. ``None`` evaluates at full throughput.
+            inference: How the model is prepared for serving; see
+                ``LUMEModelVisualApp``.
+        """
+        from lume_model.models import TorchModel
+
+        from inference import InferenceOptions, optimize_model, warm_up
+        from streaming import BatchStreamer
+        from ui import UI
+
+        self.model = TorchModel(model_path)
+        options = inference if inference is not None else InferenceOptions()
+        optimize_model(self.model, model_path, options)
+        self.evaluation_cache = EvaluationCache(steps=UI.SLIDER_STEPS)
+        self.evaluation_cache.invalidate(self.model)
+        self.sessions: list[LUMEModelVisualApp] = []
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hub")
+
+        self.stream_sample_rate = stream_sample_rate
+        self.batch_streamer: BatchStreamer | None = (
+            BatchStreamer(self.model, None, stream_batch_size)
+            if stream_batch_size
+            else None
+        )
+        warm_up(
+            self.model,
+            tuple(sorted({*options.warm_up_batch_sizes, stream_batch_size or 1})),
+        )
+
+    def subscribe(self, session: "LUMEModelVisualApp") -> None:
+        if session not in self.sessions:
+            self.sessions.append(session)
+
+    def unsubscribe(self, session: "LUMEModelVisualApp") -> None:
+        if session in self.sessions:
+            self.sessions.remove(session)
+
+    def _group_streaming_sessions(self) -> list[tuple[dict[str, float], list["UI"]]]:
+        """Group the UIs of streaming sessions by their quantized input setting."""
+        groups: dict[tuple[float | None, ...], tuple[dict[str, float], list[UI]]] = {}
+        for session in self.sessions:
+            if not session.streaming_enabled or session.ui is None:
+                continue
+            inputs = session.state_manager.read_inputs()
+            key = self.evaluation_cache.key(inputs)
+            groups.setdefault(key, (inputs, []))[1].append(session.ui)
+        return list(groups.values())
+
+    def _evaluate(self, inputs: dict[str, float]) -> None:
+        key = self.evaluation_cache.key(inputs)
+        if self.evaluation_cache.get(key) is None:
+            output = self.model.evaluate(inputs)
+            self.evaluation_cache.put(
+                key, {name: float(value) for name, value in output.items()}
+            )
+
+    async def stream_task(self) -> None:
+        """Shared streaming loop, run once for all sessions.
+
+        Without a batch streamer, every distinct setting is evaluated once
+        per ``DEFAULT_UPDATE_INTERVAL``. With one, each setting gets a batch
+        of ``stream_batch_size`` samples per round, and rounds are paced so
+        that every session receives ``stream_sample_rate`` samples per
+        second, as ``LUMEModelVisualApp.batch_stream_task`` does for a
+        single session. Sessions attached to a hub do not start their own
+        streaming tasks.
+        """
+        print("Starting shared data stream task...")
+        if self.batch_streamer is None:
+            await self._stream_outputs()
+        else:
+            await self._stream_batches(self.batch_streamer)
+
+    async def _stream_outputs(self) -> None:
+        interval = self.DEFAULT_UPDATE_INTERVAL
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            deadline += interval
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+            for inputs, uis in self._group_streaming_sessions():
+                # Sessions then read the outputs from the shared cache
+                await loop.run_in_executor(self.executor, self._evaluate, inputs)
+                await asyncio.gather(
+                    *(ui.request_evaluation(update_plot=ui.claim_frame()) for ui in uis)
+                )
+
+            lag = loop.time() - deadline
+            if lag > interval:
+                deadline += (lag // interval) * interval
+
+    async def _stream_batches(self, streamer: "BatchStreamer") -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            groups = self._group_streaming_sessions()
+            if not groups:
+                await asyncio.sleep(self.DEFAULT_DISPLAY_INTERVAL)
+                deadline = loop.time()
+                continue
+
+            for inputs, uis in groups:
+                samples = await loop.run_in_executor(
+                    self.executor, streamer.sample, inputs
+                )
+                outputs = await loop.run_in_executor(
+                    self.executor, streamer.evaluate, samples
+                )
+                columns = {**streamer.input_columns(samples), **outputs}
+                await asyncio.gather(*(ui.request_samples(columns) for ui in uis))
+
+            if self.stream_sample_rate is None:
+                # Full throughput, but let the event loop serve clients
+                await asyncio.sleep(0)
+                continue
+
+            period = streamer.batch_size / self.stream_sample_rate
+            deadline += period
+            delay = deadline - loop.time()
+            if delay < -period:
+                # Evaluation cannot keep up; do not try to catch up later
+                deadline = loop.time()
+            await asyncio.sleep(max(0.0, delay))
+
+
+def serve_sessions(
+    model_path: str,
+    ports: list[int],
+    stream_batch_size: int | None = None,
+    stream_sample_rate: float | None = None,
+    inference: "InferenceOptions | None" = None,
+    **app_kwargs: Any,
+) -> None:
+    """Serve one session per port from a single shared ``ModelHub``.
+
+    Args:
+        model_path: Path to the model configuration file.
+        ports: One port per session, i.e. per viewer.
+        stream_batch_size: See ``ModelHub``.
+        stream_sample_rate: See ``ModelHub``.
+        inference: See ``ModelHub``.
+        **app_kwargs: Passed on to every ``LUMEModelVisualApp``.
+    """
+    from gui import LUMEModelVisualApp
+
+    hub = ModelHub(model_path, stream_batch_size, stream_sample_rate, inference)
+    apps = [
+        LUMEModelVisualApp(model_path, hub=hub, server=f"session_{port}", **app_kwargs)
+        for port in ports
+    ]
+
+    async def run() -> None:
+        await asyncio.gather(
+            hub.stream_task(),
+            *(
+                app.server.start(  # pyright: ignore[reportUnknownMemberType]
+                    port=port, exec_mode="coroutine", open_browser=False
+                )
+                for app, port in zip(apps, ports)
+            ),
+        )
+
+    asyncio.run(run())
+
+
+def main() -> None:
+    from inference import COMPILE_MODES, InferenceOptions
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("model", help="model configuration file")
+    parser.add_argument(
+        "ports", type=int, nargs="+", help="one port per viewer; viewers never share"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, help="stream batches of this many samples"
+    )
+    parser.add_argument(
+        "--sample-rate",
+        type=float,
+        help="samples per second of every session when streaming in batches",
+    )
+    parser.add_argument(
+        "--compile", choices=[mode for mode in COMPILE_MODES if mode is not None]
+    )
+    args = parser.parse_args()
+
+    print(f"Serving {args.model} on ports {', '.join(map(str, args.ports))}...")
+    serve_sessions(
+        args.model,
+        args.ports,
+        stream_batch_size=args.batch_size,
+        stream_sample_rate=args.sample_rate,
+        inference=InferenceOptions(compile=args.compile),
+    )
+
+
+if __name__ == "__main__":
+    main()
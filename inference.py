@@ -0,0 +1,228 @@
+from typing import NamedTuple
+import hashlib
+import os
+
+import numpy as np
+import torch
+import yaml
+
+from lume_model.models import TorchModel
+
+from streaming import evaluate_batch
+
+
+class InferenceOptions(NamedTuple):
+    """How a loaded model is prepared for serving.
+
+    Attributes:
+        inference_mode: Run the network under ``torch.inference_mode``.
+        compile: ``None`` to run the network as loaded, ``"script"`` to
+            freeze it with TorchScript and optimize it for inference, or
+            ``"compile"`` to compile it with ``torch.compile``.
+        intra_op_threads: Threads used within one operation; ``None`` keeps
+            torch's default.
+        inter_op_threads: Threads used across independent operations;
+            ``None`` keeps torch's default. Can only be set before torch
+            runs any parallel work.
+        warm_up_batch_sizes: Batch sizes evaluated at startup, so the first
+            real evaluation of each size does not pay for lazy
+            initialization, profiling or compilation.
+        cache_dir: If given, compiled networks are stored here, keyed by a
+            hash of the model files, and reused by later restarts.
+    """
+
+    inference_mode: bool = True
+    compile: str | None = None
+    intra_op_threads: int | None = None
+    inter_op_threads: int | None = None
+    warm_up_batch_sizes: tuple[int, ...] = (1,)
+    cache_dir: str | None = None
+
+
+COMPILE_MODES = (None, "script", "compile")
+WARM_UP_CALLS = 3  # TorchScript optimizes after profiling the first calls
+
+
+class InferenceModule(torch.nn.Module):
+    """Runs the optimized network, under ``torch.inference_mode`` if enabled.
+
+    ``TorchModel`` calls its network between the input and output
+    transformers, so wrapping the network keeps the rest of its evaluation
+    as it is. The network as loaded stays available for autograd, which
+    inference mode and frozen TorchScript modules do not support.
+    """
+
+    def __init__(
+        self,
+        module: torch.nn.Module,
+        eager: torch.nn.Module | None = None,
+        inference_mode: bool = True,
+    ) -> None:
+        super().__init__()
+        self.module = module
+        self.eager = eager
+        self.inference_mode = inference_mode
+
+    @property
+    def differentiable(self) -> torch.nn.Module:
+        """The network as loaded, for computing gradients."""
+        return self.eager if self.eager is not None else self.module
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if not self.inference_mode:
+            output: torch.Tensor = self.module(x)
+            return output
+        with torch.inference_mode():
+            output = self.module(x)
+        return output
+
+
+def differentiable_network(model: TorchModel) -> torch.nn.Module:
+    """Return the network of ``model`` in a form that supports autograd."""
+    network: torch.nn.Module = model.model
+    if isinstance(network, InferenceModule):
+        return network.differentiable
+    return network
+
+
+def configure_threads(intra_op: int | None, inter_op: int | None) -> None:
+    """Pin torch's thread counts; ``None`` leaves a count unchanged."""
+    if intra_op is not None:
+        torch.set_num_threads(intra_op)
+    if inter_op is not None and inter_op != torch.get_num_interop_threads():
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError as e:
+            print(f"Warning: Could not set the number of inter-op threads: {e}")
+
+
+def model_hash(model_path: str) -> str:
+    """Hash the model configuration and every file it refers to.
+
+    Files are referred to by paths relative to the configuration file.
+    """
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as stream:
+        config = stream.read()
+    digest.update(config)
+
+    directory = os.path.dirname(os.path.abspath(model_path))
+
+    def referenced_files(value: object) -> list[str]:
+        if isinstance(value, dict):
+            return [path for item in value.values() for path in referenced_files(item)]
+        if isinstance(value, list):
+            return [path for item in value for path in referenced_files(item)]
+        if isinstance(value, str):
+            path = os.path.join(directory, value)
+            if os.path.isfile(path):
+                return [path]
+        return []
+
+    for path in referenced_files(yaml.safe_load(config)):
+        with open(path, "rb") as stream:
+            digest.update(stream.read())
+    return digest.hexdigest()
+
+
+def _example_input(model: TorchModel, batch_size: int) -> torch.Tensor:
+    values = [
+        np.nan if var.default_value is None else float(var.default_value)
+        for var in model.input_variables
+    ]
+    return torch.tensor([values] * batch_size, dtype=model.dtype, device=model.device)
+
+
+def _script(model: TorchModel, cache_path: str | None) -> torch.nn.Module:
+    if cache_path is not None and os.path.exists(cache_path):
+        print(f"Loading compiled model from {cache_path}")
+        module: torch.nn.Module = torch.jit.load(  # type: ignore[no-untyped-call]
+            cache_path, map_location=model.device
+        )
+        return module
+
+    network = model.model.eval()
+    try:
+        scripted = torch.jit.script(network)
+    except (
+        torch.jit.frontend.FrontendError,
+        torch.jit.Error,
+        RuntimeError,
+        OSError,
+    ) as e:
+        # Networks using Python features TorchScript lacks, or whose source
+        # is unavailable, can still be traced, as they are evaluated on
+        # fixed-width input batches.
+        print(f"Warning: Could not script the model ({e}), tracing it instead.")
+        scripted = torch.jit.trace(  # type: ignore[no-untyped-call]
+            network, _example_input(model, 2)
+        )
+    module = torch.jit.optimize_for_inference(torch.jit.freeze(scripted))
+
+    if cache_path is not None:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        torch.jit.save(module, cache_path)
+    return module
+
+
+def optimize_model(
+    model: TorchModel, model_path: str | None, options: InferenceOptions
+) -> None:
+    """Prepare ``model`` for serving in place, as set by ``options``.
+
+    Args:
+        model: A loaded model.
+        model_path: The configuration the model was loaded from; keys the
+            compilation cache.
+        options: What to apply.
+    Raises:
+        ValueError: If ``options.compile`` is not one of ``COMPILE_MODES``.
+    """
+    if options.compile not in COMPILE_MODES:
+        raise ValueError(
+            f"Unknown compile mode '{options.compile}', expected one of "
+            f"{COMPILE_MODES}."
+        )
+
+    configure_threads(options.intra_op_threads, options.inter_op_threads)
+
+    cache_key = None
+    if options.cache_dir is not None and model_path is not None:
+        cache_key = f"{model_hash(model_path)}-torch{torch.__version__}"
+
+    eager = model.model
+    network = eager
+    if options.compile == "script":
+        cache_path = (
+            os.path.join(options.cache_dir, f"{cache_key}.pt")
+            if options.cache_dir is not None and cache_key is not None
+            else None
+        )
+        network = _script(model, cache_path)
+    elif options.compile == "compile":
+        if options.cache_dir is not None:
+            # Inductor caches compiled graphs on disk by itself
+            from torch._inductor import config
+
+            config.fx_graph_cache = True
+            os.environ["TORCHINDUCTOR_CACHE_DIR"] = os.path.join(
+                options.cache_dir, "inductor"
+            )
+        # Batch sizes vary, so avoid recompiling for each new one
+        network = torch.compile(network.eval(), dynamic=True)
+
+    if options.inference_mode or network is not eager:
+        model.model = InferenceModule(
+            network,
+            eager=eager if network is not eager else None,
+            inference_mode=options.inference_mode,
+        )
+
+
+def warm_up(model: TorchModel, batch_sizes: tuple[int, ...]) -> None:
+    """Evaluate batches of default inputs of each size a few times."""
+    names = [var.name for var in model.input_variables]
+    for batch_size in batch_sizes:
+        samples = _example_input(model, batch_size).cpu().numpy().astype(np.float64)
+        for _ in range(WARM_UP_CALLS):
+            evaluate_batch(model, names, samples)
@@ -0,0 +1,248 @@
+from collections.abc import Iterator, Mapping
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import IO
+import json
+import threading
+import time
+
+import numpy as np
+
+
+def _header_size(length: int, fixed: int) -> int:
+    """Bytes of the msgpack header of a string, binary or container of ``length``.
+
+    Lengths below ``fixed`` fit into the type byte itself (0 for binary).
+    """
+    if length < fixed:
+        return 1
+    if length < 1 << 8 and fixed != 16:  # containers have no 8 bit length
+        return 2
+    return 3 if length < 1 << 16 else 5
+
+
+def payload_size(payload: object) -> int:
+    """Return the msgpack-encoded size of ``payload`` without encoding it.
+
+    Binary buffers, such as the arrays of ``encode_array``, count with their
+    byte length. Numbers are assumed to take the widest encoding, so the
+    result is an upper bound.
+    """
+    if isinstance(payload, memoryview):
+        return _header_size(payload.nbytes, 0) + payload.nbytes
+    if isinstance(payload, (bytes, bytearray)):
+        return _header_size(len(payload), 0) + len(payload)
+    if isinstance(payload, str):
+        length = len(payload.encode())
+        return _header_size(length, 32) + length
+    if isinstance(payload, Mapping):
+        return _header_size(len(payload), 16) + sum(
+            payload_size(key) + payload_size(value) for key, value in payload.items()
+        )
+    if isinstance(payload, (list, tuple)):
+        return _header_size(len(payload), 16) + sum(
+            payload_size(value) for value in payload
+        )
+    if payload is None or isinstance(payload, bool):
+        return 1
+    return 9
+
+
+class _Stage:
+    """Rolling window of the most recent durations of one stage."""
+
+    def __init__(self, window: int) -> None:
+        self.samples = np.zeros(window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def window(self) -> np.ndarray:
+        return self.samples[: min(self.count, len(self.samples))]
+
+
+class Metrics:
+    """Low-overhead per-stage latency and payload instrumentation.
+
+    Stage durations are kept in rolling windows from which p50/p95/p99 are
+    derived on demand. When disabled, ``stage`` returns a shared no-op
+    context manager and nothing is recorded.
+
+    Recordings may come from the event loop and the evaluation worker
+    thread, so they are serialized with a lock.
+    """
+
+    DEFAULT_WINDOW = 1024  # samples kept per stage
+    QUANTILES = (50, 95, 99)
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        log_path: str | None = None,
+        window: int = DEFAULT_WINDOW,
+    ) -> None:
+        """Create the metrics collector.
+
+        Args:
+            enabled: Whether to record anything at all.
+            log_path: If given (and enabled), every recording is appended to
+                this file as one JSON object per line.
+            window: Number of recent durations kept per stage.
+        """
+        self.enabled = enabled
+        self.window = window
+        self._stages: dict[str, _Stage] = {}
+        self._payload_bytes: dict[str, int] = {}
+        self._payload_pushes: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._null = nullcontext()
+        self._log: IO[str] | None = None
+        if enabled and log_path is not None:
+            self._log = open(log_path, "a", buffering=1)
+
+    def stage(self, name: str) -> AbstractContextManager[object]:
+        """Time the enclosed block as stage ``name``."""
+        if not self.enabled:
+            return self._null
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = _Stage(self.window)
+            stage.add(seconds)
+            self._write_log({"stage": name, "seconds": seconds})
+
+    def record_payload(self, figure: str, payload: object) -> None:
+        """Record the wire size of a payload pushed for ``figure``.
+
+        Payloads travel msgpack-encoded, binary arrays included; their size
+        is estimated by ``payload_size`` rather than encoding them twice.
+        """
+        if not self.enabled:
+            return
+
+        size = payload_size(payload)
+        with self._lock:
+            self._payload_bytes[figure] = self._payload_bytes.get(figure, 0) + size
+            self._payload_pushes[figure] = self._payload_pushes.get(figure, 0) + 1
+            self._write_log({"figure": figure, "bytes": size})
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Return count, mean and quantiles (in milliseconds) per stage."""
+        with self._lock:
+            stages = {
+                name: (s.count, s.total, s.window().copy())
+                for name, s in self._stages.items()
+            }
+
+        summary: dict[str, dict[str, float]] = {}
+        for name, (count, total, samples) in stages.items():
+            quantiles = np.percentile(samples, self.QUANTILES) * 1000.0
+            summary[name] = {
+                "count": count,
+                "mean_ms": total / count * 1000.0,
+                **{f"p{q}_ms": float(v) for q, v in zip(self.QUANTILES, quantiles)},
+            }
+        return summary
+
+    def payloads(self) -> dict[str, dict[str, int]]:
+        """Return total bytes and number of pushes per figure."""
+        with self._lock:
+            return {
+                figure: {
+                    "bytes": self._payload_bytes[figure],
+                    "pushes": self._payload_pushes[figure],
+                }
+                for figure in self._payload_bytes
+            }
+
+    def prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP lume_stage_seconds Latency of each evaluation/plotting stage.",
+            "# TYPE lume_stage_seconds summary",
+        ]
+        for name, stats in self.summary().items():
+            for q in self.QUANTILES:
+                lines.append(
+                    f'lume_stage_seconds{{stage="{name}",quantile="{q / 100}"}} '
+                    f"{stats[f'p{q}_ms'] / 1000.0}"
+                )
+            lines.append(
+                f'lume_stage_seconds_sum{{stage="{name}"}} '
+                f"{stats['mean_ms'] * stats['count'] / 1000.0}"
+            )
+            lines.append(
+                f'lume_stage_seconds_count{{stage="{name}"}} {int(stats["count"])}'
+            )
+
+        lines += [
+            "# HELP lume_payload_bytes_total Bytes pushed to clients per figure.",
+            "# TYPE lume_payload_bytes_total counter",
+        ]
+        payloads = self.payloads()
+        for figure, payload in payloads.items():
+            lines.append(
+                f'lume_payload_bytes_total{{figure="{figure}"}} {payload["bytes"]}'
+            )
+        lines += [
+            "# HELP lume_payload_pushes_total Figure pushes to clients.",
+            "# TYPE lume_payload_pushes_total counter",
+        ]
+        for figure, payload in payloads.items():
+            lines.append(
+                f'lume_payload_pushes_total{{figure="{figure}"}} {payload["pushes"]}'
+            )
+        return "\n".join(lines) + "\n"
+
+    def _write_log(self, record: dict[str, object]) -> None:
+        if self._log is not None:
+            self._log.write(json.dumps({"time": time.time(), **record}) + "\n")
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class StartupProfile:
+    """Wall-clock breakdown of application startup, stage by stage."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.stages: list[tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as startup stage ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def report(self) -> str:
+        """Format the stages and the total time since the profile was created."""
+        width = max((len(name) for name, _ in self.stages), default=0)
+        lines = ["Startup time breakdown:"]
+        for name, seconds in self.stages:
+            lines.append(f"  {name:<{width}}  {seconds * 1000.0:9.1f} ms")
+        total = time.perf_counter() - self.start
+        lines.append(f"  {'total':<{width}}  {total * 1000.0:9.1f} ms")
+        return "\n".join(lines)
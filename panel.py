@@ -0,0 +1,81 @@
+from collections.abc import Callable
+
+from trame_server.state import State
+
+
+class VariablePanel:
+    """Searchable, paginated view over an indexed list of variables.
+
+    Only the rows of the visible page are published to trame state, as one
+    list under ``rows_key``, so the state size and the number of rendered
+    widgets do not grow with the number of variables. The client renders
+    the rows with a ``v_for`` and reports edits back by variable index.
+    """
+
+    DEFAULT_PAGE_SIZE = 20
+
+    def __init__(
+        self,
+        state: State,
+        prefix: str,
+        names: list[str],
+        row: Callable[[int], dict[str, object]],
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> None:
+        """Create the panel and publish its first page.
+
+        Args:
+            state: The trame state the rows are published to.
+            prefix: Prefix of the panel's state keys.
+            names: Variable names, searched case-insensitively.
+            row: Builds the state row of the variable at a given index.
+            page_size: Number of rows per page.
+        """
+        if page_size <= 0:
+            raise ValueError(f"Page size must be positive, got {page_size}.")
+
+        self.state = state
+        self.row = row
+        self.page_size = page_size
+        self.search_key = f"{prefix}_search"
+        self.page_key = f"{prefix}_page"
+        self.page_count_key = f"{prefix}_page_count"
+        self.rows_key = f"{prefix}_rows"
+
+        self._names = [name.lower() for name in names]
+        self._matches = list(range(len(names)))
+
+        self.state.update(
+            {
+                self.search_key: "",
+                self.page_key: 1,
+                self.page_count_key: self._page_count(),
+            }
+        )
+        self.state.change(self.search_key)(self._on_search)
+        self.state.change(self.page_key)(self._on_page)
+        self.refresh()
+
+    @property
+    def visible(self) -> list[int]:
+        """Indices of the variables on the current page."""
+        page = max(int(self.state[self.page_key] or 1), 1)
+        start = (page - 1) * self.page_size
+        return self._matches[start : start + self.page_size]
+
+    def refresh(self) -> None:
+        """Republish the rows of the current page."""
+        self.state[self.rows_key] = [self.row(i) for i in self.visible]
+
+    def _page_count(self) -> int:
+        return max(-(-len(self._matches) // self.page_size), 1)
+
+    def _on_search(self, **kwargs: object) -> None:
+        search = str(self.state[self.search_key] or "").strip().lower()
+        self._matches = [i for i, name in enumerate(self._names) if search in name]
+        self.state[self.page_count_key] = self._page_count()
+        self.state[self.page_key] = 1
+        self.refresh()
+
+    def _on_page(self, **kwargs: object) -> None:
+        self.refresh()
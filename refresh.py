@@ -0,0 +1,129 @@
+import time
+
+
+class RefreshController:
+    """Adaptive display refresh rate with client backpressure.
+
+    Every push to the client is a numbered frame that the client
+    acknowledges once it has drawn it. The refresh interval follows the
+    slower of the server-side cost of a push and the client's acknowledge
+    latency, with some headroom, within ``[min_interval, max_interval]``.
+
+    While a frame is unacknowledged the client is busy, and pushes are
+    skipped rather than queued; the next push carries everything that
+    accumulated meanwhile. A frame that is not acknowledged within
+    ``ack_timeout`` (e.g. because its client disconnected) is written off
+    by ``expire``, and the interval backs off as if the client had taken
+    that long.
+    """
+
+    DEFAULT_INTERVAL = 0.2  # seconds
+    DEFAULT_MIN_INTERVAL = 0.1  # seconds
+    DEFAULT_MAX_INTERVAL = 2.0  # seconds
+    DEFAULT_ACK_TIMEOUT = 5.0  # seconds
+    HEADROOM = 1.5  # interval relative to the cost of one frame
+    SMOOTHING = 0.2  # weight of the newest measurement
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        ack_timeout: float = DEFAULT_ACK_TIMEOUT,
+    ) -> None:
+        """Start at ``interval``, clamped to the bounds.
+
+        Raises:
+            ValueError: If the bounds are not positive and ordered.
+        """
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(
+                f"Refresh interval bounds must satisfy 0 < min <= max, got "
+                f"{min_interval} and {max_interval}."
+            )
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.ack_timeout = ack_timeout
+        self.initial_interval = interval
+        self.frames = 0
+        self.skipped = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the measurements and unacknowledged frames, e.g. for a new client."""
+        self.interval = self._clamp(self.initial_interval)
+        self.tick_cost = 0.0  # smoothed server-side seconds per push
+        self.ack_latency = 0.0  # smoothed client seconds per frame
+        self._pending: dict[int, float] = {}  # frame -> send time
+        self._last_sent = float("-inf")
+
+    def _clamp(self, interval: float) -> float:
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _smooth(self, average: float, value: float) -> float:
+        return average + self.SMOOTHING * (value - average)
+
+    def _adapt(self) -> None:
+        cost = max(self.tick_cost, self.ack_latency)
+        self.interval = self._clamp(cost * self.HEADROOM)
+
+    def expire(self, now: float) -> None:
+        """Write off frames sent more than ``ack_timeout`` before ``now``.
+
+        Call once per refresh tick, before checking ``busy`` or ``due``.
+        """
+        expired = [
+            frame
+            for frame, sent in self._pending.items()
+            if now - sent > self.ack_timeout
+        ]
+        if expired:
+            for frame in expired:
+                del self._pending[frame]
+            self.ack_latency = self._smooth(self.ack_latency, self.ack_timeout)
+            self._adapt()
+
+    @property
+    def busy(self) -> bool:
+        """Whether the client has yet to acknowledge a frame."""
+        return bool(self._pending)
+
+    @property
+    def due(self) -> bool:
+        """Whether the client is idle and the interval has passed."""
+        return not self.busy and time.monotonic() - self._last_sent >= self.interval
+
+    def record_tick(self, seconds: float) -> None:
+        """Record the server-side cost of building and pushing one frame."""
+        self.tick_cost = self._smooth(self.tick_cost, seconds)
+        self._adapt()
+
+    def frame_sent(self) -> int:
+        """Register a push and return the frame number to acknowledge."""
+        self.frames += 1
+        self._last_sent = time.monotonic()
+        self._pending[self.frames] = self._last_sent
+        return self.frames
+
+    def acknowledge(self, frame: int) -> float | None:
+        """Mark ``frame`` and every earlier frame as drawn.
+
+        Returns:
+            The latency of ``frame`` in seconds, or ``None`` if it was already
+            acknowledged or written off.
+        """
+        sent = self._pending.pop(frame, None)
+        for earlier in [f for f in self._pending if f < frame]:
+            del self._pending[earlier]
+        if sent is None:
+            return None
+
+        latency = time.monotonic() - sent
+        self.ack_latency = self._smooth(self.ack_latency, latency)
+        self._adapt()
+        return latency
+
+    def skip(self) -> None:
+        """Record a push skipped because the client was busy."""
+        self.skipped += 1
@@ -0,0 +1,348 @@
+from collections.abc import Mapping
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+from history import OutputHistory
+
+
+class Summary(NamedTuple):
+    """Statistics of every tracked variable, as arrays in variable order.
+
+    Variables without finite samples have zero ``samples`` and NaN elsewhere.
+    """
+
+    samples: npt.NDArray[np.int64]
+    mean: npt.NDArray[np.float64]
+    std: npt.NDArray[np.float64]
+    min: npt.NDArray[np.float64]
+    max: npt.NDArray[np.float64]
+    ewma: npt.NDArray[np.float64]
+    quantiles: npt.NDArray[np.float64]  # (n_variables, len(QUANTILES))
+
+
+class _Moments:
+    """Count, mean, sum of squared deviations, min, max and sketch counts.
+
+    Arrays have a leading axis of ``slots`` (one per window bucket, or one
+    for the whole session), then one entry per variable.
+    """
+
+    def __init__(self, slots: int, variables: int, bins: int) -> None:
+        self.count = np.zeros((slots, variables), dtype=np.int64)
+        self.mean = np.zeros((slots, variables))
+        self.m2 = np.zeros((slots, variables))
+        self.min = np.full((slots, variables), np.inf)
+        self.max = np.full((slots, variables), -np.inf)
+        self.sketch = np.zeros((slots, variables, bins), dtype=np.int64)
+
+    def reset(self, slot: int) -> None:
+        self.count[slot] = 0
+        self.mean[slot] = 0.0
+        self.m2[slot] = 0.0
+        self.min[slot] = np.inf
+        self.max[slot] = -np.inf
+        self.sketch[slot] = 0
+
+    def add(
+        self,
+        slot: int,
+        values: npt.NDArray[np.float64],
+        valid: npt.NDArray[np.bool_],
+        codes: npt.NDArray[np.int64],
+    ) -> None:
+        """Merge a ``(batch, n_variables)`` block of samples into ``slot``.
+
+        The block's moments are combined with the slot's (Chan et al.), so
+        the cost is linear in the block and independent of the slot's count.
+        """
+        count = valid.sum(axis=0)
+        zeroed = np.where(valid, values, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = zeroed.sum(axis=0) / count
+        m2 = (np.where(valid, values - mean, 0.0) ** 2).sum(axis=0)
+
+        total = self.count[slot] + count
+        delta = mean - self.mean[slot]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(total > 0, count / total, 0.0)
+        update = count > 0
+        self.m2[slot] = np.where(
+            update,
+            self.m2[slot] + m2 + delta**2 * self.count[slot] * weight,
+            self.m2[slot],
+        )
+        self.mean[slot] = np.where(
+            update, self.mean[slot] + delta * weight, self.mean[slot]
+        )
+        self.count[slot] = total
+        self.min[slot] = np.fmin(
+            self.min[slot], np.where(valid, values, np.inf).min(axis=0, initial=np.inf)
+        )
+        self.max[slot] = np.fmax(
+            self.max[slot],
+            np.where(valid, values, -np.inf).max(axis=0, initial=-np.inf),
+        )
+
+        flat = (codes + np.arange(values.shape[1]) * self.sketch.shape[2])[valid]
+        np.add.at(self.sketch[slot].reshape(-1), flat, 1)
+
+    def merged(self) -> tuple[npt.NDArray[np.float64], ...]:
+        """Combine every slot into ``(count, mean, m2, min, max, sketch)``."""
+        count = self.count.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = (self.count * self.mean).sum(axis=0) / count
+        m2 = (self.m2 + self.count * (self.mean - mean) ** 2).sum(axis=0)
+        return (
+            count,
+            mean,
+            m2,
+            self.min.min(axis=0),
+            self.max.max(axis=0),
+            self.sketch.sum(axis=0),
+        )
+
+
+class RunningStatistics:
+    """Streaming statistics of each variable of an ``OutputHistory``.
+
+    Count, mean, variance (Welford, merged batch-wise), min, max, an
+    exponentially weighted moving average and approximate quantiles are
+    kept for the whole session and for a sliding window of recent samples.
+    Every sample is folded in once, with vectorized updates over batches
+    and variables; nothing is ever recomputed from the history.
+
+    Quantiles come from a fixed-size histogram sketch per variable. When a
+    sample falls outside a variable's range, the range is doubled towards
+    it and neighbouring bins are merged pairwise, as in ``Histogram2D``.
+    Quantiles are exact to within one bin width, ``range / bins``.
+
+    The window is kept as a ring of ``buckets`` partial summaries that are
+    merged when read, so it covers between ``window - window / buckets``
+    and ``window`` of the newest samples. The EWMA is only kept for the
+    session, as it already weights recent samples most.
+    """
+
+    DEFAULT_WINDOW = 1000  # samples
+    DEFAULT_BUCKETS = 8
+    DEFAULT_BINS = 128
+    DEFAULT_EWMA_ALPHA = 0.05  # weight of the newest sample
+    QUANTILES = (0.05, 0.5, 0.95)
+
+    def __init__(
+        self,
+        names: list[str],
+        window: int = DEFAULT_WINDOW,
+        buckets: int = DEFAULT_BUCKETS,
+        bins: int = DEFAULT_BINS,
+        ewma_alpha: float = DEFAULT_EWMA_ALPHA,
+    ) -> None:
+        """Track the variables ``names``.
+
+        Raises:
+            ValueError: If the window is shorter than the number of buckets,
+                the bins are not a positive even number, or ``ewma_alpha``
+                is not in ``(0, 1]``.
+        """
+        if buckets <= 0 or window < buckets:
+            raise ValueError(
+                f"Window of {window} samples cannot be split into {buckets} buckets."
+            )
+        if bins <= 0 or bins % 2:
+            raise ValueError(f"Sketch bins must be a positive even number, got {bins}.")
+        if not 0 < ewma_alpha <= 1:
+            raise ValueError(f"EWMA weight must be in (0, 1], got {ewma_alpha}.")
+
+        self.names = list(names)
+        self.window = window
+        self.buckets = buckets
+        self.bucket_size = window // buckets
+        self.bins = bins
+        self.ewma_alpha = ewma_alpha
+        self._seen = 0
+        self.reset()
+
+    def reset(self) -> None:
+        variables = len(self.names)
+        self._session = _Moments(1, variables, self.bins)
+        self._window = _Moments(self.buckets, variables, self.bins)
+        self._bucket = 0
+        self._bucket_fill = 0
+        # Bias-corrected EWMA: weighted sum and total weight of the samples
+        self._ewma = np.zeros(variables)
+        self._ewma_weight = np.zeros(variables)
+        # Per-variable sketch range, NaN until the first finite sample
+        self._lo = np.full(variables, np.nan)
+        self._hi = np.full(variables, np.nan)
+        self._seen = 0
+
+    def sync(self, history: OutputHistory) -> None:
+        """Fold in the samples appended to ``history`` since the last sync.
+
+        If more samples were appended than the history holds, the evicted
+        ones are missed. A cleared history starts the statistics over.
+        """
+        pending = history.total - self._seen
+        if pending < 0:
+            self.reset()
+            pending = len(history)
+        pending = min(pending, len(history))
+        if pending > 0:
+            self.update({name: history.column(name)[-pending:] for name in self.names})
+        self._seen = history.total
+
+    def update(self, values: Mapping[str, npt.ArrayLike]) -> None:
+        """Fold in a batch of samples given as equally long 1D arrays per variable.
+
+        Variables missing from ``values``, and non-finite samples, are
+        skipped.
+        """
+        columns = {
+            name: np.asarray(value).reshape(-1) for name, value in values.items()
+        }
+        count = len(next(iter(columns.values()), ()))
+        if count == 0:
+            return
+
+        block = np.full((count, len(self.names)), np.nan)
+        for i, name in enumerate(self.names):
+            if name in columns:
+                block[:, i] = columns[name]
+        valid = np.isfinite(block)
+
+        self._update_ewma(block, valid)
+        self._fit_range(block, valid)
+        codes = self._encode(block)
+        self._session.add(0, block, valid, codes)
+
+        # Split the block at bucket boundaries
+        start = 0
+        while start < count:
+            if self._bucket_fill == self.bucket_size:
+                self._bucket = (self._bucket + 1) % self.buckets
+                self._bucket_fill = 0
+                self._window.reset(self._bucket)
+            stop = min(count, start + self.bucket_size - self._bucket_fill)
+            self._window.add(
+                self._bucket, block[start:stop], valid[start:stop], codes[start:stop]
+            )
+            self._bucket_fill += stop - start
+            start = stop
+
+    def _update_ewma(
+        self, block: npt.NDArray[np.float64], valid: npt.NDArray[np.bool_]
+    ) -> None:
+        # Each sample decays by one step per newer valid sample of its variable
+        decay = 1.0 - self.ewma_alpha
+        newer = valid.sum(axis=0) - np.cumsum(valid, axis=0)
+        weights = np.where(valid, self.ewma_alpha * decay**newer, 0.0)
+        carried = decay ** valid.sum(axis=0)
+        self._ewma = self._ewma * carried + (weights * np.where(valid, block, 0.0)).sum(
+            axis=0
+        )
+        self._ewma_weight = self._ewma_weight * carried + weights.sum(axis=0)
+
+    def _fit_range(
+        self, block: npt.NDArray[np.float64], valid: npt.NDArray[np.bool_]
+    ) -> None:
+        low = np.where(valid, block, np.inf).min(axis=0)
+        high = np.where(valid, block, -np.inf).max(axis=0)
+        seen = valid.any(axis=0)
+
+        new = seen & np.isnan(self._lo)
+        if new.any():
+            # Start with the block's range, widened so it is never empty; a
+            # single value starts out very narrow and is doubled from there
+            span = np.where(
+                high[new] > low[new],
+                high[new] - low[new],
+                np.maximum(np.abs(low[new]), 1.0) * 1e-6,
+            )
+            self._lo[new] = low[new] - 0.5 * span / self.bins
+            self._hi[new] = high[new] + 0.5 * span / self.bins
+
+        while True:
+            below = seen & (low < self._lo)
+            above = seen & ~below & (high > self._hi)
+            if not (below.any() or above.any()):
+                return
+            self._double(below, towards_low=True)
+            self._double(above, towards_low=False)
+
+    def _double(self, variables: npt.NDArray[np.bool_], towards_low: bool) -> None:
+        if not variables.any():
+            return
+        width = self._hi[variables] - self._lo[variables]
+        half = self.bins // 2
+        for moments in (self._session, self._window):
+            sketch = moments.sketch[:, variables]
+            merged = sketch.reshape(*sketch.shape[:-1], half, 2).sum(axis=-1)
+            doubled = np.zeros_like(sketch)
+            if towards_low:
+                doubled[..., half:] = merged
+            else:
+                doubled[..., :half] = merged
+            moments.sketch[:, variables] = doubled
+        if towards_low:
+            self._lo[variables] -= width
+        else:
+            self._hi[variables] += width
+
+    def _encode(self, block: npt.NDArray[np.float64]) -> npt.NDArray[np.int64]:
+        with np.errstate(invalid="ignore"):
+            scaled = (block - self._lo) / (self._hi - self._lo) * self.bins
+        codes = np.nan_to_num(scaled, nan=0.0, posinf=0.0, neginf=0.0).astype(np.int64)
+        clipped: npt.NDArray[np.int64] = np.clip(codes, 0, self.bins - 1)
+        return clipped
+
+    def session(self) -> Summary:
+        """Statistics over every sample since the start or the last reset."""
+        return self._summary(self._session)
+
+    def recent(self) -> Summary:
+        """Statistics over the sliding window of recent samples."""
+        return self._summary(self._window)
+
+    def _summary(self, moments: _Moments) -> Summary:
+        count, mean, m2, low, high, sketch = moments.merged()
+        empty = count == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(m2 / np.maximum(count - 1, 1))
+            ewma = self._ewma / self._ewma_weight
+        return Summary(
+            samples=count.astype(np.int64),
+            mean=np.where(empty, np.nan, mean),
+            std=np.where(empty, np.nan, std),
+            min=np.where(empty, np.nan, low),
+            max=np.where(empty, np.nan, high),
+            ewma=ewma,
+            quantiles=self._quantiles(sketch, low, high),
+        )
+
+    def _quantiles(
+        self,
+        sketch: npt.NDArray[np.float64],
+        low: npt.NDArray[np.float64],
+        high: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.float64]:
+        cumulative = np.cumsum(sketch, axis=-1)
+        total = cumulative[:, -1]
+        width = (self._hi - self._lo) / self.bins
+        result = np.full((len(self.names), len(self.QUANTILES)), np.nan)
+        for j, q in enumerate(self.QUANTILES):
+            target = q * total
+            # First bin whose cumulative count reaches the target
+            index = np.minimum(
+                (cumulative < target[:, None]).sum(axis=-1), self.bins - 1
+            )
+            rows = np.arange(len(self.names))
+            before = np.where(index > 0, cumulative[rows, np.maximum(index - 1, 0)], 0)
+            in_bin = sketch[rows, index]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                fraction = np.where(in_bin > 0, (target - before) / in_bin, 0.5)
+            value = self._lo + (index + fraction) * width
+            # The sketch cannot tell where samples lie within a bin, but the
+            # extremes are known exactly
+            result[:, j] = np.where(total > 0, np.clip(value, low, high), np.nan)
+        return result
@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+from lume_model.models import TorchModel
+
+from cache import EvaluationCache
+from streaming import evaluate_batch
+
+
+class ScanKey(NamedTuple):
+    x_name: str
+    y_name: str | None
+    resolution: int
+    fixed: tuple[float | None, ...]  # quantized values of the other inputs
+
+
+class GridScan:
+    """A 1D or 2D grid over input value ranges, evaluated chunk by chunk.
+
+    The scanned inputs sweep their whole value range; every other input is
+    held at a fixed value. Each chunk is one batched model call, and the
+    outputs of the points evaluated so far can be read at any time, with the
+    pending points left as NaN.
+    """
+
+    DEFAULT_CHUNK_SIZE = 1024  # grid points per model call
+
+    def __init__(
+        self,
+        model: TorchModel,
+        x_name: str,
+        y_name: str | None,
+        resolution: int,
+        inputs: dict[str, float],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        """Lay out the grid.
+
+        Args:
+            model: The model to scan.
+            x_name: Input swept along the x axis.
+            y_name: Input swept along the y axis, or ``None`` for a line scan.
+            resolution: Number of grid points along each scanned axis.
+            inputs: Values of the inputs that are held fixed; inputs missing
+                here fall back to their default value.
+            chunk_size: Number of grid points evaluated per model call.
+        Raises:
+            ValueError: If a scanned input has no value range, the resolution
+                is below 2 or the chunk size is not positive.
+        """
+        if resolution < 2:
+            raise ValueError(f"Scan resolution must be at least 2, got {resolution}.")
+        if chunk_size <= 0:
+            raise ValueError(f"Chunk size must be positive, got {chunk_size}.")
+
+        self.model = model
+        self.x_name = x_name
+        self.y_name = y_name
+        self.resolution = resolution
+        self.chunk_size = chunk_size
+
+        variables = {var.name: var for var in model.input_variables}
+        self.input_names = list(variables)
+
+        def axis(name: str) -> npt.NDArray[np.float64]:
+            value_range = variables[name].value_range
+            if value_range is None:
+                raise ValueError(f"Cannot scan variable '{name}' without value range.")
+            return np.linspace(value_range[0], value_range[1], resolution)
+
+        self.x = axis(x_name)
+        self.y = axis(y_name) if y_name is not None else None
+
+        center = np.array(
+            [
+                inputs.get(
+                    name, np.nan if var.default_value is None else var.default_value
+                )
+                for name, var in variables.items()
+            ],
+            dtype=np.float64,
+        )
+        self.shape = (resolution,) if self.y is None else (resolution, resolution)
+        self.samples = np.tile(center, (int(np.prod(self.shape)), 1))
+        # Row-major over (y, x), so the outputs reshape straight into a grid
+        x_column = self.input_names.index(x_name)
+        if self.y is None:
+            self.samples[:, x_column] = self.x
+        else:
+            assert y_name is not None
+            self.samples[:, x_column] = np.tile(self.x, resolution)
+            self.samples[:, self.input_names.index(y_name)] = np.repeat(
+                self.y, resolution
+            )
+
+        self.outputs = {
+            var.name: np.full(len(self.samples), np.nan)
+            for var in model.output_variables
+        }
+        self.completed = 0
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= len(self.samples)
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the grid evaluated so far."""
+        return self.completed / len(self.samples)
+
+    def evaluate_next_chunk(self) -> None:
+        """Evaluate the next chunk of grid points with one model call."""
+        if self.done:
+            return
+
+        start = self.completed
+        stop = min(start + self.chunk_size, len(self.samples))
+        outputs = evaluate_batch(self.model, self.input_names, self.samples[start:stop])
+        for name, values in outputs.items():
+            self.outputs[name][start:stop] = values
+        self.completed = stop
+
+    def grid(self, name: str) -> npt.NDArray[np.float64]:
+        """Return the values of output ``name`` shaped like the grid."""
+        return self.outputs[name].reshape(self.shape)
+
+
+class ScanCache:
+    """Bounded LRU cache of completed scans.
+
+    Scans are keyed by their axes, resolution and the fixed inputs,
+    quantized like the evaluation cache, so re-opening a scan at the same
+    operating point costs nothing.
+    """
+
+    DEFAULT_MAX_SIZE = 16
+
+    def __init__(
+        self, evaluation_cache: EvaluationCache, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        if max_size <= 0:
+            raise ValueError(f"Cache size must be positive, got {max_size}.")
+
+        self.evaluation_cache = evaluation_cache
+        self.max_size = max_size
+        self._entries: OrderedDict[ScanKey, GridScan] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(
+        self,
+        x_name: str,
+        y_name: str | None,
+        resolution: int,
+        inputs: dict[str, float],
+    ) -> ScanKey:
+        # The scanned inputs do not matter, only the ones held fixed
+        fixed = {
+            name: value
+            for name, value in inputs.items()
+            if name not in (x_name, y_name)
+        }
+        return ScanKey(x_name, y_name, resolution, self.evaluation_cache.key(fixed))
+
+    def get(self, key: ScanKey) -> GridScan | None:
+        scan = self._entries.get(key)
+        if scan is not None:
+            self._entries.move_to_end(key)
+        return scan
+
+    def put(self, key: ScanKey, scan: GridScan) -> None:
+        self._entries[key] = scan
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,106 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Generic, TypeVar
+import traceback
+
+InputT = TypeVar("InputT")
+ResultT = TypeVar("ResultT")
+T = TypeVar("T")
+
+
+class EvaluationScheduler(Generic[InputT, ResultT]):
+    """Run evaluations on a worker thread, keeping only the newest request.
+
+    ``work`` runs on a single worker thread so the event loop stays free to
+    serve clients while the model is evaluated. At most one request is in
+    flight; requests arriving meanwhile are coalesced with ``merge`` so only
+    the most recent snapshot is evaluated next. ``apply`` is called on the
+    event loop with each result.
+
+    Every call to ``request`` returns a future that resolves once a result
+    covering that request has been applied.
+
+    Schedulers that evaluate the same model can share one single-thread
+    ``executor``, so its calls are serialized across them; a shared executor
+    is left running by ``shutdown``.
+    """
+
+    def __init__(
+        self,
+        work: Callable[[InputT], ResultT],
+        apply: Callable[[ResultT], None],
+        merge: Callable[[InputT, InputT], InputT] = lambda _old, new: new,
+        executor: Executor | None = None,
+    ) -> None:
+        self._work = work
+        self._apply = apply
+        self._merge = merge
+        self._owns_executor = executor is None
+        self._executor = (
+            executor
+            if executor is not None
+            else ThreadPoolExecutor(max_workers=1, thread_name_prefix="evaluation")
+        )
+        # Wrapped in a tuple so that None can be a valid request
+        self._pending: tuple[InputT] | None = None
+        self._waiters: list[asyncio.Future[None]] = []
+        self._task: asyncio.Task[None] | None = None
+
+        self.coalesced = 0
+
+    @property
+    def busy(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def request(self, request: InputT) -> asyncio.Future[None]:
+        """Queue ``request``, replacing (merging into) any request not yet started.
+
+        Must be called from the event loop.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._pending is not None:
+            self.coalesced += 1
+            request = self._merge(self._pending[0], request)
+        self._pending = (request,)
+
+        waiter: asyncio.Future[None] = loop.create_future()
+        self._waiters.append(waiter)
+
+        if not self.busy:
+            self._task = loop.create_task(self._run())
+        return waiter
+
+    def run(self, fn: Callable[..., T], *args: object) -> asyncio.Future[T]:
+        """Run ``fn`` on the worker thread, serialized with the evaluations.
+
+        Must be called from the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, fn, *args)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while self._pending is not None:
+            (request,) = self._pending
+            waiters = self._waiters
+            self._pending = None
+            self._waiters = []
+
+            try:
+                result = await loop.run_in_executor(self._executor, self._work, request)
+                self._apply(result)
+            except Exception as e:
+                # Keep serving later requests, but never hide the cause
+                print(f"Warning: Evaluation failed: {e}")
+                traceback.print_exc()
+
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    def shutdown(self) -> None:
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
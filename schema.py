@@ -0,0 +1,65 @@
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from lume_model.models import TorchModel
+
+
+class InputSpec(NamedTuple):
+    name: str
+    tensor_index: int  # position in the model's input tensor
+    value_range: tuple[float, float] | None
+    default_value: float | None
+
+
+class OutputSpec(NamedTuple):
+    name: str
+    tensor_index: int  # position in the model's output tensor
+
+
+class VariableSchema:
+    """The model's variables compiled once into flat, index-addressed specs.
+
+    Variable values live in plain lists indexed by ``tensor_index``, so
+    per-tick reads and writes need no per-variable state keys or string
+    processing.
+    """
+
+    def __init__(self, model: "TorchModel") -> None:
+        """Compile the schema for ``model``.
+
+        Args:
+            model: The model whose variables are compiled.
+        Raises:
+            ValueError: If two input or two output variables share a name.
+        """
+        self.inputs = [
+            InputSpec(
+                name=var.name,
+                tensor_index=i,
+                value_range=var.value_range,
+                default_value=var.default_value,
+            )
+            for i, var in enumerate(model.input_variables)
+        ]
+        self.outputs = [
+            OutputSpec(name=var.name, tensor_index=i)
+            for i, var in enumerate(model.output_variables)
+        ]
+
+        self.input_names = [spec.name for spec in self.inputs]
+        self.output_names = [spec.name for spec in self.outputs]
+        self.input_by_name = {spec.name: spec for spec in self.inputs}
+        self.output_by_name = {spec.name: spec for spec in self.outputs}
+
+        self._validate()
+
+    def _validate(self) -> None:
+        for kind, names, by_name in (
+            ("input", self.input_names, self.input_by_name),
+            ("output", self.output_names, self.output_by_name),
+        ):
+            if len(by_name) != len(names):
+                duplicates = sorted({name for name in names if names.count(name) > 1})
+                raise ValueError(
+                    f"Duplicate {kind} variable names: {', '.join(duplicates)}."
+                )
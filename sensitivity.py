@@ -0,0 +1,86 @@
+from collections.abc import Mapping
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+import torch
+
+from lume_model.models import TorchModel
+
+from inference import differentiable_network
+
+
+class Sensitivity(NamedTuple):
+    """Jacobian of the outputs with respect to the inputs at one operating point.
+
+    ``values[i, j]`` is the change of output ``i`` per full value range of
+    input ``j``, to first order. Inputs without a value range are scaled by
+    one, i.e. left as raw derivatives.
+    """
+
+    inputs: list[str]
+    outputs: list[str]
+    values: npt.NDArray[np.float64]  # (n_outputs, n_inputs)
+
+    def ranked(self, output: str) -> list[tuple[str, float]]:
+        """Return ``(input, sensitivity)`` pairs of ``output``, largest first."""
+        row = self.values[self.outputs.index(output)]
+        order = np.argsort(-np.abs(row), kind="stable")
+        return [(self.inputs[j], float(row[j])) for j in order]
+
+
+def compute_sensitivity(model: TorchModel, inputs: Mapping[str, float]) -> Sensitivity:
+    """Differentiate every output of ``model`` with respect to every input.
+
+    The derivatives are taken through the input transformers, the network
+    and the output transformers, with one vectorized reverse-mode pass
+    (``torch.func.jacrev``) rather than one evaluation per input.
+
+    Args:
+        model: A model with scalar inputs and outputs.
+        inputs: The operating point; inputs missing here are taken at their
+            default value.
+    Raises:
+        ValueError: If the model has array inputs or outputs.
+    """
+    input_names = [var.name for var in model.input_variables]
+    output_names = [var.name for var in model.output_variables]
+    point = torch.tensor(
+        [
+            inputs.get(
+                var.name, np.nan if var.default_value is None else var.default_value
+            )
+            for var in model.input_variables
+        ],
+        dtype=model.dtype,
+        device=model.device,
+    )
+    network = differentiable_network(model)
+
+    def evaluate(x: torch.Tensor) -> torch.Tensor:
+        # TorchModel.evaluate without the dict handling, which would detach
+        transformed = model._transform_inputs(x.unsqueeze(0))
+        output: torch.Tensor = model._transform_outputs(network(transformed))
+        return output.reshape(-1)
+
+    with torch.enable_grad():
+        try:
+            jacobian = torch.func.jacrev(evaluate)(point)
+        except RuntimeError:
+            # Transformers that cannot be vectorized take one backward pass
+            # per output instead
+            jacobian = torch.autograd.functional.jacobian(  # type: ignore[no-untyped-call]
+                evaluate, point
+            )
+
+    if jacobian.shape != (len(output_names), len(input_names)):
+        raise ValueError("Sensitivities can only be computed for scalar variables.")
+
+    scale = np.array(
+        [
+            1.0 if var.value_range is None else var.value_range[1] - var.value_range[0]
+            for var in model.input_variables
+        ]
+    )
+    values = jacobian.detach().cpu().numpy().astype(np.float64) * scale
+    return Sensitivity(input_names, output_names, values)
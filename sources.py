@@ -0,0 +1,442 @@
+"""Streaming input sources feeding live readings to the model.
+
+A source is an asyncio producer of readings, i.e. mappings from input
+variable names to values. Readings may be partial; inputs missing from a
+reading keep their previous value. Sources put their readings into a
+bounded ``ReadingQueue``, which the app drains in batches, evaluating each
+drain with one model call.
+
+Running this module publishes readings from a file or a synthetic
+generator on a socket, as a local stand-in for a machine feed::
+
+    python sources.py tcp://127.0.0.1:5555 --file readings.csv --rate 1000
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import AsyncIterator, Mapping
+from typing import Any
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import json
+import os
+
+import numpy as np
+import numpy.typing as npt
+
+Reading = dict[str, float]
+
+
+class ReadingQueue:
+    """Bounded queue of readings between a source and the model.
+
+    When the queue is full, ``policy`` decides what happens to a new
+    reading:
+
+    - ``"block"``: the producer waits until the consumer makes room.
+    - ``"drop_oldest"``: the oldest queued reading is discarded.
+    - ``"drop_newest"``: the new reading is discarded.
+    - ``"coalesce"``: the new reading is merged into the newest queued one,
+      so the latest value of every input is kept but intermediate samples
+      are lost.
+    """
+
+    POLICIES = ("block", "drop_oldest", "drop_newest", "coalesce")
+    DEFAULT_MAX_SIZE = 10_000
+    DEFAULT_POLICY = "drop_oldest"
+
+    def __init__(
+        self, max_size: int = DEFAULT_MAX_SIZE, policy: str = DEFAULT_POLICY
+    ) -> None:
+        if max_size <= 0:
+            raise ValueError(f"Queue size must be positive, got {max_size}.")
+        if policy not in self.POLICIES:
+            raise ValueError(
+                f"Unknown queue policy '{policy}', expected one of {self.POLICIES}."
+            )
+
+        self.max_size = max_size
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        self._items: deque[Reading] = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def put(self, reading: Reading) -> None:
+        if len(self._items) >= self.max_size:
+            if self.policy == "block":
+                while len(self._items) >= self.max_size:
+                    self._not_full.clear()
+                    await self._not_full.wait()
+            elif self.policy == "drop_oldest":
+                self._items.popleft()
+                self.dropped += 1
+            elif self.policy == "drop_newest":
+                self.dropped += 1
+                return
+            else:
+                self._items[-1] = {**self._items[-1], **reading}
+                self.coalesced += 1
+                return
+
+        self._items.append(reading)
+        self._not_empty.set()
+
+    async def drain(self, max_items: int) -> list[Reading]:
+        """Wait for at least one reading, then take up to ``max_items`` of them."""
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        count = min(max_items, len(self._items))
+        readings = [self._items.popleft() for _ in range(count)]
+        self._not_full.set()
+        return readings
+
+
+class InputSource(ABC):
+    """An asyncio producer of input readings."""
+
+    # Readings put into the queue between yields to the event loop, so a
+    # source with readings at hand cannot starve the UI.
+    YIELD_EVERY = 256
+
+    @abstractmethod
+    def readings(self) -> AsyncIterator[Reading]:
+        """Yield readings until the source is exhausted."""
+
+    async def run(self, queue: ReadingQueue) -> None:
+        """Put every reading of the source into ``queue``."""
+        count = 0
+        async for reading in self.readings():
+            await queue.put(reading)
+            count += 1
+            if count % self.YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+
+
+async def _paced(
+    rows: npt.NDArray[np.float64], names: list[str], rate: float | None
+) -> AsyncIterator[Reading]:
+    """Yield ``rows`` as readings, ``rate`` rows per second if given."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for i, row in enumerate(rows.tolist()):
+        if rate is not None:
+            delay = start + i / rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        yield dict(zip(names, row))
+
+
+class FileSource(InputSource):
+    """Replay readings from the numeric columns of a CSV or Parquet file.
+
+    Columns are matched to input variables by name; other columns are
+    ignored by the consumer. Reading Parquet files requires pyarrow.
+    """
+
+    def __init__(
+        self, path: str, rate: float | None = None, repeat: bool = False
+    ) -> None:
+        """Load the file.
+
+        Args:
+            path: A ``.csv``, ``.parquet`` or ``.pq`` file.
+            rate: Rows replayed per second; ``None`` replays as fast as the
+                queue accepts them.
+            repeat: Start over once the last row was replayed.
+        Raises:
+            ValueError: If the file type is not supported.
+        """
+        import pandas as pd
+
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".csv":
+            frame = pd.read_csv(path)
+        elif extension in (".parquet", ".pq"):
+            frame = pd.read_parquet(path)
+        else:
+            raise ValueError(f"Cannot replay readings from '{path}'.")
+
+        frame = frame.select_dtypes("number")
+        self.path = path
+        self.rate = rate
+        self.repeat = repeat
+        self.names = [str(name) for name in frame.columns]
+        self.rows = frame.to_numpy(dtype=np.float64)
+
+    async def readings(self) -> AsyncIterator[Reading]:
+        while True:
+            async for reading in _paced(self.rows, self.names, self.rate):
+                yield reading
+            if not self.repeat or len(self.rows) == 0:
+                return
+
+
+class SyntheticSource(InputSource):
+    """Random walks of the inputs within their value ranges.
+
+    Each step moves every input by a normally distributed amount, ``step``
+    times its range in standard deviation, reflecting off the range ends.
+    """
+
+    DEFAULT_RATE = 1000.0  # readings per second
+    DEFAULT_STEP = 0.01  # standard deviation, as a fraction of the value range
+    CHUNK_DURATION = 0.05  # seconds of readings generated at once
+
+    def __init__(
+        self,
+        ranges: Mapping[str, tuple[float, float]],
+        rate: float = DEFAULT_RATE,
+        step: float = DEFAULT_STEP,
+        seed: int | None = None,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError(f"Reading rate must be positive, got {rate}.")
+
+        self.names = list(ranges)
+        self.rate = rate
+        self.step = step
+        self._lo = np.array([ranges[name][0] for name in self.names], dtype=np.float64)
+        self._hi = np.array([ranges[name][1] for name in self.names], dtype=np.float64)
+        self._rng = np.random.default_rng(seed)
+
+    def _walk(
+        self, start: npt.NDArray[np.float64], count: int
+    ) -> npt.NDArray[np.float64]:
+        width = self._hi - self._lo
+        steps = self._rng.normal(0.0, self.step, (count, len(self.names))) * width
+        position = start + np.cumsum(steps, axis=0) - self._lo
+        # Reflect off both ends of the range
+        folded = np.mod(
+            position, 2 * width, where=width > 0, out=np.zeros_like(position)
+        )
+        walk: npt.NDArray[np.float64] = self._lo + np.where(
+            folded > width, 2 * width - folded, folded
+        )
+        return walk
+
+    async def readings(self) -> AsyncIterator[Reading]:
+        chunk = max(1, round(self.rate * self.CHUNK_DURATION))
+        position = (self._lo + self._hi) / 2
+        while True:
+            rows = self._walk(position, chunk)
+            position = rows[-1]
+            async for reading in _paced(rows, self.names, self.rate):
+                yield reading
+
+
+class _DatagramQueue(asyncio.DatagramProtocol):
+    def __init__(self, queue: asyncio.Queue[bytes]) -> None:
+        self.queue = queue
+
+    def datagram_received(self, data: bytes, addr: Any) -> None:
+        if not self.queue.full():  # UDP is lossy anyway
+            self.queue.put_nowait(data)
+
+
+class SocketSource(InputSource):
+    """Readings from a machine feed, as newline-delimited JSON objects.
+
+    Every line is one reading, e.g. ``{"x1": 0.5, "x2": 1.2}``. The
+    address selects the transport:
+
+    - ``tcp://host:port`` connects to a publisher serving TCP.
+    - ``unix:///path/to/socket`` connects to a publisher's Unix socket.
+    - ``udp://host:port`` binds there and receives datagrams of one or more
+      lines.
+
+    The source ends when a TCP or Unix publisher closes the connection.
+    """
+
+    MAX_PENDING_DATAGRAMS = 1024
+
+    def __init__(self, address: str) -> None:
+        """Parse the address; nothing is opened until readings are requested.
+
+        Raises:
+            ValueError: If the address has an unknown scheme.
+        """
+        self.address = address
+        self.scheme, self.host, self.port, self.path = _parse_address(address)
+        self.malformed = 0
+
+    def _parse(self, line: bytes) -> Reading | None:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            values = json.loads(line)
+            return {str(name): float(value) for name, value in values.items()}
+        except (ValueError, TypeError, AttributeError) as e:
+            if self.malformed == 0:
+                print(f"Warning: Skipping malformed reading from {self.address}: {e}")
+            self.malformed += 1
+            return None
+
+    async def readings(self) -> AsyncIterator[Reading]:
+        if self.scheme == "udp":
+            async for reading in self._datagram_readings():
+                yield reading
+            return
+
+        if self.scheme == "unix":
+            reader, writer = await asyncio.open_unix_connection(self.path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while line := await reader.readline():
+                parsed = self._parse(line)
+                if parsed is not None:
+                    yield parsed
+        finally:
+            writer.close()
+
+    async def _datagram_readings(self) -> AsyncIterator[Reading]:
+        datagrams: asyncio.Queue[bytes] = asyncio.Queue(self.MAX_PENDING_DATAGRAMS)
+        transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: _DatagramQueue(datagrams), local_addr=(self.host, self.port)
+        )
+        try:
+            while True:
+                for line in (await datagrams.get()).splitlines():
+                    reading = self._parse(line)
+                    if reading is not None:
+                        yield reading
+        finally:
+            transport.close()
+
+
+def _parse_address(address: str) -> tuple[str, str, int, str]:
+    """Split a source address into ``(scheme, host, port, path)``."""
+    parts = urlsplit(address)
+    if parts.scheme == "unix":
+        return "unix", "", 0, parts.path
+    if parts.scheme in ("tcp", "udp") and parts.hostname and parts.port:
+        return parts.scheme, parts.hostname, parts.port, ""
+    raise ValueError(
+        f"Unsupported source address '{address}', expected tcp://host:port, "
+        f"udp://host:port or unix:///path."
+    )
+
+
+def readings_to_samples(
+    readings: list[Reading],
+    input_names: list[str],
+    previous: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Stack readings into a ``(len(readings), n_inputs)`` input matrix.
+
+    Inputs missing from a reading carry over from the reading before, and
+    from ``previous`` for the first one.
+
+    Args:
+        readings: Readings in arrival order.
+        input_names: Input variable name of each column.
+        previous: The last input vector before ``readings``.
+    """
+    column = {name: i for i, name in enumerate(input_names)}
+    samples = np.full((len(readings) + 1, len(input_names)), np.nan)
+    samples[0] = previous
+    for row, reading in enumerate(readings, start=1):
+        for name, value in reading.items():
+            i = column.get(name)
+            if i is not None:
+                samples[row, i] = value
+
+    # Forward fill each column from the last row that has a value
+    rows = np.where(np.isnan(samples), 0, np.arange(len(samples))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled: npt.NDArray[np.float64] = samples[rows, np.arange(len(input_names))][1:]
+    return filled
+
+
+async def serve_readings(address: str, source: InputSource) -> None:
+    """Publish the readings of ``source`` on ``address``.
+
+    A stand-in for a machine feed that ``SocketSource`` can connect to. TCP
+    and Unix publishers send every reading to all connected clients; UDP
+    publishers send datagrams to ``address``.
+    """
+    scheme, host, port, path = _parse_address(address)
+    loop = asyncio.get_running_loop()
+
+    if scheme == "udp":
+        transport, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, remote_addr=(host, port)
+        )
+        try:
+            async for reading in source.readings():
+                transport.sendto(json.dumps(reading).encode() + b"\n")
+        finally:
+            transport.close()
+        return
+
+    clients: set[asyncio.StreamWriter] = set()
+
+    async def connect(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        clients.add(writer)
+
+    server = (
+        await asyncio.start_unix_server(connect, path)
+        if scheme == "unix"
+        else await asyncio.start_server(connect, host, port)
+    )
+    async with server:
+        async for reading in source.readings():
+            line = json.dumps(reading).encode() + b"\n"
+            for writer in list(clients):
+                if writer.is_closing():
+                    clients.discard(writer)
+                else:
+                    writer.write(line)
+        for writer in clients:
+            writer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Publish input readings as a stand-in for a machine feed."
+    )
+    parser.add_argument(
+        "address", help="tcp://host:port, udp://host:port or unix:///path"
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--file", help="CSV or Parquet file of readings to replay")
+    group.add_argument(
+        "--model", help="model configuration whose input ranges are random-walked"
+    )
+    parser.add_argument("--rate", type=float, default=SyntheticSource.DEFAULT_RATE)
+    parser.add_argument("--repeat", action="store_true", help="replay the file forever")
+    args = parser.parse_args()
+
+    source: InputSource
+    if args.file is not None:
+        source = FileSource(args.file, rate=args.rate, repeat=args.repeat)
+    else:
+        from lume_model.models import TorchModel
+
+        model = TorchModel(args.model)
+        source = SyntheticSource(
+            {
+                var.name: var.value_range
+                for var in model.input_variables
+                if var.value_range is not None
+            },
+            rate=args.rate,
+        )
+
+    print(f"Publishing readings on {args.address}...")
+    asyncio.run(serve_readings(args.address, source))
+
+
+if __name__ == "__main__":
+    main()
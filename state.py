@@ -1,83 +1,101 @@
-import pandas as pd
+from typing import TYPE_CHECKING
 
 from trame_server import Server
 from trame_server.state import State
 from trame_server.controller import Controller
 
-from lume_model.models import TorchModel
+if TYPE_CHECKING:
+    from lume_model.models import TorchModel
 
-from util import sanitize_string, validate_state_key
+from history import OutputHistory
+from schema import VariableSchema
 
 
 class StateManager:
-    PREFIX_INPUT = "input_variables"
-    PREFIX_OUTPUT = "output_variables"
-    PREFIX_DISPLAY_OUTPUT = "display_output_variables"
     DEFAULT_OUTPUT_VALUE = "N/A"
     DEFAULT_DISPLAY_OUTPUT_VALUE = True
+    MAX_DEFAULT_DISPLAYED_OUTPUTS = 10  # plotted until the user picks others
+    DEFAULT_HISTORY_CAPACITY = 10_000  # samples per output variable
 
-    input_variable_names: list[str] = []
-    output_variable_names: list[str] = []
+    INVALID_INPUT_VALUES = (None, "", ".")
 
-    def __init__(self, server: Server, model: TorchModel) -> None:
+    def __init__(
+        self,
+        server: Server,
+        model: "TorchModel",
+        history_capacity: int = DEFAULT_HISTORY_CAPACITY,
+    ) -> None:
         self.server = server
         self.model = model
+        self.history_capacity = history_capacity
 
+        self.schema = VariableSchema(model)
         self._initialize_state()
 
-    def set_state(self, key: str, value: object) -> None:
-        """Set a state value with server-side key validation.
+    @property
+    def input_variable_names(self) -> list[str]:
+        return self.schema.input_names
+
+    @property
+    def output_variable_names(self) -> list[str]:
+        return self.schema.output_names
+
+    def set_input(self, index: int, value: float | str | None) -> None:
+        """Set the raw value of the input at ``index``, as entered by the user."""
+        self.input_values[index] = value
+
+    def set_display(self, index: int, display: bool) -> None:
+        """Show or hide the output at ``index`` in the timeseries plot."""
+        self.display_outputs[index] = bool(display)
+
+    def displayed_outputs(self) -> list[str]:
+        return [
+            spec.name
+            for spec, display in zip(self.schema.outputs, self.display_outputs)
+            if display
+        ]
 
-        This validates the key before setting it in trame state, catching
-        invalid characters (like ':') that would cause silent client-side
-        JavaScript errors.
+    def read_inputs(self) -> dict[str, float]:
+        """Read the current input values, keyed by variable name.
 
-        Args:
-            key: The state key (must be a valid JavaScript identifier).
-            value: The value to set.
-        Raises:
-            ValueError: If the key is not a valid JavaScript identifier.
+        Inputs that are empty or cannot be converted to float are left out.
         """
-        validate_state_key(key)
-        self.state[key] = value
+        input_dict: dict[str, float] = {}
+        for spec, state_value in zip(self.schema.inputs, self.input_values):
+            if state_value not in self.INVALID_INPUT_VALUES:
+                try:
+                    input_dict[spec.name] = float(state_value)
+                except ValueError as e:
+                    print(
+                        f"Warning: Could not convert state value '{state_value}' for variable '{spec.name}' to float: {e}"
+                    )
+        return input_dict
+
+    def write_outputs(self, values: dict[str, float]) -> None:
+        """Store output values; outputs missing from ``values`` are kept."""
+        for spec in self.schema.outputs:
+            if spec.name in values:
+                self.output_values[spec.tensor_index] = values[spec.name]
 
     def _initialize_state(self) -> None:
-        """Initialize state values for all input variables before UI creation."""
-
-        for var in self.model.input_variables:
-            if var.default_value is not None:
-                self.set_state(
-                    f"{self.PREFIX_INPUT}_{sanitize_string(var.name)}",
-                    var.default_value,
-                )
-                self.input_variable_names.append(var.name)
-
-        column_names: list[str] = []
-
-        for var in self.model.output_variables:
-            self.set_state(
-                f"{self.PREFIX_OUTPUT}_{sanitize_string(var.name)}",
-                self.DEFAULT_OUTPUT_VALUE,
-            )
-            self.set_state(
-                f"{self.PREFIX_DISPLAY_OUTPUT}_{sanitize_string(var.name)}",
-                self.DEFAULT_DISPLAY_OUTPUT_VALUE,
-            )
-
-            column_names.append(var.name)
-            self.output_variable_names.append(var.name)
-
-        output_df = pd.DataFrame(columns=column_names)
-        output_dict = output_df.to_dict(orient="list")
-        self.state["output_plot_data"] = output_dict
-
-        x_items = [
-            {"title": name, "value": name} for name in self.output_variable_names
+        """Initialize variable values and shared state before UI creation."""
+
+        # Variable values are kept server-side, indexed like the schema; the
+        # variable panels only publish the rows that are on screen.
+        self.input_values: list[float | str | None] = [
+            spec.default_value for spec in self.schema.inputs
+        ]
+        self.output_values: list[object] = [
+            self.DEFAULT_OUTPUT_VALUE for _ in self.schema.outputs
         ]
-        y_items = [
-            {"title": name, "value": name} for name in self.output_variable_names
+        self.display_outputs = [
+            self.DEFAULT_DISPLAY_OUTPUT_VALUE and i < self.MAX_DEFAULT_DISPLAYED_OUTPUTS
+            for i in range(len(self.schema.outputs))
         ]
 
+        # Output history is kept server-side only; figures read it directly
+        self.history = OutputHistory(self.output_variable_names, self.history_capacity)
+
         DEFAULT_X = 0
         DEFAULT_Y = 1 if len(self.output_variable_names) > 1 else 0
         x_default = self.output_variable_names[DEFAULT_X]
@@ -86,8 +104,8 @@ class StateManager:
         self.server.state["hist_x_axis"] = x_default
         self.server.state["hist_y_axis"] = y_default
 
-        self.server.state["x_select"] = x_items
-        self.server.state["y_select"] = y_items
+        # Both axis selects share one list of plain names
+        self.server.state["hist_axis_items"] = self.output_variable_names
 
         # Initialize streaming state
         self.server.state["streaming_active"] = False
@@ -0,0 +1,142 @@
+import numpy as np
+import numpy.typing as npt
+import torch
+
+from lume_model.models import TorchModel
+
+from history import OutputHistory
+from history_log import HistoryLog
+
+
+def evaluate_batch(
+    model: TorchModel, input_names: list[str], samples: npt.NDArray[np.float64]
+) -> dict[str, npt.NDArray[np.float64]]:
+    """Evaluate a ``(batch, n_inputs)`` matrix with one model call.
+
+    Args:
+        model: The model to evaluate.
+        input_names: Input variable name of each column of ``samples``.
+        samples: One input vector per row.
+    Returns:
+        A 1D array of ``batch`` values per output variable.
+    """
+    input_dict = {
+        name: torch.from_numpy(samples[:, i]) for i, name in enumerate(input_names)
+    }
+    output = model.evaluate(input_dict)
+    return {
+        name: torch.as_tensor(value).detach().cpu().numpy().reshape(len(samples))
+        for name, value in output.items()
+    }
+
+
+class BatchStreamer:
+    """Evaluate batches of inputs jittered around the current operating point.
+
+    Each step draws ``batch_size`` input vectors around the given input
+    values, evaluates them with a single model call and appends every row
+    to the output history in one vectorized write, and to the on-disk
+    history log if one is given.
+    """
+
+    DEFAULT_JITTER = 0.01  # standard deviation, as a fraction of the value range
+
+    def __init__(
+        self,
+        model: TorchModel,
+        history: OutputHistory | None,
+        batch_size: int,
+        jitter: float = DEFAULT_JITTER,
+        seed: int | None = None,
+        history_log: HistoryLog | None = None,
+    ) -> None:
+        if batch_size <= 0:
+            raise ValueError(f"Batch size must be positive, got {batch_size}.")
+
+        self.model = model
+        self.history = history
+        self.history_log = history_log
+        self.batch_size = batch_size
+        self.jitter = jitter
+        self.rng = np.random.default_rng(seed)
+
+        self._input_names = [var.name for var in model.input_variables]
+        self._defaults = np.array(
+            [
+                np.nan if var.default_value is None else float(var.default_value)
+                for var in model.input_variables
+            ]
+        )
+        ranges = [var.value_range or (-np.inf, np.inf) for var in model.input_variables]
+        self._low = np.array([low for low, _ in ranges], dtype=np.float64)
+        self._high = np.array([high for _, high in ranges], dtype=np.float64)
+        # Inputs without a finite range are not jittered
+        self._scale = np.nan_to_num(
+            (self._high - self._low) * jitter, nan=0.0, posinf=0.0, neginf=0.0
+        )
+
+    def sample(self, inputs: dict[str, float]) -> npt.NDArray[np.float64]:
+        """Draw a ``(batch_size, n_inputs)`` matrix around ``inputs``.
+
+        Inputs missing from ``inputs`` fall back to their default value.
+        """
+        center = np.array(
+            [
+                inputs.get(name, default)
+                for name, default in zip(self._input_names, self._defaults)
+            ]
+        )
+        noise = self.rng.standard_normal((self.batch_size, len(center)))
+        return np.clip(center + noise * self._scale, self._low, self._high)
+
+    def evaluate(
+        self, samples: npt.NDArray[np.float64]
+    ) -> dict[str, npt.NDArray[np.float64]]:
+        """Evaluate a ``(batch, n_inputs)`` matrix with one model call."""
+        return evaluate_batch(self.model, self._input_names, samples)
+
+    def input_columns(
+        self, samples: npt.NDArray[np.float64]
+    ) -> dict[str, npt.NDArray[np.float64]]:
+        """Split a ``(batch, n_inputs)`` matrix into columns keyed by input name."""
+        return {name: samples[:, i] for i, name in enumerate(self._input_names)}
+
+    def step(self, inputs: dict[str, float]) -> int:
+        """Evaluate one batch around ``inputs`` and append it to history.
+
+        Returns:
+            The number of samples appended.
+        Raises:
+            ValueError: If the streamer was created without a history.
+        """
+        return self.append(self.sample(inputs))
+
+    def append(self, samples: npt.NDArray[np.float64]) -> int:
+        """Evaluate a ``(batch, n_inputs)`` matrix and append it to history.
+
+        Returns:
+            The number of samples appended.
+        Raises:
+            ValueError: If the streamer was created without a history.
+        """
+        return self.record(samples, self.evaluate(samples))
+
+    def record(
+        self,
+        samples: npt.NDArray[np.float64],
+        outputs: dict[str, npt.NDArray[np.float64]],
+    ) -> int:
+        """Append evaluated ``samples`` and their ``outputs`` to history.
+
+        Returns:
+            The number of samples appended.
+        Raises:
+            ValueError: If the streamer was created without a history.
+        """
+        if self.history is None:
+            raise ValueError("Cannot step a batch streamer without a history.")
+
+        self.history.extend(outputs)
+        if self.history_log is not None:
+            self.history_log.extend({**self.input_columns(samples), **outputs})
+        return len(samples)
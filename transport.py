@@ -0,0 +1,72 @@
+"""Binary encoding of plot arrays for transport to the client.
+
+Arrays are sent as plotly typed-array specs, ``{"dtype", "shape", "bdata"}``,
+whose ``bdata`` is the raw little-endian buffer. wslink packs the buffer
+with msgpack as a binary field, so samples are never boxed into Python
+floats or written out as JSON text. On the client, msgpack decodes the
+buffer into a ``Uint8Array`` view into the received message; the
+expressions below turn it back into arrays for plotly.
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+# numpy dtype -> plotly typed-array name
+_PLOTLY_DTYPES = {
+    np.dtype("<f4"): "f4",
+    np.dtype("<f8"): "f8",
+    np.dtype("i1"): "i1",
+    np.dtype("u1"): "u1",
+    np.dtype("<i2"): "i2",
+    np.dtype("<u2"): "u2",
+    np.dtype("<i4"): "i4",
+    np.dtype("<u4"): "u4",
+}
+
+_TYPED_ARRAYS = (
+    "{f4: 'Float32Array', f8: 'Float64Array', "
+    "i1: 'Int8Array', u1: 'Uint8Array', i2: 'Int16Array', u2: 'Uint16Array', "
+    "i4: 'Int32Array', u4: 'Uint32Array'}"
+)
+
+# The received buffer may start at any offset of the message, so it is
+# copied into a buffer of its own, which typed arrays can be built on.
+_OWN_BUFFER_JS = "(s.bdata.buffer ? s.bdata.slice().buffer : s.bdata)"
+
+# JS expression: decode a spec into a plain array, e.g. to concatenate to it
+DECODE_ARRAY_JS = (
+    f"((s) => Array.from(new window[{_TYPED_ARRAYS}[s.dtype]]({_OWN_BUFFER_JS})))"
+)
+
+# JS expression: turn a spec into one that plotly decodes itself
+DECODE_SPEC_JS = (
+    f"((s) => ({{dtype: s.dtype, shape: s.shape, bdata: {_OWN_BUFFER_JS}}}))"
+)
+
+
+def encode_array(
+    values: npt.ArrayLike, dtype: npt.DTypeLike = np.float32
+) -> dict[str, object]:
+    """Encode ``values`` as a plotly typed-array spec with a binary buffer.
+
+    The values are converted to ``dtype`` at most once; the buffer is then
+    handed to the transport as a view, without further copies.
+
+    Args:
+        values: The array to encode; any shape.
+        dtype: A float32, float64 or 8 to 32 bit integer type.
+    Raises:
+        ValueError: If ``dtype`` has no plotly typed-array equivalent.
+    """
+    target = np.dtype(dtype)
+    if target.itemsize > 1:
+        target = target.newbyteorder("<")
+    if target not in _PLOTLY_DTYPES:
+        raise ValueError(f"Cannot encode arrays of type {target} for plotly.")
+
+    array = np.ascontiguousarray(values, dtype=target)
+    return {
+        "dtype": _PLOTLY_DTYPES[target],
+        "shape": ",".join(str(n) for n in array.shape),
+        "bdata": array.reshape(-1).data,
+    }
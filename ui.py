@@ -1,11 +1,18 @@
+from collections.abc import Callable, Mapping
+from concurrent.futures import Executor
+from typing import Any, NamedTuple, TypeVar
+import asyncio
+import time
+
 from trame_server.state import State
 from trame_server.controller import Controller
 
 import numpy as np
-import pandas as pd
+import numpy.typing as npt
 
 from trame.ui.vuetify3 import SinglePageLayout
-from trame.widgets.html import Div
+from trame.widgets.client import JSEval
+from trame.widgets.html import Div, Tbody, Td, Th, Thead, Tr
 from trame.widgets.vuetify3 import (
     VContainer,
     VSlider,
@@ -15,25 +22,191 @@ from trame.widgets.vuetify3 import (
     VCol,
     VDivider,
     VCheckbox,
+    VPagination,
+    VProgressLinear,
     VSelect,
+    VSwitch,
+    VTable,
 )
+import plotly.colors
 import plotly.graph_objects as go
-import plotly.express as px
 from trame.widgets.plotly import Figure
 
 from lume_model.models import TorchModel
-from lume_model.variables import ScalarVariable
 
+from cache import EvaluationCache
+from comparison import ModelComparison
+from downsample import MinMaxDownsampler
+from histogram import Histogram2D
+from history_log import HistoryLog, HistoryReader
+from metrics import Metrics
+from panel import VariablePanel
+from refresh import RefreshController
+from running_stats import RunningStatistics, Summary
+from scan import GridScan, ScanCache, ScanKey
+from scheduler import EvaluationScheduler
+from sensitivity import Sensitivity, compute_sensitivity
 from state import StateManager
+from streaming import BatchStreamer, evaluate_batch
+from transport import DECODE_ARRAY_JS, DECODE_SPEC_JS, encode_array
+from uncertainty import UncertaintyPropagator
+
+T = TypeVar("T")
+
+
+class PlotUpdate(NamedTuple):
+    """Encoded figure data, built on the worker and applied on the event loop."""
 
-from util import sanitize_string
+    histogram: dict[str, Any]
+    timeseries: dict[str, Any] | None
+    timeseries_delta: dict[str, Any] | None
+    cost: float  # seconds spent building the update
+
+
+class EvaluationRequest(NamedTuple):
+    inputs: dict[str, float] | None
+    histogram_axes: tuple[str, str]  # read from the state with the inputs
+    full_refresh: bool = False
+    update_plot: bool = True
+
+    @staticmethod
+    def merge(
+        old: "EvaluationRequest", new: "EvaluationRequest"
+    ) -> "EvaluationRequest":
+        # A plot-only request must not drop a pending evaluation
+        return EvaluationRequest(
+            inputs=new.inputs if new.inputs is not None else old.inputs,
+            histogram_axes=new.histogram_axes,
+            full_refresh=old.full_refresh or new.full_refresh,
+            update_plot=old.update_plot or new.update_plot,
+        )
+
+
+class EvaluationResult(NamedTuple):
+    outputs: dict[str, float]
+    plot: PlotUpdate | None
+    statistics: dict[str, Summary]  # keyed by scope
 
 
 class UI:
     counter: int = 0
 
-    def __init__(self, state_manager: StateManager) -> None:
+    HISTOGRAM_BINS = 100
+    SLIDER_STEPS = 100
+    PANEL_PAGE_SIZE = 20  # variable rows rendered per panel page
+    STATISTICS_WINDOW = 1000  # samples in the "Window" statistics scope
+    STATISTICS_SCOPES = ["Session", "Window"]
+    SCAN_FIGURE_KEY = "scan_figure"
+    SCAN_DEFAULT_RESOLUTION = 50  # grid points per scanned axis
+    SCAN_MAX_RESOLUTION = 200
+    SENSITIVITY_FIGURE_KEY = "sensitivity_figure"
+    SENSITIVITY_INTERVAL = 1.0  # seconds, at most one Jacobian per interval
+    SENSITIVITY_MAX_INPUTS = 20  # inputs shown, most sensitive first
+    SENSITIVITY_VIEWS = ["Ranked", "Heatmap"]
+    UNCERTAINTY_BAND_OPACITY = 0.2
+    HISTOGRAM_FIGURE_KEY = "histogram_figure"
+    TIMESERIES_FIGURE_KEY = "timeseries_figure"
+    TIMESERIES_MAX_POINTS = 2000  # per trace, before downsampling kicks in
+    # Sample indices need float64 to stay exact; values are plotted as float32
+    TIMESERIES_X_DTYPE = np.float64
+    TIMESERIES_Y_DTYPE = np.float32
+    # Replaces the traces of the timeseries figure with the ones in $event.
+    # Traces that share their x values reference the same entry of $event.x,
+    # and trace.style holds further plotly trace attributes.
+    SET_TRACES_JS = (
+        f"((xs) => trame.state.set('{TIMESERIES_FIGURE_KEY}', {{"
+        f"layout: trame.state.get('{TIMESERIES_FIGURE_KEY}').layout, "
+        "data: $event.traces.map((trace) => Object.assign("
+        "{type: 'scatter', mode: 'lines+markers', name: trace.name}, trace.style, "
+        f"{{x: xs[trace.x], y: {DECODE_ARRAY_JS}(trace.y)}}"
+        f"))}}))($event.x.map({DECODE_ARRAY_JS}))"
+    )
+    # Edits every trace of the timeseries figure: $event.edits holds four
+    # counts per trace, the points to drop from its start and its end and
+    # the points to prepend and append, which follow each other in $event.x
+    # and $event.y trace by trace.
+    EXTEND_TRACES_JS = (
+        "((x, y, edits) => { let at = 0; "
+        f"trame.state.set('{TIMESERIES_FIGURE_KEY}', {{"
+        f"layout: trame.state.get('{TIMESERIES_FIGURE_KEY}').layout, "
+        f"data: trame.state.get('{TIMESERIES_FIGURE_KEY}').data.map((trace, i) => {{"
+        "const [dropHead, dropTail, head, tail] = edits.slice(4 * i, 4 * i + 4); "
+        "const start = at; at += head + tail; "
+        "const edit = (points, kept) => points.slice(start, start + head).concat("
+        "kept.slice(dropHead, kept.length - dropTail), "
+        "points.slice(start + head, at)); "
+        "return Object.assign({}, trace, {x: edit(x, trace.x), y: edit(y, trace.y)}); "
+        "})}); })("
+        f"{DECODE_ARRAY_JS}($event.x), {DECODE_ARRAY_JS}($event.y), "
+        f"{DECODE_ARRAY_JS}($event.edits))"
+    )
+    # Replaces the heatmap, the contours of compared models and the axis
+    # titles of the histogram figure, keeping the rest of the layout the
+    # client already has.
+    SET_HISTOGRAM_JS = (
+        f"((figure) => trame.state.set('{HISTOGRAM_FIGURE_KEY}', {{"
+        "layout: Object.assign({}, figure.layout, {"
+        "xaxis: Object.assign({}, figure.layout.xaxis, {title: {text: $event.x_title}}), "
+        "yaxis: Object.assign({}, figure.layout.yaxis, {title: {text: $event.y_title}})"
+        "}), "
+        "data: ($event.z ? [{type: 'heatmap', "
+        f"z: {DECODE_SPEC_JS}($event.z), "
+        f"x: {DECODE_SPEC_JS}($event.x), "
+        f"y: {DECODE_SPEC_JS}($event.y), "
+        "colorbar: {title: {text: 'count'}}}] : []).concat("
+        "$event.overlays.map((o) => ({type: 'contour', name: o.name, "
+        f"z: {DECODE_SPEC_JS}(o.z), x: {DECODE_SPEC_JS}(o.x), y: {DECODE_SPEC_JS}(o.y), "
+        "showscale: false, showlegend: true, colorscale: [[0, o.color], [1, o.color]], "
+        "contours: {coloring: 'lines'}, line: {width: 1.5}})))"
+        f"}}))(trame.state.get('{HISTOGRAM_FIGURE_KEY}'))"
+    )
+
+    def __init__(
+        self,
+        state_manager: StateManager,
+        evaluation_cache: EvaluationCache | None = None,
+        metrics: Metrics | None = None,
+        history_log: HistoryLog | None = None,
+        refresh: RefreshController | None = None,
+        comparison: ModelComparison | None = None,
+        uncertainty: UncertaintyPropagator | None = None,
+        executor: Executor | None = None,
+    ) -> None:
         self.state_manager = state_manager
+        self.comparison = comparison
+        self.uncertainty = uncertainty
+        # Mirrors the panel switch, which the worker thread must not read
+        self.uncertainty_enabled = uncertainty is not None
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.history_log = history_log
+        self.refresh = refresh if refresh is not None else RefreshController()
+        if evaluation_cache is None:
+            evaluation_cache = EvaluationCache(steps=self.SLIDER_STEPS)
+            evaluation_cache.invalidate(self.model)
+        self.evaluation_cache = evaluation_cache
+        self.histogram = Histogram2D(
+            self.state_manager.history.capacity, bins=self.HISTOGRAM_BINS
+        )
+        self._comparison_histograms = self._create_comparison_histograms()
+        self._downsamplers: dict[str, MinMaxDownsampler] = {}
+        self.statistics = RunningStatistics(
+            self.state_manager.output_variable_names, window=self.STATISTICS_WINDOW
+        )
+        self._statistics_summaries: dict[str, Summary] = {}
+        self.scan_cache = ScanCache(self.evaluation_cache)
+        self.scan: GridScan | None = None
+        self._scan_key: ScanKey | None = None
+        self._scan_cancelled = False
+        self.sensitivity: Sensitivity | None = None
+        self._sensitivity_key: tuple[float | None, ...] | None = None
+        self.scheduler: EvaluationScheduler[EvaluationRequest, EvaluationResult] = (
+            EvaluationScheduler(
+                self._evaluate_in_worker,
+                self._apply_evaluation,
+                merge=EvaluationRequest.merge,
+                executor=executor,
+            )
+        )
 
         self._initialize_event_listeners()
         self._initialize_ui()
@@ -54,7 +227,16 @@ class UI:
     def _initialize_event_listeners(self) -> None:
         self.ctrl.update_plot = self.update_plot
         self.ctrl.evaluate_and_update_plot = self.evaluate_and_update_plot
+        self.ctrl.request_update_plot = self.request_update_plot
+        self.ctrl.request_evaluation = self.request_evaluation
         self.ctrl.toggle_streaming = self.toggle_streaming
+        self.ctrl.set_input_value = self.set_input_value
+        self.ctrl.commit_input_value = self.commit_input_value
+        self.ctrl.set_output_display = self.set_output_display
+        self.ctrl.start_scan = self.start_scan
+        self.ctrl.cancel_scan = self.cancel_scan
+        self.ctrl.acknowledge_frame = self.acknowledge_frame
+        self.state.change("uncertainty_enabled")(self._on_uncertainty_toggle)
 
     def toggle_streaming(self) -> None:
         if self.state["streaming_active"]:
@@ -63,45 +245,326 @@ class UI:
             self.ctrl.start_streaming()
 
     def _collect_input_values(self) -> dict[str, float]:
-        input_dict: dict[str, float] = {}
-        for var in self.model.input_variables:
-            state_key = f"input_variables_{sanitize_string(var.name)}"
-            state_value = self.state[state_key]
-            bad_values = [None, "", "."]
-            if state_value not in bad_values:
-                try:
-                    input_dict[var.name] = float(state_value)
-                except ValueError as e:
-                    print(
-                        f"Warning: Could not convert state value '{state_value}' for variable '{var.name}' to float: {e}"
-                    )
-        return input_dict
+        with self.metrics.stage("collect_inputs"):
+            return self.state_manager.read_inputs()
+
+    def _update_output_values(
+        self, output: dict[str, float], statistics: dict[str, Summary]
+    ) -> None:
+        self.state_manager.write_outputs(output)
+        self._statistics_summaries = statistics
+        self.output_panel.refresh()
+
+    def _sync_statistics(self) -> None:
+        # Called after every append, before samples can be evicted unseen
+        with self.metrics.stage("statistics"):
+            self.statistics.sync(self.state_manager.history)
+
+    def _summarize_statistics(self) -> dict[str, Summary]:
+        self._sync_statistics()
+        session, window = self.STATISTICS_SCOPES
+        return {session: self.statistics.session(), window: self.statistics.recent()}
 
-    def _update_output_values(self, output: dict[str, float]) -> None:
-        output_df = pd.DataFrame.from_dict(self.state["output_plot_data"])
+    def evaluate_model(
+        self, input_dict: dict[str, float] | None = None
+    ) -> dict[str, float]:
+        """Evaluate the model and append the outputs to history.
 
-        # cast all columns to float
-        row = {col: float(output[col]) for col in output_df.columns}
-        # Create new row with same columns as existing dataframe
-        new_row = pd.DataFrame([row], columns=output_df.columns)
-        output_df = pd.concat([output_df, new_row], ignore_index=True)
+        Inputs already evaluated at the same slider step are served from the
+        evaluation cache. Compared models, if any, evaluate the same inputs
+        concurrently. Touches no trame state, so it is safe to call from the
+        worker thread as long as ``input_dict`` is given.
+        """
+        if input_dict is None:
+            input_dict = self._collect_input_values()
 
-        self.state["output_plot_data"] = output_df.to_dict(orient="list")
-        self.state.dirty("output_plot_data")
+        inputs = input_dict
+        return self._run_compared(lambda: self._evaluate_reference(inputs), inputs)
 
-        for key, value in output.items():
-            state_key = f"{self.state_manager.PREFIX_OUTPUT}_{sanitize_string(key)}"
-            self.state_manager.set_state(state_key, float(value))
+    def _evaluate_reference(
+        self, input_dict: dict[str, float]
+    ) -> tuple[dict[str, float], float | None]:
+        """Evaluate and record ``input_dict`` with the model.
 
-    def evaluate_model(self) -> None:
-        input_dict = self._collect_input_values()
-        output = self.model.evaluate(input_dict)
-        self._update_output_values(output)
+        Returns:
+            The outputs, and the seconds spent in the model call, or
+            ``None`` if they came from the evaluation cache.
+        """
+        key = self.evaluation_cache.key(input_dict)
+        values = self.evaluation_cache.get(key)
+        seconds = None
+        if values is None:
+            with self.metrics.stage("evaluate"):
+                start = time.perf_counter()
+                output = self.model.evaluate(input_dict)
+                seconds = time.perf_counter() - start
+                values = {name: float(value) for name, value in output.items()}
+            self.evaluation_cache.put(key, values)
+
+        with self.metrics.stage("history_append"):
+            self.state_manager.history.append(values)
+            if self.history_log is not None:
+                self.history_log.append({**input_dict, **values})
+        self._sync_statistics()
+        if self.uncertainty is not None and self.uncertainty_enabled:
+            with self.metrics.stage("uncertainty"):
+                estimate = self.uncertainty.propagate(input_dict, key)
+            self.uncertainty.record(estimate, self.state_manager.history.total)
+        return values, seconds
 
     def evaluate_and_update_plot(self) -> None:
-        self.evaluate_model()
+        outputs = self.evaluate_model()
+        self._update_output_values(outputs, self._summarize_statistics())
         self.update_plot()
 
+    def request_evaluation(self, *, update_plot: bool = True) -> asyncio.Future[None]:
+        """Evaluate the current inputs and refresh the plots off the event loop.
+
+        With ``update_plot=False`` only the output values are updated; the
+        new sample reaches the plots with the next refresh.
+        """
+        return self.scheduler.request(
+            EvaluationRequest(
+                inputs=self._collect_input_values(),
+                histogram_axes=self._collect_histogram_axes(),
+                update_plot=update_plot,
+            )
+        )
+
+    def request_update_plot(
+        self, *, full_refresh: bool = False
+    ) -> asyncio.Future[None]:
+        """Refresh the plots off the event loop, after any pending evaluation."""
+        return self.scheduler.request(
+            EvaluationRequest(
+                inputs=None,
+                histogram_axes=self._collect_histogram_axes(),
+                full_refresh=full_refresh,
+            )
+        )
+
+    def request_batch(self, streamer: BatchStreamer) -> asyncio.Future[int]:
+        """Evaluate one batch around the current inputs on the worker thread.
+
+        The plots are not refreshed; use ``request_update_plot`` for that.
+        """
+        return self.scheduler.run(
+            self._evaluate_batch, streamer, self._collect_input_values()
+        )
+
+    async def request_samples(self, columns: Mapping[str, npt.ArrayLike]) -> None:
+        """Append a batch evaluated elsewhere and refresh the plots.
+
+        Args:
+            columns: Equally long 1D arrays keyed by variable name; outputs
+                go to the history, and inputs and outputs to the history log.
+        """
+        await self.scheduler.run(self._append_samples, columns)
+        self.refresh.expire(time.monotonic())
+        if self.refresh.busy:
+            self.refresh.skip()
+        elif self.refresh.due:
+            await self.request_update_plot()
+
+    def request_inputs(self, samples: npt.NDArray[np.float64]) -> asyncio.Future[None]:
+        """Evaluate input vectors with one model call on the worker and append them.
+
+        Args:
+            samples: One input vector per row, in input variable order.
+
+        The plots are not refreshed; use ``request_update_plot`` for that.
+        """
+        return self.scheduler.run(self._evaluate_inputs, samples)
+
+    def _evaluate_inputs(self, samples: npt.NDArray[np.float64]) -> None:
+        names = self.state_manager.input_variable_names
+
+        def evaluate() -> tuple[None, float]:
+            with self.metrics.stage("evaluate_batch"):
+                start = time.perf_counter()
+                outputs = evaluate_batch(self.model, names, samples)
+                seconds = time.perf_counter() - start
+            self._append_samples(
+                {**{name: samples[:, i] for i, name in enumerate(names)}, **outputs}
+            )
+            return None, seconds
+
+        self._run_compared(evaluate, samples)
+
+    def show_inputs(self, values: npt.NDArray[np.float64]) -> None:
+        """Show an input vector, in input variable order, in the input panel."""
+        for index, value in enumerate(values.tolist()):
+            self.state_manager.set_input(index, value)
+        self.input_panel.refresh()
+
+    def claim_frame(self) -> bool:
+        """Whether a periodic refresh should push plots now.
+
+        Returns ``False``, and counts the frame as skipped, while the client
+        has not yet drawn the previous one. Call once per tick.
+        """
+        self.refresh.expire(time.monotonic())
+        if self.refresh.busy:
+            self.refresh.skip()
+            return False
+        return True
+
+    def acknowledge_frame(self, frame: int) -> None:
+        """Called by the client once it has drawn ``frame``."""
+        latency = self.refresh.acknowledge(frame)
+        if latency is not None:
+            self.metrics.record("client_ack", latency)
+
+    def _append_samples(self, columns: Mapping[str, npt.ArrayLike]) -> None:
+        self.state_manager.history.extend(columns)
+        if self.history_log is not None:
+            self.history_log.extend(columns)
+        self._sync_statistics()
+
+    async def replay_history(
+        self, reader: HistoryReader, stop: int | None = None
+    ) -> None:
+        """Show the logged samples before row ``stop`` of ``reader`` and redraw.
+
+        Only as many rows as the history holds are read from the log.
+        """
+        await self.scheduler.run(self._load_history_window, reader, stop)
+        await self.request_update_plot(full_refresh=True)
+
+    def _load_history_window(self, reader: HistoryReader, stop: int | None) -> None:
+        history = self.state_manager.history
+        stop = len(reader) if stop is None else stop
+        start = max(stop - history.capacity, 0)
+        window = reader.window(
+            [name for name in history.names if name in reader.outputs], start, stop
+        )
+        history.clear()
+        history.extend(window)
+        if self.comparison is not None:
+            # The log holds no outputs of compared models
+            self.comparison.pad(len(history))
+        if self.uncertainty is not None:
+            # Nor any confidence bands
+            self.uncertainty.history.clear()
+            self.uncertainty.pad(history.total)
+        # The incremental plot caches assume the history only ever grows
+        self.histogram = Histogram2D(history.capacity, bins=self.HISTOGRAM_BINS)
+        self._comparison_histograms = self._create_comparison_histograms()
+        self._downsamplers.clear()
+        # The statistics cover the replayed samples
+        self.statistics.reset()
+        self._sync_statistics()
+
+    def _evaluate_batch(self, streamer: BatchStreamer, inputs: dict[str, float]) -> int:
+        samples = streamer.sample(inputs)
+
+        def evaluate() -> tuple[int, float]:
+            with self.metrics.stage("evaluate_batch"):
+                start = time.perf_counter()
+                outputs = streamer.evaluate(samples)
+                seconds = time.perf_counter() - start
+                count = streamer.record(samples, outputs)
+            self._sync_statistics()
+            return count, seconds
+
+        return self._run_compared(evaluate, samples)
+
+    def _run_compared(
+        self,
+        evaluate: Callable[[], tuple[T, float | None]],
+        samples: npt.NDArray[np.float64] | Mapping[str, float],
+    ) -> T:
+        """Run ``evaluate`` while the compared models, if any, evaluate ``samples``.
+
+        Args:
+            evaluate: Evaluates and records ``samples`` with the model, and
+                returns its result and the seconds spent in the model call;
+                see ``ModelComparison.run``.
+            samples: One input vector per row, or a single set of inputs.
+        Returns:
+            The result of ``evaluate``.
+        """
+        if self.comparison is None:
+            return evaluate()[0]
+
+        if isinstance(samples, Mapping):
+            samples = self.comparison.row(samples)
+        result = self.comparison.run(evaluate, samples)
+        for label, seconds in self.comparison.last_run.items():
+            self.metrics.record(f"evaluate[{label}]", seconds)
+        return result
+
+    def _evaluate_in_worker(self, request: EvaluationRequest) -> EvaluationResult:
+        if request.inputs is not None:
+            outputs = self.evaluate_model(request.inputs)
+        else:
+            # Show the newest sample, which may come from batched streaming
+            outputs = self.state_manager.history.latest()
+        plot = (
+            self._build_plot_update(
+                request.histogram_axes, full_refresh=request.full_refresh
+            )
+            if request.update_plot
+            else None
+        )
+        return EvaluationResult(
+            outputs=outputs, plot=plot, statistics=self._summarize_statistics()
+        )
+
+    def _apply_evaluation(self, result: EvaluationResult) -> None:
+        start = time.perf_counter()
+        with self.metrics.stage("apply"):
+            self._update_output_values(result.outputs, result.statistics)
+            if result.plot is not None:
+                self._apply_plot_update(result.plot)
+            if self.comparison is not None:
+                self._update_comparison_panel()
+            if self.uncertainty is not None:
+                self._update_uncertainty_panel()
+            if self.metrics.enabled:
+                self._update_performance_panel()
+        with self.metrics.stage("flush"):
+            self.state.flush()
+        if result.plot is not None:
+            self.refresh.record_tick(result.plot.cost + time.perf_counter() - start)
+
+    def _update_performance_panel(self) -> None:
+        self.state["performance_stages"] = [
+            {"stage": name, **{k: round(v, 3) for k, v in stats.items()}}
+            for name, stats in sorted(self.metrics.summary().items())
+        ]
+        self.state["performance_payloads"] = [
+            {"figure": figure, **payload}
+            for figure, payload in sorted(self.metrics.payloads().items())
+        ]
+        self.state["performance_refresh"] = {
+            "interval_ms": round(self.refresh.interval * 1000.0, 1),
+            "frames": self.refresh.frames,
+            "skipped": self.refresh.skipped,
+        }
+
+    def _update_comparison_panel(self) -> None:
+        assert self.comparison is not None
+        comparison = self.comparison
+        self.state["comparison_models"] = [
+            {
+                "label": label,
+                "evaluations": comparison.evaluations.get(label, 0),
+                "latency_ms": round(comparison.latency.get(label, 0.0) * 1000.0, 3),
+                "mean_latency_ms": round(
+                    comparison.mean_latency.get(label, 0.0) * 1000.0, 3
+                ),
+            }
+            for label in comparison.labels
+        ]
+
+    def _update_uncertainty_panel(self) -> None:
+        assert self.uncertainty is not None
+        self.state["uncertainty_status"] = {
+            "samples": self.uncertainty.samples,
+            "sample_us": round(self.uncertainty.cost_per_sample * 1e6, 1),
+        }
+
     def _initialize_ui(self) -> None:
         with SinglePageLayout(self.state_manager.server) as layout:
             with layout.toolbar:
@@ -128,6 +591,12 @@ class UI:
             style="z-index: 1000;",
             click=self.ctrl.toggle_streaming,
         )
+        self.frame_acknowledger = JSEval(
+            exec=(
+                "window.requestAnimationFrame(() => "
+                f"trigger('{self.ctrl.trigger_name(self.acknowledge_frame)}', [$event]))"
+            )
+        )
 
         with VContainer(fluid=True):
             with VDivider():
@@ -148,107 +617,542 @@ class UI:
                     with VDivider():
                         Div("Output Variables")
                     self._initialize_output_widgets()
+        if self.comparison is not None:
+            with VContainer(fluid=True):
+                with VDivider():
+                    Div("Model Comparison")
+                self._initialize_comparison_panel()
+        if self.uncertainty is not None:
+            with VContainer(fluid=True):
+                with VDivider():
+                    Div("Input Uncertainty")
+                self._initialize_uncertainty_panel()
+        with VContainer(fluid=True):
+            with VDivider():
+                Div("Parameter Scan")
+            self._initialize_scan_panel()
+        with VContainer(fluid=True):
+            with VDivider():
+                Div("Sensitivity")
+            self._initialize_sensitivity_panel()
+        if self.metrics.enabled:
+            with VContainer(fluid=True):
+                with VDivider():
+                    Div("Performance")
+                self._initialize_performance_panel()
+
+    def _initialize_comparison_panel(self) -> None:
+        self.state["comparison_models"] = []
+
+        Div(
+            "Compared models are plotted dotted in the timeseries, and as "
+            "contours over the histogram."
+        )
+        with VTable(density="compact"):
+            with Thead(), Tr():
+                for title in ("Model", "Evaluations", "Latest", "Mean"):
+                    Th(title)
+            with Tbody():
+                with Tr(v_for="row in comparison_models", key="row.label"):
+                    Td("{{ row.label }}")
+                    Td("{{ row.evaluations }}")
+                    Td("{{ row.latency_ms }} ms")
+                    Td("{{ row.mean_latency_ms }} ms")
+
+    def _initialize_uncertainty_panel(self) -> None:
+        assert self.uncertainty is not None
+        low, high = self.uncertainty.band
+        self.state.update(
+            {"uncertainty_enabled": self.uncertainty_enabled, "uncertainty_status": {}}
+        )
+
+        VSwitch(
+            v_model=("uncertainty_enabled",),
+            label=f"Show mean and {low:g}-{high:g} percentile bands",
+            color="primary",
+        )
+        Div(
+            "{{ uncertainty_status.samples }} Monte Carlo samples per estimate, "
+            "{{ uncertainty_status.sample_us }} µs per sample"
+        )
+
+    def _on_uncertainty_toggle(self, **kwargs: Any) -> None:
+        self.uncertainty_enabled = bool(self.state["uncertainty_enabled"])
+        # Adds or removes the band traces
+        self.request_update_plot()
+
+    def _initialize_scan_panel(self) -> None:
+        scannable = [
+            spec.name
+            for spec in self.state_manager.schema.inputs
+            if spec.value_range is not None
+            and spec.value_range[1] > spec.value_range[0]
+        ]
+        self.state.update(
+            {
+                "scan_input_items": scannable,
+                "scan_x": scannable[0] if scannable else None,
+                "scan_y": scannable[1] if len(scannable) > 1 else None,
+                "scan_output": self.state_manager.output_variable_names[0],
+                "scan_resolution": self.SCAN_DEFAULT_RESOLUTION,
+                "scan_running": False,
+                "scan_progress": 0,
+            }
+        )
+        self.state.change("scan_output")(self._on_scan_output_change)
+
+        with VRow():
+            with VCol(cols=3):
+                VSelect(
+                    v_model=("scan_x",),
+                    items=("scan_input_items",),
+                    label="X Variable",
+                )
+                VSelect(
+                    v_model=("scan_y",),
+                    items=("scan_input_items",),
+                    label="Y Variable",
+                    clearable=True,
+                    hint="Clear for a line scan",
+                    persistent_hint=True,
+                )
+                VSelect(
+                    v_model=("scan_output",),
+                    items=("hist_axis_items",),
+                    label="Output",
+                )
+                VSlider(
+                    v_model=("scan_resolution",),
+                    min=2,
+                    max=self.SCAN_MAX_RESOLUTION,
+                    step=1,
+                    label="Resolution",
+                    thumb_label=True,
+                )
+                VBtn("Run Scan", v_if="!scan_running", click=self.ctrl.start_scan)
+                VBtn("Cancel", v_else=True, click=self.ctrl.cancel_scan)
+                VProgressLinear(model_value=("scan_progress",), classes="mt-2")
+            with VCol():
+                with VContainer(fluid=True, style="position: relative; height: 400px;"):
+                    Figure(
+                        figure=go.Figure(),
+                        state_variable_name=self.SCAN_FIGURE_KEY,
+                        responsive=True,
+                    )
+
+    async def start_scan(self) -> None:
+        """Scan the selected inputs over their value ranges, chunk by chunk.
+
+        The other inputs are held at their current values. Each chunk runs
+        on the evaluation worker, so interactive evaluations interleave with
+        the scan, and the plot is redrawn as each chunk completes. Completed
+        scans are cached.
+        """
+        if self.state["scan_running"] or not self.state["scan_x"]:
+            return
+
+        x_name = self.state["scan_x"]
+        y_name = self.state["scan_y"] if self.state["scan_y"] != x_name else None
+        resolution = int(self.state["scan_resolution"])
+        inputs = self._collect_input_values()
+
+        key = self.scan_cache.key(x_name, y_name, resolution, inputs)
+        scan = self.scan_cache.get(key)
+        if scan is None and key == self._scan_key:
+            # Resume the cancelled scan
+            scan = self.scan
+        if scan is None:
+            scan = GridScan(self.model, x_name, y_name, resolution, inputs)
+        self.scan = scan
+        self._scan_key = key
+
+        self._scan_cancelled = False
+        self.state["scan_running"] = True
+        try:
+            while not scan.done and not self._scan_cancelled:
+                self._show_scan()
+                await self.scheduler.run(scan.evaluate_next_chunk)
+        finally:
+            self.state["scan_running"] = False
+            self._show_scan()
+
+        if scan.done:
+            self.scan_cache.put(key, scan)
+
+    def cancel_scan(self) -> None:
+        self._scan_cancelled = True
+
+    def _on_scan_output_change(self, **kwargs: Any) -> None:
+        if self.scan is not None:
+            self._show_scan()
+
+    def _show_scan(self) -> None:
+        scan = self.scan
+        if scan is None:
+            return
+
+        output = self.state["scan_output"]
+        values = scan.grid(output)
+        if scan.y is None:
+            trace: go.Scatter | go.Heatmap = go.Scatter(
+                x=scan.x, y=values, mode="lines"
+            )
+            layout = {"xaxis_title": scan.x_name, "yaxis_title": output}
+        else:
+            trace = go.Heatmap(
+                z=values, x=scan.x, y=scan.y, colorbar={"title": {"text": output}}
+            )
+            layout = {"xaxis_title": scan.x_name, "yaxis_title": scan.y_name}
+        figure = go.Figure(data=[trace])
+        figure.update_layout(  # pyright: ignore[reportUnknownMemberType]
+            **layout
+        )
+
+        self.state[self.SCAN_FIGURE_KEY] = Figure.to_data(figure)
+        self.state["scan_progress"] = round(scan.progress * 100)
+        self.state.flush()
+
+    def _initialize_sensitivity_panel(self) -> None:
+        self.state.update(
+            {
+                "sensitivity_output": self.state_manager.output_variable_names[0],
+                "sensitivity_view": self.SENSITIVITY_VIEWS[0],
+                "sensitivity_enabled": True,
+            }
+        )
+        self.state.change("sensitivity_output", "sensitivity_view")(
+            self._on_sensitivity_view_change
+        )
+
+        with VRow():
+            with VCol(cols=3):
+                VSelect(
+                    v_model=("sensitivity_output",),
+                    items=("hist_axis_items",),
+                    label="Output",
+                    disabled=("sensitivity_view === 'Heatmap'",),
+                )
+                VSelect(
+                    v_model=("sensitivity_view",),
+                    items=(self.SENSITIVITY_VIEWS,),
+                    label="View",
+                )
+                VSwitch(
+                    v_model=("sensitivity_enabled",),
+                    label="Follow operating point",
+                    color="primary",
+                )
+            with VCol():
+                with VContainer(fluid=True, style="position: relative; height: 400px;"):
+                    Figure(
+                        figure=go.Figure(),
+                        state_variable_name=self.SENSITIVITY_FIGURE_KEY,
+                        responsive=True,
+                    )
+
+    async def request_sensitivity(self) -> None:
+        """Compute the Jacobian at the current inputs on the worker and show it.
+
+        Nothing is computed while the operating point stays at the same
+        slider step, so calling this periodically is cheap while the inputs
+        are idle.
+        """
+        if not self.state["sensitivity_enabled"]:
+            return
+
+        inputs = self._collect_input_values()
+        key = self.evaluation_cache.key(inputs)
+        if key == self._sensitivity_key:
+            return
+
+        try:
+            self.sensitivity = await self.scheduler.run(
+                compute_sensitivity, self.model, inputs
+            )
+        except ValueError as e:
+            print(f"Warning: Cannot compute sensitivities: {e}")
+            self.state["sensitivity_enabled"] = False
+            self.state.flush()
+            return
+        self._sensitivity_key = key
+        self._show_sensitivity()
+
+    def _on_sensitivity_view_change(self, **kwargs: Any) -> None:
+        if self.sensitivity is not None:
+            self._show_sensitivity()
+
+    def _show_sensitivity(self) -> None:
+        sensitivity = self.sensitivity
+        if sensitivity is None:
+            return
+
+        limit = self.SENSITIVITY_MAX_INPUTS
+        if self.state["sensitivity_view"] == "Heatmap":
+            outputs = self.state_manager.displayed_outputs()
+            rows = [sensitivity.outputs.index(name) for name in outputs]
+            values = sensitivity.values[rows]
+            # The inputs most sensitive for any displayed output
+            columns = np.argsort(-np.abs(values).max(axis=0, initial=0.0))[:limit]
+            trace: go.Bar | go.Heatmap = go.Heatmap(
+                z=values[:, columns],
+                x=[sensitivity.inputs[j] for j in columns],
+                y=outputs,
+                colorscale="RdBu",
+                zmid=0,
+                colorbar={"title": {"text": "per input range"}},
+            )
+            layout = {"xaxis_title": "input", "yaxis_title": "output"}
+        else:
+            output = self.state["sensitivity_output"]
+            ranked = sensitivity.ranked(output)[:limit][::-1]  # largest on top
+            trace = go.Bar(
+                x=[value for _, value in ranked],
+                y=[name for name, _ in ranked],
+                orientation="h",
+            )
+            layout = {
+                "xaxis_title": f"change of {output} per input range",
+                "yaxis_title": "input",
+            }
+        figure = go.Figure(data=[trace])
+        figure.update_layout(  # pyright: ignore[reportUnknownMemberType]
+            **layout
+        )
+
+        self.state[self.SENSITIVITY_FIGURE_KEY] = Figure.to_data(figure)
+        self.state.flush()
+
+    def _initialize_performance_panel(self) -> None:
+        self.state["performance_stages"] = []
+        self.state["performance_payloads"] = []
+        self.state["performance_refresh"] = {}
+
+        Div(
+            "Refresh interval {{ performance_refresh.interval_ms }} ms, "
+            "{{ performance_refresh.skipped }} of "
+            "{{ performance_refresh.frames + performance_refresh.skipped }} "
+            "frames skipped"
+        )
+
+        with VTable(density="compact"):
+            with Thead(), Tr():
+                for title in ("Stage", "Count", "Mean", "p50", "p95", "p99"):
+                    Th(title)
+            with Tbody():
+                with Tr(v_for="row in performance_stages", key="row.stage"):
+                    Td("{{ row.stage }}")
+                    Td("{{ row.count }}")
+                    Td("{{ row.mean_ms }} ms")
+                    Td("{{ row.p50_ms }} ms")
+                    Td("{{ row.p95_ms }} ms")
+                    Td("{{ row.p99_ms }} ms")
+        with VTable(density="compact"):
+            with Thead(), Tr():
+                for title in ("Figure", "Pushes", "Bytes"):
+                    Th(title)
+            with Tbody():
+                with Tr(v_for="row in performance_payloads", key="row.figure"):
+                    Td("{{ row.figure }}")
+                    Td("{{ row.pushes }}")
+                    Td("{{ row.bytes }}")
 
     def _initialize_2d_histogram_variables(self) -> None:
         with VContainer(fluid=True):
             # x variable
             VSelect(
                 v_model=("hist_x_axis", "1:4"),
-                items=("x_select",),
+                items=("hist_axis_items",),
                 label="X Variable",
                 # update_modelValue=self.ctrl.update_plot,
             )
             # y variable
             VSelect(
                 v_model=("hist_y_axis",),
-                items=("y_select",),
+                items=("hist_axis_items",),
                 label="Y Variable",
                 # update_modelValue=self.ctrl.update_plot,
             )
 
     def _initialize_output_widgets(self) -> None:
-        with VContainer(fluid=True):
-            for name in self.state_manager.output_variable_names:
-                state_key = (
-                    f"{self.state_manager.PREFIX_OUTPUT}_{sanitize_string(name)}"
-                )
-                with VRow():
-                    with VCol():
-                        Div(f"{name}")
-                    with VCol():
-                        VTextField(
-                            v_model=(state_key,),
-                            readonly=True,
-                        )
-
-    def _initialize_input_widgets(self) -> None:
-        with VContainer(fluid=True, max_height="500px", style="overflow-y: auto;"):
-            for var in self.model.input_variables:
-                self._create_slider_for_variable(var)
-
-    def _create_slider_for_variable(self, var: ScalarVariable) -> None:
-        name = var.name
+        outputs = self.state_manager.schema.outputs
+        self.state["output_statistics_scope"] = self.STATISTICS_SCOPES[0]
+        self.state.change("output_statistics_scope")(self._on_statistics_scope_change)
+        self.output_panel = VariablePanel(
+            self.state,
+            "output_panel",
+            self.state_manager.output_variable_names,
+            self._output_row,
+            page_size=self.PANEL_PAGE_SIZE,
+        )
+        panel = self.output_panel
 
-        if var.value_range is None:
-            raise ValueError(
-                f"Cannot create slider for variable '{name}' without value range."
+        with VContainer(fluid=True):
+            self._create_panel_search(panel, len(outputs))
+            VSelect(
+                v_model=("output_statistics_scope",),
+                items=(self.STATISTICS_SCOPES,),
+                label="Statistics",
+                hint=f"Window covers up to the last {self.STATISTICS_WINDOW} samples",
+                persistent_hint=True,
+                density="compact",
             )
-        value_range = var.value_range
-        max = value_range[1]
-        min = value_range[0]
-
-        step = (max - min) / 100.0
-        state_key = f"{self.state_manager.PREFIX_INPUT}_{sanitize_string(name)}"
-
-        if step <= 0:
-            with VRow():
+            with VRow(v_for=f"row in {panel.rows_key}", key="row.index", dense=True):
+                with VCol(cols=1):
+                    VCheckbox(
+                        model_value=("row.display",),
+                        update_modelValue=(
+                            self.ctrl.set_output_display,
+                            "[row.index, $event]",
+                        ),
+                        density="compact",
+                        hide_details=True,
+                    )
                 with VCol():
-                    Div(f"{name}")
+                    Div("{{ row.name }}")
+                    Div(
+                        "{{ row.statistics }}",
+                        classes="text-caption text-medium-emphasis",
+                    )
                 with VCol():
                     VTextField(
-                        v_model=(state_key,),
+                        model_value=("row.value",),
                         readonly=True,
                     )
-        else:
-            with VRow():
+            self._create_panel_pagination(panel)
+
+    def _initialize_input_widgets(self) -> None:
+        inputs = self.state_manager.schema.inputs
+        for spec in inputs:
+            if spec.value_range is None:
+                raise ValueError(
+                    f"Cannot create slider for variable '{spec.name}' without value range."
+                )
+
+        # Everything but the value is fixed, so rows are built from a template
+        self._input_rows = [
+            {
+                "index": spec.tensor_index,
+                "name": spec.name,
+                "min": spec.value_range[0],
+                "max": spec.value_range[1],
+                "step": (spec.value_range[1] - spec.value_range[0]) / self.SLIDER_STEPS,
+                "min_label": round(spec.value_range[0], 2),
+                "max_label": round(spec.value_range[1], 2),
+            }
+            for spec in inputs
+            if spec.value_range is not None
+        ]
+        self.input_panel = VariablePanel(
+            self.state,
+            "input_panel",
+            self.state_manager.input_variable_names,
+            self._input_row,
+            page_size=self.PANEL_PAGE_SIZE,
+        )
+        panel = self.input_panel
+
+        self._create_panel_search(panel, len(inputs))
+        with VContainer(fluid=True, max_height="500px", style="overflow-y: auto;"):
+            with VRow(v_for=f"row in {panel.rows_key}", key="row.index"):
                 with VCol():
-                    Div(f"{name}")
-                    with VRow(
-                        style="margin: 0 auto;",
-                    ):
-                        Div(f"{round(min, 2)} ")
+                    Div("{{ row.name }}")
+                    with VRow(v_if="row.step > 0", style="margin: 0 auto;"):
+                        Div("{{ row.min_label }} ")
                         VSlider(
-                            v_model=(state_key,),
-                            min=min,
-                            max=max,
-                            step=step,
-                            end=self.evaluate_and_update_plot,
+                            v_model=("row.value",),
+                            min=("row.min",),
+                            max=("row.max",),
+                            step=("row.step",),
+                            end=(self.ctrl.commit_input_value, "[row.index, $event]"),
                         )
-                        Div(f"{round(max, 2)}")
+                        Div("{{ row.max_label }}")
                 with VCol():
                     VTextField(
-                        v_model=(state_key,),
+                        v_model=("row.value",),
+                        readonly=("row.step <= 0",),
+                        update_modelValue=(
+                            self.ctrl.set_input_value,
+                            "[row.index, $event]",
+                        ),
                     )
+        self._create_panel_pagination(panel)
 
-    def _collect_values_by_variable_name(
-        self, variable_names: list[str]
-    ) -> pd.DataFrame:
-        output_df = pd.DataFrame.from_dict(self.state["output_plot_data"]).copy()
+    def _create_panel_search(self, panel: VariablePanel, n_variables: int) -> None:
+        # Small models are shown on a single page without search
+        if n_variables > panel.page_size:
+            VTextField(
+                v_model=(panel.search_key,),
+                label="Search",
+                prepend_inner_icon="mdi-magnify",
+                clearable=True,
+                density="compact",
+                hide_details=True,
+            )
+
+    def _create_panel_pagination(self, panel: VariablePanel) -> None:
+        VPagination(
+            v_if=f"{panel.page_count_key} > 1",
+            v_model=(panel.page_key,),
+            length=(panel.page_count_key,),
+            total_visible=7,
+            density="compact",
+        )
+
+    def _input_row(self, index: int) -> dict[str, object]:
+        return {
+            **self._input_rows[index],
+            "value": self.state_manager.input_values[index],
+        }
+
+    def _output_row(self, index: int) -> dict[str, object]:
+        spec = self.state_manager.schema.outputs[index]
+        return {
+            "index": index,
+            "name": spec.name,
+            "value": self.state_manager.output_values[index],
+            "display": self.state_manager.display_outputs[index],
+            "statistics": self._statistics_text(index),
+        }
+
+    def _statistics_text(self, index: int) -> str:
+        summary = self._statistics_summaries.get(self.state["output_statistics_scope"])
+        if summary is None or summary.samples[index] == 0:
+            return ""
+        low, median, high = summary.quantiles[index]
+        return (
+            f"n {summary.samples[index]}, "
+            f"mean {summary.mean[index]:.4g} \u00b1 {summary.std[index]:.4g}, "
+            f"min {summary.min[index]:.4g}, max {summary.max[index]:.4g}, "
+            f"p5/p50/p95 {low:.4g}/{median:.4g}/{high:.4g}, "
+            f"EWMA {summary.ewma[index]:.4g}"
+        )
 
-        # Remove any columns not in variable_names
-        output_df = output_df[variable_names]
+    def _on_statistics_scope_change(self, **kwargs: Any) -> None:
+        self.output_panel.refresh()
 
-        return output_df
+    def set_input_value(self, index: int, value: float | str | None) -> None:
+        """Store an edited input value without evaluating."""
+        self.state_manager.set_input(index, value)
+
+    def commit_input_value(
+        self, index: int, value: float | str | None
+    ) -> asyncio.Future[None]:
+        """Store an input value set with its slider and re-evaluate."""
+        self.state_manager.set_input(index, value)
+        return self.request_evaluation()
+
+    def set_output_display(self, index: int, display: bool) -> asyncio.Future[None]:
+        self.state_manager.set_display(index, display)
+        self.output_panel.refresh()
+        return self.request_update_plot()
+
+    def _collect_values_by_variable_name(
+        self, variable_names: list[str]
+    ) -> dict[str, npt.NDArray[np.floating]]:
+        return self.state_manager.history.columns(variable_names)
 
     def _collect_plot_variables(self) -> list[str]:
-        plot_variables: list[str] = []
-        for name in self.state_manager.output_variable_names:
-            state_key = (
-                f"{self.state_manager.PREFIX_DISPLAY_OUTPUT}_{sanitize_string(name)}"
-            )
-            if self.state.has(state_key) and self.state[state_key]:
-                plot_variables.append(name)
-        return plot_variables
+        return self.state_manager.displayed_outputs()
 
     def _initialize_2d_histogram_plot(self) -> None:
         with VContainer(fluid=True, style="position: relative; height: 400px;"):
@@ -260,84 +1164,297 @@ class UI:
             self._initialize_2d_histogram_variables()
 
     def _initialize_2d_histogram_figure(self) -> Figure:
-        self.figure_hist = self._create_2d_histogram_figure()
-        return Figure(figure=self.figure_hist, responsive=True)
+        fig = go.Figure()
+        fig.update_layout(  # pyright: ignore[reportUnknownMemberType]
+            xaxis_title=self.state["hist_x_axis"],
+            yaxis_title=self.state["hist_y_axis"],
+        )
+        figure = Figure(
+            figure=fig,
+            state_variable_name=self.HISTOGRAM_FIGURE_KEY,
+            responsive=True,
+        )
+        # The heatmap is set on the client from binary arrays; the figure
+        # is never sent back.
+        self.state.client_only(self.HISTOGRAM_FIGURE_KEY)
+        self.histogram_setter = JSEval(exec=self.SET_HISTOGRAM_JS)
+        return figure
 
-    def _create_2d_histogram_figure(
-        self,
-    ) -> go.Figure:
-        data = pd.DataFrame.from_dict(self.state["output_plot_data"])
+    def _collect_histogram_axes(self) -> tuple[str, str]:
+        return self.state["hist_x_axis"], self.state["hist_y_axis"]
 
-        x_data = self.state["hist_x_axis"]
-        y_data = self.state["hist_y_axis"]
+    def _build_histogram_update(self, axes: tuple[str, str]) -> dict[str, Any]:
+        """Bring the histogram up to date and encode it for ``SET_HISTOGRAM_JS``.
 
-        HISTOGRAM_BINS = 100  # Use default binning strategy of plotly
+        Only the counts and bin centers are sent, as binary arrays; the
+        layout stays on the client apart from the axis titles.
 
-        fig = px.density_heatmap(
-            data_frame=data,
-            x=x_data,
-            y=y_data,
-            nbinsx=HISTOGRAM_BINS,
-            nbinsy=HISTOGRAM_BINS,
-        )
-        return fig
+        Args:
+            axes: The x and y variable, as selected when the update was
+                requested; the state must not be read from the worker.
+        """
+        x_name, y_name = axes
+        self.histogram.sync(self.state_manager.history, x_name, y_name)
+
+        update: dict[str, Any] = {"x_title": x_name, "y_title": y_name, "z": None}
+        if self.histogram.ready:
+            counts = self.histogram.counts
+            # Counts are bounded by the history capacity, often well below 2**16
+            update["z"] = encode_array(
+                counts, np.min_scalar_type(max(int(counts.max()), 1))
+            )
+            update["x"] = encode_array(self.histogram.centers(0), np.float64)
+            update["y"] = encode_array(self.histogram.centers(1), np.float64)
+        update["overlays"] = self._build_comparison_overlays(x_name, y_name)
+        return update
+
+    def _create_comparison_histograms(self) -> dict[str, Histogram2D]:
+        if self.comparison is None:
+            return {}
+        return {
+            label: Histogram2D(history.capacity, bins=self.HISTOGRAM_BINS)
+            for label, history in self.comparison.histories.items()
+        }
+
+    def _build_comparison_overlays(
+        self, x_name: str, y_name: str
+    ) -> list[dict[str, Any]]:
+        """Encode the histogram of each compared model as contour lines."""
+        if self.comparison is None:
+            return []
+
+        colors = plotly.colors.qualitative.Plotly
+        overlays = []
+        for i, (label, histogram) in enumerate(self._comparison_histograms.items()):
+            history = self.comparison.histories[label]
+            if x_name not in history.names or y_name not in history.names:
+                continue
+            histogram.sync(history, x_name, y_name)
+            if not histogram.ready:
+                continue
+            counts = histogram.counts
+            overlays.append(
+                {
+                    "name": label,
+                    "color": colors[(i + 1) % len(colors)],
+                    "z": encode_array(
+                        counts, np.min_scalar_type(max(int(counts.max()), 1))
+                    ),
+                    "x": encode_array(histogram.centers(0), np.float64),
+                    "y": encode_array(histogram.centers(1), np.float64),
+                }
+            )
+        return overlays
 
     def _initialize_timeseries_plot(self) -> None:
         # Requires height to display properly
         with VContainer(fluid=True, style="position: relative; height: 400px;"):
             self.figure_time = self._initialize_timeseries_figure()
-        with VContainer(
-            fluid=True,
-            classes="d-flex flex-wrap",
-        ):
-            self._create_variables_to_plot()
-
-    def _create_variables_to_plot(self) -> None:
-        for var_name in self.state_manager.output_variable_names:
-            with VCol():
-                VCheckbox(
-                    v_model=(
-                        f"{self.state_manager.PREFIX_DISPLAY_OUTPUT}_{sanitize_string(var_name)}",
-                    ),
-                    label=var_name,
-                    change=self.ctrl.update_plot,
-                )
 
     def _initialize_timeseries_figure(self) -> Figure:
-        self.figure_time = self._create_timeseries_figure()
-        return Figure(figure=self.figure_time, responsive=True)
+        # The traces are set by the first plot update
+        self._timeseries_variables: list[str] | None = None
+        self._timeseries_total = 0
+        figure = Figure(
+            figure=go.Figure(),
+            state_variable_name=self.TIMESERIES_FIGURE_KEY,
+            responsive=True,
+        )
+        # Traces are set and extended on the client only, so they must not
+        # be echoed back to the server.
+        self.state.client_only(self.TIMESERIES_FIGURE_KEY)
+        self.timeseries_setter = JSEval(exec=self.SET_TRACES_JS)
+        self.timeseries_extender = JSEval(exec=self.EXTEND_TRACES_JS)
+        return figure
 
-    def _create_timeseries_figure(
-        self,
-    ) -> go.Figure:
-        output_plot_variables = self._collect_plot_variables()
-        data = self._collect_values_by_variable_name(output_plot_variables)
+    def _collect_timeseries_columns(self) -> dict[str, npt.NDArray[np.floating]]:
+        """Return the samples of every timeseries trace, keyed by trace name.
+
+        The displayed outputs come first, followed by the same outputs of
+        each compared model and then by the mean, lower and upper confidence
+        band of each output. Compared and band histories are kept aligned
+        with the output history, so all traces share its sample indices.
+        """
+        names = self._collect_plot_variables()
+        columns = self._collect_values_by_variable_name(names)
+        if self.comparison is not None:
+            for label, history in self.comparison.histories.items():
+                for name in names:
+                    if name in history.names:
+                        trace = self.comparison.trace_name(name, label)
+                        columns[trace] = history.column(name)
+        if self.uncertainty is not None and self.uncertainty_enabled:
+            # Samples appended without an estimate have no band
+            self.uncertainty.pad(self.state_manager.history.total)
+            for name in names:
+                for trace in self.uncertainty.band_names(name):
+                    columns[trace] = self.uncertainty.history.column(trace)
+        return columns
+
+    def _timeseries_styles(self) -> dict[str, dict[str, Any]]:
+        """Return the plotly attributes of every trace that is not an output.
 
-        plots = []
+        Compared outputs are dotted. Each confidence band is filled between
+        its lower and upper trace in the color plotly gives its output,
+        which is the default palette color of the output's trace index.
+        """
+        names = self._collect_plot_variables()
+        styles: dict[str, dict[str, Any]] = {}
+        if self.comparison is not None:
+            for label in self.comparison.histories:
+                for name in names:
+                    trace = self.comparison.trace_name(name, label)
+                    styles[trace] = {"line": {"dash": "dot"}}
+        if self.uncertainty is not None:
+            palette = plotly.colors.qualitative.Plotly
+            for i, name in enumerate(names):
+                color = palette[i % len(palette)]
+                red, green, blue = plotly.colors.hex_to_rgb(color)
+                fill = f"rgba({red}, {green}, {blue}, {self.UNCERTAINTY_BAND_OPACITY})"
+                mean, low, high = self.uncertainty.band_names(name)
+                band = {"mode": "lines", "legendgroup": high, "line": {"width": 0}}
+                styles[mean] = {
+                    "mode": "lines",
+                    "line": {"color": color, "dash": "dash"},
+                }
+                styles[low] = {**band, "showlegend": False}
+                styles[high] = {**band, "fill": "tonexty", "fillcolor": fill}
+        return styles
 
+    def _create_timeseries_traces(
+        self, data: dict[str, npt.NDArray[np.floating]]
+    ) -> dict[str, Any]:
+        """Encode the downsampled traces of every displayed variable.
+
+        Each distinct x array is encoded once and referenced by index, so
+        traces that were not downsampled share one copy of their x values.
+        """
+        history = self.state_manager.history
+        styles = self._timeseries_styles()
+
+        x_arrays: list[npt.NDArray[np.generic]] = []
+        traces = []
         for name, values in data.items():
-            x_data = np.linspace(0, 1, len(values)).tolist()
-            plots.append(  # pyright: ignore[reportUnknownMemberType]
-                go.Scatter(
-                    x=x_data,
-                    y=values,
-                    mode="lines+markers",
-                    name=name,
-                )
+            # Samples are plotted against their absolute index so that points
+            # appended later line up with the ones already on the client.
+            downsampler = self._downsamplers.setdefault(
+                name, MinMaxDownsampler(self.TIMESERIES_MAX_POINTS)
             )
+            x_data, y_data = downsampler.update(values, history.total)
+            if not x_arrays or not np.array_equal(x_arrays[-1], x_data):
+                x_arrays.append(x_data)
+            traces.append(
+                {
+                    "name": name,
+                    "x": len(x_arrays) - 1,
+                    "y": encode_array(y_data, self.TIMESERIES_Y_DTYPE),
+                    "style": styles.get(name, {}),
+                }
+            )
+
+        self._timeseries_variables = list(data)
+        self._timeseries_total = history.total
+        return {
+            "x": [encode_array(x, self.TIMESERIES_X_DTYPE) for x in x_arrays],
+            "traces": traces,
+        }
+
+    def _build_timeseries_update(
+        self, *, full_refresh: bool = False
+    ) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+        """Prepare the next timeseries push as ``(figure, delta)``.
+
+        Each trace's downsampler reports how its trace changed since the
+        last push, and only that edit is sent: the samples appended while
+        the history fits the point budget, and beyond it the buckets
+        completed since, along with the partial buckets at either end. The
+        whole figure is rebuilt when the set of displayed variables changes,
+        when the history was cleared, when the bucket size of a trace
+        changes, or on request.
+        """
+        history = self.state_manager.history
+        pending = history.total - self._timeseries_total
+        data = self._collect_timeseries_columns()
 
-        return go.Figure(data=plots)
+        if full_refresh or pending < 0 or list(data) != self._timeseries_variables:
+            with self.metrics.stage("build_timeseries"):
+                return self._create_timeseries_traces(data), None
 
-    def _update_figure(self) -> None:
-        fig1 = self._create_timeseries_figure()
-        fig2 = self._create_2d_histogram_figure()
+        if pending == 0:
+            return None, None
 
-        self.figure_time.update(  # pyright: ignore[reportUnknownMemberType]
-            plotly_fig=fig1
+        with self.metrics.stage("build_timeseries"):
+            edits = []
+            for name, values in data.items():
+                downsampler = self._downsamplers.get(name)
+                edit = (
+                    downsampler.changes(values, history.total)
+                    if downsampler is not None
+                    else None
+                )
+                if edit is None:
+                    return self._create_timeseries_traces(data), None
+                edits.append(edit)
+
+            points = [part for edit in edits for part in (edit.head, edit.tail)]
+            self._timeseries_total = history.total
+            delta = {
+                "x": encode_array(
+                    np.concatenate([np.empty(0), *(x for x, _ in points)]),
+                    self.TIMESERIES_X_DTYPE,
+                ),
+                "y": encode_array(
+                    np.concatenate([np.empty(0), *(y for _, y in points)]),
+                    self.TIMESERIES_Y_DTYPE,
+                ),
+                "edits": encode_array(
+                    [
+                        (
+                            edit.drop_head,
+                            edit.drop_tail,
+                            len(edit.head[0]),
+                            len(edit.tail[0]),
+                        )
+                        for edit in edits
+                    ],
+                    np.int32,
+                ),
+            }
+        return None, delta
+
+    def _build_plot_update(
+        self, histogram_axes: tuple[str, str], *, full_refresh: bool = False
+    ) -> PlotUpdate:
+        start = time.perf_counter()
+        timeseries, timeseries_delta = self._build_timeseries_update(
+            full_refresh=full_refresh
         )
-        self.figure_hist.update(  # pyright: ignore[reportUnknownMemberType]
-            plotly_fig=fig2
+        with self.metrics.stage("build_histogram"):
+            histogram = self._build_histogram_update(histogram_axes)
+        return PlotUpdate(
+            histogram=histogram,
+            timeseries=timeseries,
+            timeseries_delta=timeseries_delta,
+            cost=time.perf_counter() - start,
         )
 
-    def update_plot(self) -> None:
-        self._update_figure()
+    def _apply_plot_update(self, update: PlotUpdate) -> None:
+        self.histogram_setter.exec(update.histogram)
+        self.metrics.record_payload("histogram", update.histogram)
+
+        if update.timeseries is not None:
+            self.timeseries_setter.exec(update.timeseries)
+            self.metrics.record_payload("timeseries", update.timeseries)
+        if update.timeseries_delta is not None:
+            self.timeseries_extender.exec(update.timeseries_delta)
+            self.metrics.record_payload("timeseries", update.timeseries_delta)
+
+        # Sent last, so the client acknowledges once it has drawn the frame
+        self.frame_acknowledger.exec(self.refresh.frame_sent())
+
+    def update_plot(self, *, full_refresh: bool = False) -> None:
+        self._apply_plot_update(
+            self._build_plot_update(
+                self._collect_histogram_axes(), full_refresh=full_refresh
+            )
+        )
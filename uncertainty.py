@@ -0,0 +1,215 @@
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping
+from typing import NamedTuple
+import time
+
+import numpy as np
+
+from lume_model.models import TorchModel
+
+from history import OutputHistory
+from streaming import evaluate_batch
+
+
+class NoiseModel(NamedTuple):
+    """Gaussian measurement noise of one input.
+
+    ``sigma`` is a fraction of the input's value range if ``relative``,
+    otherwise in the input's own units. Noisy values are clipped to the
+    value range.
+    """
+
+    sigma: float
+    relative: bool = True
+
+
+class Uncertainty(NamedTuple):
+    """Monte Carlo estimate of the outputs at one operating point."""
+
+    mean: dict[str, float]
+    low: dict[str, float]  # lower percentile of the band
+    high: dict[str, float]  # upper percentile of the band
+    samples: int
+
+
+class UncertaintyPropagator:
+    """Propagates input noise through a model by Monte Carlo sampling.
+
+    Each estimate draws ``samples`` noisy input vectors around the operating
+    point and evaluates them with a single batched model call. After every
+    estimate the sample count is adapted so that the next one takes about
+    ``budget`` seconds, within ``[min_samples, max_samples]``. Estimates
+    are cached by input key, so an unchanged operating point costs nothing.
+
+    Recorded estimates are kept in ``history``, one mean, lower and upper
+    column per output, aligned sample for sample with the output history;
+    samples recorded without an estimate are NaN.
+    """
+
+    DEFAULT_SAMPLES = 256
+    DEFAULT_MIN_SAMPLES = 32
+    DEFAULT_MAX_SAMPLES = 16_384
+    DEFAULT_BUDGET = 0.05  # seconds per estimate
+    DEFAULT_BAND = (5.0, 95.0)  # percentiles
+    DEFAULT_CACHE_SIZE = 128
+    SMOOTHING = 0.3  # weight of the newest cost measurement
+
+    def __init__(
+        self,
+        model: TorchModel,
+        noise: NoiseModel | Mapping[str, NoiseModel],
+        capacity: int,
+        budget: float = DEFAULT_BUDGET,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        max_samples: int = DEFAULT_MAX_SAMPLES,
+        band: tuple[float, float] = DEFAULT_BAND,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        seed: int | None = None,
+    ) -> None:
+        """Set up the noise of every input.
+
+        Args:
+            model: The model to propagate the noise through.
+            noise: One noise model for every input, or noise models keyed by
+                input name; inputs without one are noise-free.
+            capacity: Samples kept per band column; should match the output
+                history.
+            budget: Target seconds per estimate.
+            min_samples: Fewest samples per estimate.
+            max_samples: Most samples per estimate.
+            band: Lower and upper percentile of the reported band.
+            cache_size: Estimates kept for reuse.
+            seed: Seed of the noise generator.
+        Raises:
+            ValueError: If a noise model names an unknown input or has a
+                negative sigma, or the sample bounds are not ordered.
+        """
+        if not 0 < min_samples <= max_samples:
+            raise ValueError(
+                f"Sample bounds must satisfy 0 < min <= max, got {min_samples} "
+                f"and {max_samples}."
+            )
+
+        self.model = model
+        self.input_names = [var.name for var in model.input_variables]
+        if isinstance(noise, NoiseModel):
+            noise = {name: noise for name in self.input_names}
+        unknown = sorted(set(noise) - set(self.input_names))
+        if unknown:
+            raise ValueError(f"Noise given for unknown inputs: {', '.join(unknown)}.")
+        if any(spec.sigma < 0 for spec in noise.values()):
+            raise ValueError("Noise sigma must not be negative.")
+
+        self._defaults = np.array(
+            [
+                np.nan if var.default_value is None else float(var.default_value)
+                for var in model.input_variables
+            ]
+        )
+        ranges = [var.value_range or (-np.inf, np.inf) for var in model.input_variables]
+        self._low = np.array([low for low, _ in ranges], dtype=np.float64)
+        self._high = np.array([high for _, high in ranges], dtype=np.float64)
+        sigma = []
+        for i, name in enumerate(self.input_names):
+            spec = noise.get(name, NoiseModel(0.0))
+            scale = self._high[i] - self._low[i] if spec.relative else 1.0
+            # Relative noise needs a finite range
+            sigma.append(spec.sigma * scale if np.isfinite(scale) else 0.0)
+        self._sigma = np.array(sigma)
+
+        self.budget = budget
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.band = band
+        self.samples = min(max(self.DEFAULT_SAMPLES, min_samples), max_samples)
+        self.cost_per_sample = 0.0  # smoothed seconds
+        self.rng = np.random.default_rng(seed)
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Hashable, Uncertainty] = OrderedDict()
+        self.history = OutputHistory(
+            [
+                column
+                for var in model.output_variables
+                for column in self.band_names(var.name)
+            ],
+            capacity,
+        )
+
+    def band_names(self, output: str) -> tuple[str, str, str]:
+        """Names of the mean, lower and upper band columns of ``output``."""
+        low, high = self.band
+        return f"{output} mean", f"{output} p{low:g}", f"{output} p{high:g}"
+
+    def propagate(
+        self, inputs: Mapping[str, float], key: Hashable | None = None
+    ) -> Uncertainty:
+        """Estimate the output mean and band at ``inputs``.
+
+        Args:
+            inputs: The operating point; missing inputs take their default.
+            key: If given, estimates are cached and reused under this key,
+                e.g. the evaluation cache key of ``inputs``.
+        """
+        if key is not None and key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        center = np.array(
+            [
+                inputs.get(name, default)
+                for name, default in zip(self.input_names, self._defaults)
+            ]
+        )
+        count = self.samples
+        noise = self.rng.standard_normal((count, len(center)))
+        samples = np.clip(center + noise * self._sigma, self._low, self._high)
+
+        start = time.perf_counter()
+        outputs = evaluate_batch(self.model, self.input_names, samples)
+        self._adapt(time.perf_counter() - start, count)
+
+        names = list(outputs)
+        values = np.stack([outputs[name] for name in names], axis=1)
+        mean = values.mean(axis=0)
+        low, high = np.percentile(values, self.band, axis=0)
+        result = Uncertainty(
+            mean=dict(zip(names, mean.tolist())),
+            low=dict(zip(names, low.tolist())),
+            high=dict(zip(names, high.tolist())),
+            samples=count,
+        )
+
+        if key is not None:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _adapt(self, seconds: float, count: int) -> None:
+        cost = seconds / count
+        self.cost_per_sample = (
+            cost
+            if self.cost_per_sample == 0.0
+            else self.cost_per_sample + self.SMOOTHING * (cost - self.cost_per_sample)
+        )
+        target = int(self.budget / self.cost_per_sample) if self.cost_per_sample else 0
+        self.samples = min(max(target, self.min_samples), self.max_samples)
+
+    def record(self, estimate: Uncertainty, total: int) -> None:
+        """Record ``estimate`` as sample ``total - 1`` of the output history."""
+        self.pad(total - 1)
+        values: dict[str, float] = {}
+        for output, mean in estimate.mean.items():
+            names = self.band_names(output)
+            values.update(
+                zip(names, (mean, estimate.low[output], estimate.high[output]))
+            )
+        self.history.append(values)
+
+    def pad(self, total: int) -> None:
+        """Record NaN up to sample ``total - 1`` of the output history."""
+        self.history.skip(total - self.history.total)
+
+    def clear(self) -> None:
+        """Forget cached estimates, e.g. after the noise or model changed."""
+        self._cache.clear()